@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .message import Message
 
 
@@ -7,6 +7,7 @@ from .message import Message
 class Conversation:
     """Class representing a conversation history."""
     messages: List[Message] = field(default_factory=list)
+    _history_cache: Optional[List[Dict[str, str]]] = field(default=None, init=False, repr=False)
 
     def add_message(self, role: str, content: str) -> None:
         """
@@ -14,9 +15,10 @@ class Conversation:
         If the last message has the same role, append the new content to it.
         """
         if self.messages and self.messages[-1].role == role:
-            self.messages[-1].content += " " + content
+            self.messages[-1].append(content)
         else:
             self.messages.append(Message(role=role, content=content))
+        self._history_cache = None
 
     def get_history(self) -> List[Dict[str, str]]:
         """Get conversation history in a format suitable for LLM APIs."""
@@ -26,8 +28,11 @@ class Conversation:
         # print("#######################")
             
 
-        return [{"role": msg.role, "content": msg.content} for msg in self.messages]
+        if self._history_cache is None:
+            self._history_cache = [{"role": msg.role, "content": msg.content} for msg in self.messages]
+        return self._history_cache
 
     def clear(self) -> None:
         """Clear the conversation history."""
         self.messages = []
+        self._history_cache = None
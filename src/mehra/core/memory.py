@@ -3,14 +3,26 @@ Memory system for LLM conversation context.
 Supports short-term, episodic, semantic, and long-term memory with retrieval and ranking.
 """
 
+import asyncio
+import hashlib
+import heapq
+import itertools
 import json
-import uuid
-from dataclasses import dataclass, asdict, field
-from datetime import datetime, timedelta
+import math
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple, Any
 from enum import Enum
 import logging
 
+import msgpack
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,7 +35,7 @@ class MemoryType(str, Enum):
     LONG_TERM = "long_term"  # Compressed historical summaries
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryEntry:
     """A single memory entry."""
     id: str
@@ -38,13 +50,28 @@ class MemoryEntry:
     user_id: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     ttl_seconds: Optional[int] = None  # Time-to-live; None = indefinite
+    # First 100 characters of text for prompt assembly; derived, so never serialized
+    text_preview: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.text_preview = self.text[:100]
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for serialization."""
-        d = asdict(self)
-        d['type'] = self.type.value
-        d['timestamp'] = self.timestamp.isoformat()
-        return d
+        """Convert to dictionary for serialization (shares lists/dicts with the entry, no deep copy)."""
+        return {
+            "id": self.id,
+            "text": self.text,
+            "type": self.type.value,
+            "timestamp": self.timestamp.isoformat(),
+            "embedding": self.embedding,
+            "summary": self.summary,
+            "importance_score": self.importance_score,
+            "source": self.source,
+            "tags": self.tags,
+            "user_id": self.user_id,
+            "metadata": self.metadata,
+            "ttl_seconds": self.ttl_seconds,
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "MemoryEntry":
@@ -54,39 +81,267 @@ class MemoryEntry:
         data['timestamp'] = datetime.fromisoformat(data['timestamp'])
         return cls(**data)
 
-    def is_expired(self) -> bool:
-        """Check if memory has exceeded its TTL."""
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        """Check if memory has exceeded its TTL (pass `now` to reuse one clock read across a scan)."""
         if self.ttl_seconds is None:
             return False
-        age = datetime.now() - self.timestamp
+        age = (now or datetime.now()) - self.timestamp
         return age.total_seconds() > self.ttl_seconds
 
-    def recency_weight(self, decay_hours: float = 24.0) -> float:
+    def recency_weight(self, decay_hours: float = 24.0, now: Optional[datetime] = None) -> float:
         """Compute recency weight: closer to now = higher weight (0-1)."""
-        age_hours = (datetime.now() - self.timestamp).total_seconds() / 3600.0
+        age_hours = ((now or datetime.now()) - self.timestamp).total_seconds() / 3600.0
         # Exponential decay: weight = exp(-age / decay_hours)
-        import math
         return math.exp(-age_hours / decay_hours)
 
 
+def _recency_importance_scores(
+    ages_ns: np.ndarray, importance: np.ndarray, beta: float, gamma: float, decay_hours: float
+) -> np.ndarray:
+    """beta * exp(-age / decay) + gamma * importance, computed in place in a single buffer."""
+    scores = ages_ns.astype(np.float64)
+    scores *= -1.0 / (3.6e12 * decay_hours)  # nanoseconds -> negative decay units
+    np.exp(scores, out=scores)
+    scores *= beta
+    scores += gamma * importance
+    return scores
+
+
+def normalize_embedding(embedding) -> Optional[np.ndarray]:
+    """Embedding as an L2-normalized float32 array (None if missing or all zeros)."""
+    if embedding is None:
+        return None
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else None
+
+
+class MemoryStore:
+    """
+    Columnar (structure-of-arrays) mirror of the manager's memories.
+
+    Embeddings live L2-normalized in one float16 matrix and the fields used for
+    filtering and ranking in parallel arrays, so retrieval filters and scores
+    candidates with whole-array operations instead of walking MemoryEntry objects.
+    Columns grow geometrically; deleted rows are tombstoned and compacted away
+    once they make up half the store.
+    """
+
+    TYPE_BITS = {t: 1 << code for code, t in enumerate(MemoryType)}  # one bit per type
+    NO_TTL = np.iinfo(np.int64).max
+    MAX_TAG_BITS = 64  # Tags past the first 64 distinct ones are matched against the entries
+
+    def __init__(self, capacity: int = 256):
+        self.clear(capacity)
+
+    def clear(self, capacity: int = 256) -> None:
+        """Drop all rows."""
+        self.capacity = capacity
+        self.size = 0
+        self.tombstones = 0
+        self.dim: Optional[int] = None
+        self.embeddings: Optional[np.ndarray] = None  # (capacity, dim) float16, allocated on first embedding
+        self.has_embedding = np.zeros(capacity, dtype=bool)
+        self.timestamps = np.zeros(capacity, dtype=np.int64)  # unix nanoseconds
+        self.ttl_ns = np.full(capacity, self.NO_TTL, dtype=np.int64)
+        self.importance = np.zeros(capacity, dtype=np.float32)
+        self.types = np.zeros(capacity, dtype=np.uint8)  # TYPE_BITS of each row
+        self.users = np.zeros(capacity, dtype=np.int32)  # interned user ids; 0 = no user
+        self.tag_masks = np.zeros(capacity, dtype=np.uint64)  # one bit per interned tag
+        self.tag_overflow = np.zeros(capacity, dtype=bool)  # row has tags without a bit
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.user_codes: Dict[str, int] = {}
+        self.tag_bits: Dict[str, int] = {}
+
+    def put(self, entry: MemoryEntry) -> int:
+        """Insert or overwrite the row for an entry; returns the row index."""
+        row = self.rows.get(entry.id)
+        if row is None:
+            if self.size == self.capacity:
+                self._grow(self.capacity * 2)
+            row = self.size
+            self.size += 1
+            self.ids.append(entry.id)
+            self.rows[entry.id] = row
+
+        self.timestamps[row] = int(entry.timestamp.timestamp() * 1e9)
+        self.ttl_ns[row] = self.NO_TTL if entry.ttl_seconds is None else int(entry.ttl_seconds * 1e9)
+        self.importance[row] = entry.importance_score
+        self.types[row] = self.TYPE_BITS[entry.type]
+        self.users[row] = self.user_code(entry.user_id, create=True)
+        self.tag_masks[row], self.tag_overflow[row] = self._tag_mask(entry.tags, create=True)
+        self.alive[row] = True
+
+        self.has_embedding[row] = False
+        vec = normalize_embedding(entry.embedding)
+        if vec is not None:
+            if self.dim is None:
+                self.dim = vec.shape[0]
+                self.embeddings = np.zeros((self.capacity, self.dim), dtype=np.float16)
+            if vec.shape == (self.dim,):
+                self.embeddings[row] = vec
+                self.has_embedding[row] = True
+            else:
+                logger.warning(f"Embedding for {entry.id} has shape {vec.shape}, expected ({self.dim},); not scored")
+        return row
+
+    def remove(self, mem_id: str) -> None:
+        """Tombstone an entry's row, compacting when tombstones dominate."""
+        row = self.rows.pop(mem_id, None)
+        if row is None:
+            return
+        self.alive[row] = False
+        self.ids[row] = None
+        self.tombstones += 1
+        if self.tombstones >= 64 and self.tombstones * 2 >= self.size:
+            self.compact()
+
+    def compact(self) -> None:
+        """Squeeze out tombstoned rows."""
+        keep = np.flatnonzero(self.alive[:self.size])
+        n = len(keep)
+        for name in ("has_embedding", "timestamps", "ttl_ns", "importance", "types", "users",
+                     "tag_masks", "tag_overflow", "alive"):
+            column = getattr(self, name)
+            column[:n] = column[keep]
+            column[n:self.size] = self.NO_TTL if name == "ttl_ns" else 0
+        if self.embeddings is not None:
+            self.embeddings[:n] = self.embeddings[keep]
+        self.ids = [self.ids[r] for r in keep]
+        self.rows = {mem_id: r for r, mem_id in enumerate(self.ids)}
+        self.size = n
+        self.tombstones = 0
+
+    def user_code(self, user_id: Optional[str], create: bool = False) -> int:
+        """Interned code for a user id (0 for None, -1 if unknown and not created)."""
+        if user_id is None:
+            return 0
+        code = self.user_codes.get(user_id)
+        if code is None:
+            if not create:
+                return -1
+            code = self.user_codes[user_id] = len(self.user_codes) + 1
+        return code
+
+    @classmethod
+    def type_mask(cls, mem_types: List[MemoryType]) -> np.uint8:
+        """Bitmask matching any of mem_types; AND it with the types column."""
+        mask = 0
+        for t in mem_types:
+            mask |= cls.TYPE_BITS[t]
+        return np.uint8(mask)
+
+    def _tag_mask(self, tags: List[str], create: bool = False) -> Tuple[int, bool]:
+        """Bitmask of the interned tags, and whether any tag has no bit."""
+        mask = 0
+        overflow = False
+        for tag in tags:
+            bit = self.tag_bits.get(tag)
+            if bit is None and create and len(self.tag_bits) < self.MAX_TAG_BITS:
+                bit = self.tag_bits[tag] = len(self.tag_bits)
+            if bit is None:
+                overflow = True
+            else:
+                mask |= 1 << bit
+        return mask, overflow
+
+    def match_tags(self, rows: np.ndarray, tags: List[str], entry_tags) -> np.ndarray:
+        """
+        Boolean mask over rows: which have any of the tags.
+
+        One AND per row; `entry_tags(row)` is only called for rows holding tags
+        without a bit, and only when the query has such a tag too.
+        """
+        query_mask, query_overflow = self._tag_mask(tags)
+        hits = (self.tag_masks[rows] & np.uint64(query_mask)) != 0
+        if query_overflow:
+            for i in np.flatnonzero(~hits & self.tag_overflow[rows]):
+                row_tags = entry_tags(rows[i])
+                hits[i] = any(t in row_tags for t in tags)
+        return hits
+
+    def row_indices(self, mem_ids: List[str]) -> np.ndarray:
+        """Row indices for the given ids, skipping ids not in the store."""
+        rows = self.rows
+        return np.fromiter((rows[i] for i in mem_ids if i in rows), dtype=np.intp)
+
+    def _grow(self, capacity: int) -> None:
+        """Reallocate every column with room for `capacity` rows."""
+        def grown(column, fill=0):
+            new = np.full((capacity,) + column.shape[1:], fill, dtype=column.dtype)
+            new[:self.size] = column[:self.size]
+            return new
+
+        self.has_embedding = grown(self.has_embedding)
+        self.timestamps = grown(self.timestamps)
+        self.ttl_ns = grown(self.ttl_ns, self.NO_TTL)
+        self.importance = grown(self.importance)
+        self.types = grown(self.types)
+        self.users = grown(self.users)
+        self.tag_masks = grown(self.tag_masks)
+        self.tag_overflow = grown(self.tag_overflow)
+        self.alive = grown(self.alive)
+        if self.embeddings is not None:
+            self.embeddings = grown(self.embeddings)
+        self.capacity = capacity
+
+
 class MemoryManager:
     """
     Main interface for memory management.
     Supports adding, retrieving, and ranking memories with pluggable backend.
     """
 
-    def __init__(self, backend: "MemoryBackend", embedding_func=None):
+    # Seconds a cached query result may be reused. Expiry and the recency term depend on
+    # the clock, which never bumps _version, so results can't be trusted for long.
+    QUERY_CACHE_TTL = 5.0
+
+    def __init__(
+        self,
+        backend: "MemoryBackend",
+        embedding_func=None,
+        embedding_cache_size: int = 10000,
+        log_path: Optional[str] = None,
+    ):
         """
         Initialize MemoryManager.
         
         Args:
             backend: Storage and indexing backend (e.g., FaissBackend).
-            embedding_func: Optional callable(text) -> List[float] for embeddings.
+            embedding_func: Optional callable(text) -> List[float] for embeddings,
+                           or a SentenceTransformer (anything with .encode), which
+                           lets add_many() embed a whole batch in one call.
                            If None, memories won't be embedded.
+            embedding_cache_size: How many distinct texts to keep embeddings for, so
+                                  repeated texts and queries skip embedding_func.
+            log_path: Optional append-only msgpack log. Existing records are
+                      replayed on startup, and every add/update/delete appends one
+                      record, so saving a change costs O(1) instead of a full persist().
         """
         self.backend = backend
         self.embedding_func = embedding_func
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
         self.memories: Dict[str, MemoryEntry] = {}
+        self.store = MemoryStore()
+        self._recent: "deque[str]" = deque(maxlen=1000)  # ids of the newest memories, oldest first
+        # (query fingerprint, filters) -> (normalized query, version, monotonic time cached, result ids),
+        # most recent last
+        self._query_cache: "OrderedDict[Tuple[bytes, tuple], Tuple[np.ndarray, int, float, List[str]]]" = OrderedDict()
+        self._version = 0  # Bumped on every change to the memories; stale cache entries never match
+        # Guards the caches, memories, the store and the log, so retrievals can run on
+        # worker threads (retrieve_async, RAGTool) while memories are added or changed.
+        # Reentrant, since mutators call each other (cleanup -> delete, _log_write -> compact).
+        self._lock = threading.RLock()
+
+        self.log_path = log_path
+        self._log_file = None
+        self._log_records = 0
+        if log_path is not None:
+            self._replay_log()
+            self._log_file = open(log_path, "ab")
 
     def add(
         self,
@@ -115,14 +370,14 @@ class MemoryManager:
         Returns:
             Memory ID.
         """
-        mem_id = str(uuid.uuid4())
+        mem_id = secrets.token_hex(8)
         now = datetime.now()
 
         # Compute embedding if available
         embedding = None
         if self.embedding_func:
             try:
-                embedding = self.embedding_func(text)
+                embedding = self._embed(text)
             except Exception as e:
                 logger.warning(f"Embedding failed for memory {mem_id}: {e}")
 
@@ -140,11 +395,116 @@ class MemoryManager:
             ttl_seconds=ttl_seconds,
         )
 
-        self.memories[mem_id] = entry
-        self.backend.index(entry)
+        with self._lock:
+            self.memories[mem_id] = entry
+            self.store.put(entry)
+            self._recent.append(mem_id)
+            self._version += 1
+            self.backend.index(entry)
+            self._log_write(entry.to_dict())
         logger.debug(f"Added memory {mem_id} (type={mem_type})")
         return mem_id
 
+    def add_many(
+        self,
+        texts: List[str],
+        mem_type: MemoryType = MemoryType.EPISODIC,
+        importance_score: float = 0.5,
+        source: str = "conversation",
+        tags: List[str] = None,
+        user_id: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        metadata: Dict[str, Any] = None,
+    ) -> List[str]:
+        """
+        Add several memories that share the same attributes, embedding them as one batch.
+        
+        Args:
+            texts: Memory contents.
+            (remaining arguments as in add(), applied to every entry)
+        
+        Returns:
+            Memory IDs, in the order of texts.
+        """
+        if not texts:
+            return []
+
+        embeddings = [None] * len(texts)
+        if self.embedding_func:
+            try:
+                embeddings = self._embed_many(texts)
+            except Exception as e:
+                logger.warning(f"Batch embedding failed for {len(texts)} memories: {e}")
+
+        now = datetime.now()
+        entries = [
+            MemoryEntry(
+                id=secrets.token_hex(8),
+                text=text,
+                type=mem_type,
+                timestamp=now,
+                embedding=embedding,
+                importance_score=importance_score,
+                source=source,
+                tags=list(tags or []),
+                user_id=user_id,
+                metadata=dict(metadata or {}),
+                ttl_seconds=ttl_seconds,
+            )
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        with self._lock:
+            for entry in entries:
+                self.memories[entry.id] = entry
+                self.store.put(entry)
+                self._recent.append(entry.id)
+            self._version += 1
+            self.backend.index_many(entries)
+            for entry in entries:
+                self._log_write(entry.to_dict())
+        logger.debug(f"Added {len(entries)} memories (type={mem_type})")
+        return [entry.id for entry in entries]
+
+    def _embed(self, text: str) -> List[float]:
+        """Embed one text with embedding_func, reusing the cached embedding for a repeated text."""
+        return self._embed_many([text])[0]
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts, in a single batched call when embedding_func supports it.
+
+        Embeddings are cached by a digest of the text (LRU-bounded), so only texts
+        not seen recently reach embedding_func.
+        """
+        cache = self._embedding_cache
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        with self._lock:
+            embeddings = [cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        # embedding_func runs unlocked, so concurrent callers embed in parallel
+        if missing:
+            misses = [texts[i] for i in missing]
+            if hasattr(self.embedding_func, "encode"):
+                vectors = self.embedding_func.encode(
+                    misses, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+                )
+                computed = [vec.tolist() for vec in vectors]
+            else:
+                computed = [self.embedding_func(text) for text in misses]
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+
+        with self._lock:
+            for i in missing:
+                cache[keys[i]] = embeddings[i]
+            for key in keys:
+                if key in cache:  # Another thread may have evicted it meanwhile
+                    cache.move_to_end(key)
+            while len(cache) > self.embedding_cache_size:
+                cache.popitem(last=False)
+        return embeddings
+
     def retrieve(
         self,
         query: str,
@@ -153,6 +513,7 @@ class MemoryManager:
         user_id: Optional[str] = None,
         tags: Optional[List[str]] = None,
         time_range: Optional[Tuple[datetime, datetime]] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[MemoryEntry]:
         """
         Retrieve memories most relevant to a query.
@@ -166,56 +527,184 @@ class MemoryManager:
             user_id: Optional filter by user.
             tags: Optional filter by tags (any match).
             time_range: Optional (start, end) datetime range.
+            query_embedding: Optional precomputed embedding of query, so a caller
+                             that already has one skips embedding_func.
         
         Returns:
             List of MemoryEntry sorted by relevance.
         """
-        # Get query embedding if available
-        query_embedding = None
-        if self.embedding_func:
+        # Get query embedding if available (repeated queries hit the embedding cache)
+        if query_embedding is None and self.embedding_func:
             try:
-                query_embedding = self.embedding_func(query)
+                query_embedding = self._embed(query)
             except Exception as e:
                 logger.warning(f"Query embedding failed: {e}")
 
-        # Search backend
-        candidates = self.backend.search(
-            query_embedding=query_embedding,
-            top_k=top_k * 3,  # Over-fetch to apply filters
-            mem_types=mem_types,
-        )
+        # Normalize the query once; stored embeddings are already unit length
+        query_vec = normalize_embedding(query_embedding)
 
-        # Apply metadata filters and expiry checks
-        filtered = [m for m in candidates if not m.is_expired()]
+        if query_vec is None:
+            return self._retrieve_uncached(query_embedding, query_vec, top_k, mem_types, user_id, tags, time_range)
 
-        if user_id:
-            filtered = [m for m in filtered if m.user_id == user_id]
+        # Near-duplicate queries (retries, repeated tool calls) reuse the last result
+        # while no memory has changed since it was computed, for a few seconds at most
+        filters = (top_k, tuple(mem_types or ()), user_id, tuple(tags or ()), time_range)
+        now = time.monotonic()
+        with self._lock:
+            for key in itertools.islice(reversed(self._query_cache), 8):
+                cached_vec, version, cached_at, mem_ids = self._query_cache[key]
+                if (key[1] == filters and version == self._version
+                        and now - cached_at <= self.QUERY_CACHE_TTL
+                        and float(query_vec @ cached_vec) > 0.98):
+                    self._query_cache.move_to_end(key)
+                    hits = [self.memories[mem_id] for mem_id in mem_ids]
+                    return [m for m in hits if not m.is_expired()]
 
-        if tags:
-            filtered = [m for m in filtered if any(t in m.tags for t in tags)]
+        hits = self._retrieve_uncached(query_embedding, query_vec, top_k, mem_types, user_id, tags, time_range)
+        fingerprint = np.round(query_vec * 127).astype(np.int8).tobytes()
+        with self._lock:
+            self._query_cache[(fingerprint, filters)] = (query_vec, self._version, now, [m.id for m in hits])
+            self._query_cache.move_to_end((fingerprint, filters))
+            if len(self._query_cache) > 64:
+                self._query_cache.popitem(last=False)
+        return hits
+
+    def retrieve_many(self, queries: List[str], top_k: int = 10, **filters) -> List[List[MemoryEntry]]:
+        """
+        retrieve() for several queries, embedding all of them in one embedding_func
+        call (a single forward pass for a SentenceTransformer).
+
+        Returns one result list per query, in the same order.
+        """
+        embeddings = [None] * len(queries)
+        if self.embedding_func and queries:
+            try:
+                embeddings = self._embed_many(queries)
+            except Exception as e:
+                logger.warning(f"Query embedding failed: {e}")
+        return [
+            self.retrieve(query, top_k, query_embedding=embedding, **filters)
+            for query, embedding in zip(queries, embeddings)
+        ]
+
+    async def retrieve_async(self, query: str, top_k: int = 10, **filters) -> List[MemoryEntry]:
+        """
+        retrieve() on a worker thread, so embedding and search don't block the event loop.
+
+        Start it as a task as soon as the query is known and await it when the prompt is
+        built. It may overlap other retrievals and writes to this manager, which all
+        take the manager's lock around the shared state.
+        """
+        return await asyncio.to_thread(self.retrieve, query, top_k, **filters)
+
+    def _retrieve_uncached(
+        self,
+        query_embedding: Optional[List[float]],
+        query_vec: Optional[np.ndarray],
+        top_k: int,
+        mem_types: Optional[List[MemoryType]],
+        user_id: Optional[str],
+        tags: Optional[List[str]],
+        time_range: Optional[Tuple[datetime, datetime]],
+    ) -> List[MemoryEntry]:
+        """Search the backend and rank the candidates (retrieve() without the query cache)."""
+        # Search backend with the filters pushed down; only ids come back, everything
+        # else is read from the store. Expired memories are only dropped afterwards, so
+        # if that leaves fewer than top_k, search again for twice as many candidates.
+        fetch_k = top_k
+        while True:
+            hit_ids = self.backend.search_ids(
+                query_embedding=query_embedding,
+                top_k=fetch_k,
+                mem_types=mem_types,
+                user_id=user_id,
+                tags=tags,
+                time_range=time_range,
+            )
+
+            # Fetch hits persisted by earlier sessions that this manager hasn't loaded; the
+            # backend call runs unlocked, the adoption below happens under the lock
+            unknown = [mem_id for mem_id in hit_ids if mem_id not in self.memories]
+            fetched = self.backend.get(unknown) if unknown else []
+
+            with self._lock:
+                hits = self._rank_hits(hit_ids, fetched, query_vec, top_k, mem_types, user_id, tags, time_range)
+            if len(hits) >= top_k or len(hit_ids) < fetch_k:
+                return hits
+            fetch_k *= 2
+
+    def _rank_hits(
+        self,
+        hit_ids: List[str],
+        fetched: List[MemoryEntry],
+        query_vec: Optional[np.ndarray],
+        top_k: int,
+        mem_types: Optional[List[MemoryType]],
+        user_id: Optional[str],
+        tags: Optional[List[str]],
+        time_range: Optional[Tuple[datetime, datetime]],
+    ) -> List[MemoryEntry]:
+        """Adopt fetched hits, filter and score the candidates. Caller holds self._lock."""
+        adopted = False
+        for m in fetched:
+            if m.id not in self.memories:  # A concurrent retrieval may have adopted it
+                self.memories[m.id] = m
+                self.store.put(m)
+                adopted = True
+        if adopted:
+            self._version += 1
+
+        # Expiry checks, plus the metadata filters again for memories the backend
+        # indexed under older metadata, as masks over the candidates' rows
+        store = self.store
+        rows = store.row_indices(hit_ids)
+        now_ns = time.time_ns()
+        ages_ns = now_ns - store.timestamps[rows]
+        mask = ages_ns <= store.ttl_ns[rows]
+
+        if mem_types:
+            mask &= (store.types[rows] & MemoryStore.type_mask(mem_types)) != 0
+
+        if user_id:
+            mask &= store.users[rows] == store.user_code(user_id)
 
         if time_range:
             start, end = time_range
-            filtered = [m for m in filtered if start <= m.timestamp <= end]
-
-        # Re-rank with hybrid scoring
-        def score(m: MemoryEntry) -> float:
-            """Hybrid score: semantic + recency + importance."""
-            # Semantic score (0-1)
-            sem_score = 0.5 if query_embedding is None else self.backend.similarity(
-                query_embedding, m.embedding
-            )
-            # Recency score (0-1)
-            rec_score = m.recency_weight(decay_hours=24.0)
-            # Importance (already 0-1)
-            imp_score = m.importance_score
+            ts = store.timestamps[rows]
+            mask &= (ts >= int(start.timestamp() * 1e9)) & (ts <= int(end.timestamp() * 1e9))
+
+        rows, ages_ns = rows[mask], ages_ns[mask]
+
+        if tags:
+            keep = store.match_tags(rows, tags, lambda r: self.memories[store.ids[r]].tags)
+            rows, ages_ns = rows[keep], ages_ns[keep]
+
+        n = len(rows)
+        if n == 0:
+            return []
 
-            # Weighted combination (tunable)
-            alpha, beta, gamma = 0.5, 0.3, 0.2  # Weights
-            return alpha * sem_score + beta * rec_score + gamma * imp_score
+        # Re-rank with hybrid scoring, vectorized over all candidates
+        alpha, beta, gamma = 0.5, 0.3, 0.2  # Weights (tunable)
 
-        filtered.sort(key=score, reverse=True)
-        return filtered[:top_k]
+        # Recency (exponential decay over 24 hours) + importance, in one buffer
+        scores = _recency_importance_scores(ages_ns, store.importance[rows], beta, gamma, decay_hours=24.0)
+
+        # Semantic score (0-1): one matrix-vector product over the embedded candidates.
+        # Without a usable query embedding every candidate would get the same 0.5, which
+        # can't change the order, so the semantic term is skipped altogether.
+        if query_vec is not None and query_vec.shape == (store.dim,):
+            embedded = store.has_embedding[rows]
+            if embedded.any():
+                # alpha * (sim + 1) / 2, with unembedded candidates at the neutral 0.5
+                sims = store.embeddings[rows[embedded]].astype(np.float32) @ query_vec
+                sims *= 0.5 * alpha
+                scores += 0.5 * alpha
+                scores[embedded] += sims
+
+        # Partial selection of the top_k, then order just those
+        top = np.argpartition(-scores, top_k)[:top_k] if n > top_k else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.memories[store.ids[r]] for r in rows[top]]
 
     def update(
         self,
@@ -236,29 +725,41 @@ class MemoryManager:
             logger.warning(f"Memory {mem_id} not found for update")
             return False
 
-        entry = self.memories[mem_id]
-        
-        if text is not None:
-            entry.text = text
-            if self.embedding_func:
-                try:
-                    entry.embedding = self.embedding_func(text)
-                except Exception as e:
-                    logger.warning(f"Re-embedding failed for {mem_id}: {e}")
+        # Embed before taking the lock, so retrievals aren't held up by the model
+        embedding = None
+        if text is not None and self.embedding_func:
+            try:
+                embedding = self._embed(text)
+            except Exception as e:
+                logger.warning(f"Re-embedding failed for {mem_id}: {e}")
+
+        with self._lock:
+            entry = self.memories.get(mem_id)
+            if entry is None:  # Deleted meanwhile
+                return False
 
-        if importance_score is not None:
-            entry.importance_score = max(0.0, min(1.0, importance_score))
+            if text is not None:
+                entry.text = text
+                entry.text_preview = text[:100]
+                if embedding is not None:
+                    entry.embedding = embedding
 
-        if summary is not None:
-            entry.summary = summary
+            if importance_score is not None:
+                entry.importance_score = max(0.0, min(1.0, importance_score))
 
-        if tags is not None:
-            entry.tags = tags
+            if summary is not None:
+                entry.summary = summary
 
-        if metadata is not None:
-            entry.metadata.update(metadata)
+            if tags is not None:
+                entry.tags = tags
 
-        self.backend.index(entry)  # Re-index
+            if metadata is not None:
+                entry.metadata.update(metadata)
+
+            self.store.put(entry)
+            self._version += 1
+            self.backend.index(entry)  # Re-index
+            self._log_write(entry.to_dict())
         logger.debug(f"Updated memory {mem_id}")
         return True
 
@@ -269,12 +770,16 @@ class MemoryManager:
         Returns:
             True if successful, False if not found.
         """
-        if mem_id not in self.memories:
-            return False
-        del self.memories[mem_id]
-        self.backend.delete(mem_id)
-        logger.debug(f"Deleted memory {mem_id}")
-        return True
+        with self._lock:
+            if mem_id not in self.memories:
+                return False
+            del self.memories[mem_id]
+            self.store.remove(mem_id)
+            self._version += 1
+            self.backend.delete(mem_id)
+            self._log_write({"_del": mem_id})
+            logger.debug(f"Deleted memory {mem_id}")
+            return True
 
     def summarize(
         self,
@@ -282,6 +787,7 @@ class MemoryManager:
         user_id: Optional[str] = None,
         time_range: Optional[Tuple[datetime, datetime]] = None,
         summarizer_func=None,
+        max_inputs: int = 1000,
     ) -> Optional[MemoryEntry]:
         """
         Create a summary memory from a set of memories.
@@ -292,21 +798,34 @@ class MemoryManager:
             time_range: Optional time range.
             summarizer_func: Callable(texts: List[str]) -> str for summarization.
                             If None, concatenates texts.
+            max_inputs: Summarize at most this many of the matching memories (the
+                        most recent ones), oldest first.
         
         Returns:
             New MemoryEntry of type LONG_TERM, or None if no memories to summarize.
         """
-        candidates = [m for m in self.memories.values() if not m.is_expired()]
+        # Select candidates with masks over the store's columns instead of walking entries
+        with self._lock:
+            store = self.store
+            n = store.size
+            timestamps = store.timestamps[:n]
+            mask = store.alive[:n] & (time.time_ns() - timestamps <= store.ttl_ns[:n])
 
-        if mem_types:
-            candidates = [m for m in candidates if m.type in mem_types]
+            if mem_types:
+                mask &= (store.types[:n] & MemoryStore.type_mask(mem_types)) != 0
 
-        if user_id:
-            candidates = [m for m in candidates if m.user_id == user_id]
+            if user_id:
+                mask &= store.users[:n] == store.user_code(user_id)
 
-        if time_range:
-            start, end = time_range
-            candidates = [m for m in candidates if start <= m.timestamp <= end]
+            if time_range:
+                start, end = time_range
+                mask &= (timestamps >= int(start.timestamp() * 1e9)) & (timestamps <= int(end.timestamp() * 1e9))
+
+            rows = np.flatnonzero(mask)
+            if len(rows) > max_inputs:
+                rows = rows[np.argpartition(timestamps[rows], -max_inputs)[-max_inputs:]]
+            rows = rows[np.argsort(timestamps[rows], kind="stable")]
+            candidates = [self.memories[store.ids[r]] for r in rows]
 
         if not candidates:
             logger.debug("No memories to summarize")
@@ -340,30 +859,167 @@ class MemoryManager:
         return self.memories[summary_mem]
 
     def persist(self, filepath: str) -> None:
-        """Save all memories to a JSON file."""
-        data = {
-            "memories": [m.to_dict() for m in self.memories.values()],
-            "timestamp": datetime.now().isoformat(),
-        }
-        with open(filepath, "w") as f:
-            json.dump(data, f, indent=2)
-        logger.info(f"Persisted {len(self.memories)} memories to {filepath}")
+        """
+        Save all memories to disk.
+        
+        Metadata is written to `filepath` as msgpack; embeddings go to a float32
+        matrix in the `filepath + ".npy"` sidecar, one row per embedded memory.
+        """
+        with self._lock:
+            records = []
+            vectors = []
+            for m in self.memories.values():
+                record = m.to_dict()
+                embedding = record.pop("embedding")
+                if embedding is not None and (not vectors or len(embedding) == len(vectors[0])):
+                    record["embedding_row"] = len(vectors)
+                    vectors.append(embedding)
+                else:
+                    record["embedding"] = embedding  # missing, or a different dimension: keep inline
+                records.append(record)
+
+            data = {
+                "memories": records,
+                "timestamp": datetime.now().isoformat(),
+            }
+            with open(filepath, "wb") as f:
+                f.write(msgpack.packb(data, use_bin_type=True))
+
+            sidecar = filepath + ".npy"
+            if vectors:
+                np.save(sidecar, np.asarray(vectors, dtype=np.float32))
+            elif os.path.exists(sidecar):
+                os.remove(sidecar)
+            self.backend.flush()
+            logger.info(f"Persisted {len(self.memories)} memories to {filepath}")
 
     def load(self, filepath: str) -> None:
-        """Load memories from a JSON file."""
+        """Load memories saved by persist() (JSON files from older versions are still read)."""
+        with self._lock:
+            try:
+                with open(filepath, "rb") as f:
+                    raw = f.read()
+                data = json.loads(raw) if raw[:1] == b"{" else msgpack.unpackb(raw, raw=False)
+
+                # Memory-mapped: rows are only read as their memories are rebuilt
+                sidecar = filepath + ".npy"
+                vectors = np.load(sidecar, mmap_mode="r") if os.path.exists(sidecar) else None
+
+                self.memories.clear()
+                self.store.clear()
+                for mem_dict in data.get("memories", []):
+                    row = mem_dict.pop("embedding_row", None)
+                    if row is not None:
+                        mem_dict["embedding"] = vectors[row].tolist()
+                    entry = MemoryEntry.from_dict(mem_dict)
+                    self.memories[entry.id] = entry
+                    self.store.put(entry)
+                self._rebuild_recent()
+                self._version += 1
+                self.backend.index_many(list(self.memories.values()))
+                if self._log_file is not None:
+                    self.compact()  # The log must describe the loaded state, not the old one
+                logger.info(f"Loaded {len(self.memories)} memories from {filepath}")
+            except FileNotFoundError:
+                logger.debug(f"Memory file {filepath} not found; starting fresh")
+            except Exception as e:
+                logger.error(f"Failed to load memories: {e}")
+
+    def _replay_log(self) -> None:
+        """Rebuild memories from the append-only log; later records win, tombstones delete."""
         try:
-            with open(filepath, "r") as f:
-                data = json.load(f)
-            self.memories.clear()
-            for mem_dict in data.get("memories", []):
-                entry = MemoryEntry.from_dict(mem_dict)
-                self.memories[entry.id] = entry
-                self.backend.index(entry)
-            logger.info(f"Loaded {len(self.memories)} memories from {filepath}")
+            with open(self.log_path, "rb") as f:
+                raw = f.read()
         except FileNotFoundError:
-            logger.debug(f"Memory file {filepath} not found; starting fresh")
+            return
+
+        records = {}
+        for record in self._read_log_records(raw):
+            self._log_records += 1
+            if "_del" in record:
+                records.pop(record["_del"], None)
+            else:
+                records[record["id"]] = record
+
+        for record in records.values():
+            if isinstance(record.get("embedding"), bytes):
+                record["embedding"] = np.frombuffer(record["embedding"], dtype=np.float32).tolist()
+            entry = MemoryEntry.from_dict(record)
+            self.memories[entry.id] = entry
+            self.store.put(entry)
+        self._rebuild_recent()
+        self.backend.index_many(list(self.memories.values()))
+        logger.info(f"Replayed {len(self.memories)} memories from {self.log_path}")
+
+    def _read_log_records(self, raw: bytes):
+        """Yield the records in a log: a msgpack stream, or JSON lines from older versions."""
+        if raw[:1] == b"{":
+            for line_no, line in enumerate(raw.splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt record at {self.log_path}:{line_no}")
+            return
+
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(raw)
+        try:
+            yield from unpacker
         except Exception as e:
-            logger.error(f"Failed to load memories: {e}")
+            logger.warning(f"Stopped replaying {self.log_path} at a corrupt record: {e}")
+            return
+        if unpacker.tell() < len(raw):
+            # Usually a record cut short by a crash mid-write
+            logger.warning(f"Skipping truncated record at the end of {self.log_path}")
+
+    def _rebuild_recent(self) -> None:
+        """Refill the recent-ids deque from the loaded memories' timestamps."""
+        newest = heapq.nlargest(self._recent.maxlen, self.memories.values(), key=lambda m: m.timestamp)
+        self._recent = deque((m.id for m in reversed(newest)), maxlen=self._recent.maxlen)
+
+    @staticmethod
+    def _pack_record(record: Dict[str, Any]) -> bytes:
+        """msgpack a log record, with the embedding as raw float32 bytes."""
+        if record.get("embedding") is not None:
+            record["embedding"] = np.asarray(record["embedding"], dtype=np.float32).tobytes()
+        return msgpack.packb(record, use_bin_type=True)
+
+    def _log_write(self, record: Dict[str, Any]) -> None:
+        """Append one record to the log, compacting once it is mostly dead records."""
+        if self._log_file is None:
+            return
+        self._log_file.write(self._pack_record(record))
+        self._log_file.flush()
+        self._log_records += 1
+        if self._log_records > 1000 and self._log_records > 2 * len(self.memories):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the log with one record per live memory, dropping updates and tombstones."""
+        with self._lock:
+            if self.log_path is None:
+                return
+            if self._log_file is not None:
+                self._log_file.close()
+
+            tmp_path = self.log_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for m in self.memories.values():
+                    f.write(self._pack_record(m.to_dict()))
+            os.replace(tmp_path, self.log_path)
+
+            self._log_file = open(self.log_path, "ab")
+            self._log_records = len(self.memories)
+            logger.debug(f"Compacted memory log to {self._log_records} records")
+
+    def close(self) -> None:
+        """Close the backend (saving anything it still holds) and the append-only log, if one is attached."""
+        self.backend.close()
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
 
     def cleanup(self, max_age_hours: float = 72.0) -> int:
         """
@@ -372,16 +1028,18 @@ class MemoryManager:
         Returns:
             Number of memories removed.
         """
-        cutoff = datetime.now() - timedelta(hours=max_age_hours)
-        to_delete = [
-            mem_id
-            for mem_id, mem in self.memories.items()
-            if mem.is_expired() or (mem.timestamp < cutoff and mem.importance_score < 0.3)
-        ]
-        for mem_id in to_delete:
-            self.delete(mem_id)
-        logger.info(f"Cleaned up {len(to_delete)} memories")
-        return len(to_delete)
+        with self._lock:
+            # One clock read for the whole sweep, compared against the store's columns
+            store = self.store
+            n = store.size
+            ages_ns = time.time_ns() - store.timestamps[:n]
+            expired = ages_ns > store.ttl_ns[:n]
+            stale = (ages_ns > int(max_age_hours * 3.6e12)) & (store.importance[:n] < 0.3)
+            to_delete = [store.ids[r] for r in np.flatnonzero(store.alive[:n] & (expired | stale))]
+            for mem_id in to_delete:
+                self.delete(mem_id)
+            logger.info(f"Cleaned up {len(to_delete)} memories")
+            return len(to_delete)
 
     def get_context_block(self, top_k: int = 5, query: Optional[str] = None) -> str:
         """
@@ -397,25 +1055,42 @@ class MemoryManager:
         if query:
             hits = self.retrieve(query, top_k=top_k)
         else:
-            # Return most recent non-expired memories
-            hits = sorted(
-                [m for m in self.memories.values() if not m.is_expired()],
-                key=lambda m: m.timestamp,
-                reverse=True,
-            )[:top_k]
+            hits = self._most_recent(top_k)
 
         if not hits:
             return ""
 
-        context_lines = ["## Recent Context\n"]
-        for i, mem in enumerate(hits, 1):
-            context_lines.append(
-                f"{i}. [{mem.type.value}] {mem.text[:100]}"
-                f" (importance={mem.importance_score:.2f}, "
-                f"tags={','.join(mem.tags) if mem.tags else 'none'})"
-            )
+        return "## Recent Context\n\n" + "\n".join(
+            f"{i}. [{m.type.value}] {m.text_preview}"
+            f" (importance={m.importance_score:.2f}, tags={','.join(m.tags) or 'none'})"
+            for i, m in enumerate(hits, 1)
+        )
 
-        return "\n".join(context_lines)
+    async def get_context_block_async(self, top_k: int = 5, query: Optional[str] = None) -> str:
+        """get_context_block() on a worker thread (see retrieve_async())."""
+        return await asyncio.to_thread(self.get_context_block, top_k, query)
+
+    def _most_recent(self, top_k: int) -> List[MemoryEntry]:
+        """Most recent non-expired memories, newest first."""
+        with self._lock:
+            now = datetime.now()
+            hits = []
+            # Walk the recent-ids deque from the newest end; deleted ids are skipped
+            for mem_id in reversed(self._recent):
+                m = self.memories.get(mem_id)
+                if m is not None and not m.is_expired(now):
+                    hits.append(m)
+                    if len(hits) == top_k:
+                        return hits
+
+            if len(hits) == len(self.memories):
+                return hits
+            # Not enough live memories in the deque: fall back to a full scan
+            return heapq.nlargest(
+                top_k,
+                (m for m in self.memories.values() if not m.is_expired(now)),
+                key=lambda m: m.timestamp,
+            )
 
 
 class MemoryBackend:
@@ -425,21 +1100,58 @@ class MemoryBackend:
         """Index a memory entry."""
         raise NotImplementedError
 
+    def index_many(self, entries: List[MemoryEntry]) -> None:
+        """Index several memory entries (backends may override with a bulk write)."""
+        for entry in entries:
+            self.index(entry)
+
     def search(
         self,
         query_embedding: Optional[List[float]],
         top_k: int,
         mem_types: Optional[List[MemoryType]] = None,
+        user_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
     ) -> List[MemoryEntry]:
         """
         Search for memories. Returns top-k candidates (not yet ranked).
+
+        Only memories passing every given filter (type, user, any tag, time range)
+        are candidates, so the filters narrow the search instead of its results.
         """
         raise NotImplementedError
 
+    def search_ids(
+        self,
+        query_embedding: Optional[List[float]],
+        top_k: int,
+        mem_types: Optional[List[MemoryType]] = None,
+        user_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+    ) -> List[str]:
+        """
+        Like search(), but return only ids (backends may skip building entries).
+        """
+        return [m.id for m in self.search(query_embedding, top_k, mem_types, user_id, tags, time_range)]
+
+    def get(self, mem_ids: List[str]) -> List[MemoryEntry]:
+        """Fetch memory entries by id (missing ids are skipped)."""
+        raise NotImplementedError
+
     def delete(self, mem_id: str) -> None:
         """Delete a memory from index."""
         raise NotImplementedError
 
+    def flush(self) -> None:
+        """Write out buffered index operations (no-op for unbuffered backends)."""
+        pass
+
+    def close(self) -> None:
+        """Write out everything still held in memory before shutdown (defaults to flush())."""
+        self.flush()
+
     def similarity(self, emb1: Optional[List[float]], emb2: Optional[List[float]]) -> float:
         """Compute similarity between two embeddings (0-1)."""
         raise NotImplementedError
@@ -1,35 +1,98 @@
 """
-Memory storage backends: Chroma DB for vector/metadata storage.
+Memory storage backends: Chroma DB for vector/metadata storage, FAISS for in-process search.
 """
 
+import atexit
+import hashlib
+import heapq
 import logging
-from typing import List, Optional, Dict, Any
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
+import msgpack
 import numpy as np
 
 try:
     import chromadb
     from chromadb.config import Settings
+    from chromadb.utils import embedding_functions
 except ImportError:
     raise ImportError(
         "chromadb is required. Install with: pip install chromadb"
     )
 
+try:
+    import faiss
+except ImportError:
+    faiss = None  # Only needed for FaissBackend
+
 from .memory import MemoryEntry, MemoryType, MemoryBackend
 
 logger = logging.getLogger(__name__)
 
+# Chroma metadata keys that mirror MemoryEntry fields rather than entry.metadata
+_RESERVED_KEYS = {"type", "source", "importance", "timestamp", "ts", "user_id", "tags"}
+_TAG_PREFIX = "tag:"  # One boolean key per tag, so tag filters fit in a where clause
+
+
+def _close_at_exit(backend_ref) -> None:
+    """atexit hook: close a backend that is still alive, so its last writes are saved."""
+    backend = backend_ref()
+    if backend is not None:
+        try:
+            backend.close()
+        except Exception as e:
+            logger.error(f"Failed to close {type(backend).__name__} at exit: {e}")
+
+
+def _upgrade_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Backfill the "ts" and tag keys that older stores lack, so where clauses match them."""
+    metadata = dict(metadata)
+    if "ts" not in metadata and metadata.get("timestamp"):
+        try:
+            metadata["ts"] = datetime.fromisoformat(metadata["timestamp"]).timestamp()
+        except ValueError:
+            pass
+    for tag in (metadata.get("tags") or "").split(","):
+        if tag:
+            metadata.setdefault(_TAG_PREFIX + tag, True)
+    return metadata
+
 
 class ChromaBackend(MemoryBackend):
     """
     Chroma DB backend for memory storage and vector search.
     
     Features:
-    - Persistent SQLite storage with automatic embeddings.
+    - In-memory collection, snapshotted to persist_dir within snapshot_interval seconds
+      of a write instead of re-persisting the index on every write.
     - Supports filtering by type, user, and metadata.
     - Hybrid search combining semantic similarity with metadata filters.
+    - Writes are buffered and upserted in batches; reads flush the buffer first.
+    - Entries without an embedding are embedded here, with an LRU cache by text,
+      so a repeated text is never encoded twice.
+    - Unfiltered vector queries are scored exactly against a local normalized
+      float32 matrix (one matrix-vector product + partial sort); filtered ones are
+      pushed down to Chroma as a where clause. The matrix only tracks writes made
+      through this instance, so only one backend may be open per persist_dir.
     """
 
-    def __init__(self, persist_dir: str = "./memory_storage", embedding_model: str = "all-MiniLM-L6-v2"):
+    # Open backends by absolute persist_dir; close() releases the directory
+    _open: "weakref.WeakValueDictionary[str, ChromaBackend]" = weakref.WeakValueDictionary()
+
+    def __init__(
+        self,
+        persist_dir: str = "./memory_storage",
+        embedding_model: str = "all-MiniLM-L6-v2",
+        batch_size: int = 128,
+        embedding_cache_size: int = 4096,
+        snapshot_interval: float = 5.0,
+    ):
         """
         Initialize Chroma backend.
         
@@ -37,24 +100,65 @@ class ChromaBackend(MemoryBackend):
             persist_dir: Directory for persistent storage (default: ./memory_storage).
             embedding_model: Embedding model name (Chroma's default is all-MiniLM-L6-v2, 
                            a small, fast model suitable for local use).
+            batch_size: Buffered entries that trigger an upsert into the collection.
+            embedding_cache_size: Max cached text embeddings (LRU eviction).
+            snapshot_interval: Min seconds between snapshots. A write is snapshotted at
+                               most this long after it is made (a crash loses at most
+                               that much), and close() snapshots whatever is left.
+
+        Raises:
+            ValueError: if another open backend already uses persist_dir.
         """
+        key = os.path.abspath(persist_dir)
+        if ChromaBackend._open.get(key) is not None:
+            raise ValueError(
+                f"A ChromaBackend is already open on {persist_dir}; share it or close() it first"
+            )
         self.persist_dir = persist_dir
+        self._key = key
         self.embedding_model = embedding_model
+        # Guards the write buffer, the local matrix and the embedding cache, since
+        # retrievals run on worker threads and every search flushes first
+        self._lock = threading.RLock()
+        self.batch_size = batch_size
+        self._pending: Dict[str, MemoryEntry] = {}  # id -> latest entry waiting to be upserted
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_fn = None  # Chroma's default model, loaded on first use
+        self._embedding_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        # L2-normalized rows of every stored embedding, contiguous for the GEMV in search
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim) float32, allocated on first write
+        self._row_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
 
-        # Initialize Chroma client with persistence
-        settings = Settings(
-            is_persistent=True,
-            persist_directory=persist_dir,
-            anonymized_telemetry=False,
-        )
-        self.client = chromadb.Client(settings)
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_path = os.path.join(persist_dir, "memories.snapshot")
+        self._dirty = False  # Collection changed since the last snapshot
+        self._last_snapshot = time.monotonic()
+        self._snapshot_timer: Optional[threading.Timer] = None  # Pending deferred snapshot
+        os.makedirs(persist_dir, exist_ok=True)
+
+        # In-memory client: Chroma's persistent mode re-persists the index on every write
+        self.client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
 
-        # Create or get collection for memories
-        # Note: Chroma uses built-in embeddings via HuggingFace
+        # Ephemeral clients share one in-process system, so the collection is named
+        # per directory to keep backends on different persist_dirs apart
+        digest = hashlib.blake2b(os.path.abspath(persist_dir).encode("utf-8"), digest_size=8).hexdigest()
+        name = f"memories_{digest}"
+        existing = name in {getattr(c, "name", c) for c in self.client.list_collections()}
         self.collection = self.client.get_or_create_collection(
-            name="memories",
+            name=name,
             metadata={"hnsw:space": "cosine"},  # Use cosine similarity
         )
+        if not existing:
+            if os.path.exists(self.snapshot_path):
+                self._load_snapshot()
+            else:
+                self._import_legacy_store()
+        self._load_matrix()
+
+        # Changes since the last snapshot would otherwise be lost if close() is never called
+        atexit.register(_close_at_exit, weakref.ref(self))
+        ChromaBackend._open[key] = self
 
         logger.info(f"Initialized Chroma backend with persist_dir={persist_dir}")
 
@@ -62,49 +166,298 @@ class ChromaBackend(MemoryBackend):
         """
         Index a memory entry in Chroma.
         
-        Chroma handles embeddings automatically if embedding is None.
+        If embedding is None, one is computed (or taken from the cache) on flush.
         Otherwise, use the provided embedding.
         """
-        # Prepare metadata (exclude embedding and text)
-        metadata = {
+        self.index_many([entry])
+
+    def index_many(self, entries: List[MemoryEntry]) -> None:
+        """Buffer entries for indexing, upserting once batch_size of them are waiting."""
+        with self._lock:
+            for entry in entries:
+                self._pending[entry.id] = entry
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            else:
+                self._schedule_snapshot()
+
+    def flush(self) -> None:
+        """
+        Upsert all buffered entries.
+        
+        Upsert inserts new ids and overwrites existing ones in a single call,
+        so re-indexing an updated memory needs no delete first.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            entries = list(self._pending.values())
+            self._pending.clear()
+
+            # Passing every embedding explicitly keeps Chroma from computing any itself
+            missing = [e.text for e in entries if not e.embedding]
+            computed = iter(self._embed_texts(missing))
+            ids = [e.id for e in entries]
+            embeddings = [e.embedding or next(computed) for e in entries]
+            self.collection.upsert(
+                ids=ids,
+                documents=[e.text for e in entries],
+                metadatas=[self._metadata(e) for e in entries],
+                embeddings=embeddings,
+            )
+            self._set_rows(ids, embeddings)
+            self._dirty = True
+            self.maybe_snapshot()
+
+            logger.debug(f"Indexed {len(entries)} memories in Chroma")
+
+    def _load_matrix(self) -> None:
+        """Build the local matrix from whatever the collection already holds."""
+        try:
+            data = self.collection.get(include=["embeddings"])
+        except Exception as e:
+            logger.error(f"Failed to read Chroma embeddings: {e}")
+            return
+        embeddings = data.get("embeddings")
+        if data["ids"] and embeddings is not None and len(embeddings):
+            self._set_rows(list(data["ids"]), embeddings)
+
+    def _set_rows(self, ids: List[str], embeddings) -> None:
+        """Insert or overwrite matrix rows, doubling the matrix when it is full."""
+        with self._lock:
+            vecs = np.array(embeddings, dtype=np.float32)
+            if vecs.ndim != 2 or not len(vecs):
+                return
+            if self._matrix is None:
+                self._matrix = np.empty((max(64, len(vecs)), vecs.shape[1]), dtype=np.float32)
+            elif vecs.shape[1] != self._matrix.shape[1]:
+                return  # Chroma itself rejects a second dimension, so there is nothing to mirror
+            norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vecs /= norms
+
+            for mem_id, vec in zip(ids, vecs):
+                row = self._rows.get(mem_id)
+                if row is None:
+                    row = len(self._row_ids)
+                    if row == len(self._matrix):
+                        grown = np.empty((2 * len(self._matrix), self._matrix.shape[1]), dtype=np.float32)
+                        grown[:row] = self._matrix
+                        self._matrix = grown
+                    self._row_ids.append(mem_id)
+                    self._rows[mem_id] = row
+                self._matrix[row] = vec
+
+    def _remove_row(self, mem_id: str) -> None:
+        """Drop a matrix row by moving the last row into its slot."""
+        with self._lock:
+            row = self._rows.pop(mem_id, None)
+            if row is None:
+                return
+            last = len(self._row_ids) - 1
+            if row != last:
+                moved = self._row_ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._row_ids[row] = moved
+                self._rows[moved] = row
+            self._row_ids.pop()
+
+    def _local_top_ids(self, query_embedding: List[float], top_k: int) -> Optional[List[str]]:
+        """
+        Exact cosine top_k over the local matrix, best first.
+        
+        Returns None if the query can't be scored locally (no matrix yet, or a
+        different dimension), so the caller can fall back to Chroma's query.
+        """
+        with self._lock:
+            if self._matrix is None or len(query_embedding) != self._matrix.shape[1]:
+                return None
+            n = len(self._row_ids)
+            if n == 0 or top_k <= 0:
+                return []
+            q = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            if norm == 0:
+                return None
+            scores = self._matrix[:n] @ (q / norm)
+            if top_k < n:
+                top = np.argpartition(-scores, top_k - 1)[:top_k]
+            else:
+                top = np.arange(n)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [self._row_ids[i] for i in top]
+
+    def maybe_snapshot(self) -> None:
+        """Snapshot the collection if it changed: now if snapshot_interval has passed, else once it has."""
+        if not self._dirty:
+            return
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+        else:
+            self._schedule_snapshot()
+
+    def _schedule_snapshot(self) -> None:
+        """Start a timer that flushes and snapshots once snapshot_interval has passed."""
+        with self._lock:
+            if self._snapshot_timer is not None:
+                return
+            delay = max(0.0, self._last_snapshot + self.snapshot_interval - time.monotonic())
+            self._snapshot_timer = threading.Timer(delay, self._timed_snapshot)
+            self._snapshot_timer.daemon = True
+            self._snapshot_timer.start()
+
+    def _timed_snapshot(self) -> None:
+        """Timer callback: save buffered entries and unsaved changes."""
+        with self._lock:
+            self._snapshot_timer = None
+            self.flush()
+            if self._dirty:
+                self.snapshot()
+
+    def snapshot(self) -> None:
+        """
+        Write the whole collection to snapshot_path.
+        
+        One msgpack document of ids, texts, metadata and float32 embedding bytes,
+        written to a temp file and swapped in so a crash never leaves half a snapshot.
+        """
+        try:
+            data = self.collection.get(include=["documents", "metadatas", "embeddings"])
+            embeddings = data.get("embeddings")
+            snapshot = {
+                "ids": list(data["ids"]),
+                "documents": list(data["documents"]),
+                "metadatas": list(data["metadatas"]),
+                "embeddings": [np.asarray(e, dtype=np.float32).tobytes() for e in embeddings]
+                if embeddings is not None else [],
+            }
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(msgpack.packb(snapshot, use_bin_type=True))
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.error(f"Failed to snapshot Chroma collection: {e}")
+            return
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        logger.debug(f"Snapshotted {len(snapshot['ids'])} memories to {self.snapshot_path}")
+
+    def _load_snapshot(self) -> None:
+        """Fill the fresh collection from snapshot_path, if a snapshot exists."""
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = msgpack.unpackb(f.read(), raw=False)
+            ids = snapshot["ids"]
+            for start in range(0, len(ids), self.batch_size):
+                end = start + self.batch_size
+                self.collection.upsert(
+                    ids=ids[start:end],
+                    documents=snapshot["documents"][start:end],
+                    metadatas=[_upgrade_metadata(m) for m in snapshot["metadatas"][start:end]],
+                    embeddings=[np.frombuffer(e, dtype=np.float32).tolist()
+                                for e in snapshot["embeddings"][start:end]],
+                )
+            logger.info(f"Loaded {len(ids)} memories from {self.snapshot_path}")
+        except Exception as e:
+            logger.error(f"Failed to load Chroma snapshot: {e}")
+
+    def _import_legacy_store(self) -> None:
+        """Copy memories from the persistent Chroma store older versions kept in persist_dir.
+
+        Runs when there is no snapshot yet; the imported memories are snapshotted
+        straight away, so this happens once.
+        """
+        if not os.path.exists(os.path.join(self.persist_dir, "chroma.sqlite3")):
+            return
+        try:
+            legacy = chromadb.PersistentClient(
+                path=self.persist_dir, settings=Settings(anonymized_telemetry=False)
+            )
+            if "memories" not in {getattr(c, "name", c) for c in legacy.list_collections()}:
+                return
+            old = legacy.get_collection("memories")
+            total = old.count()
+            for offset in range(0, total, self.batch_size):
+                data = old.get(
+                    include=["documents", "metadatas", "embeddings"],
+                    limit=self.batch_size,
+                    offset=offset,
+                )
+                self.collection.upsert(
+                    ids=data["ids"],
+                    documents=data["documents"],
+                    metadatas=[_upgrade_metadata(m) for m in data["metadatas"]],
+                    embeddings=[np.asarray(e, dtype=np.float32).tolist() for e in data["embeddings"]],
+                )
+        except Exception as e:
+            logger.error(f"Failed to import legacy Chroma store from {self.persist_dir}: {e}")
+            return
+        logger.info(f"Imported {total} memories from the legacy Chroma store in {self.persist_dir}")
+        self._dirty = True
+        self.snapshot()
+
+    def close(self) -> None:
+        """Upsert buffered entries, snapshot any unsaved changes and release persist_dir."""
+        with self._lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+            self.flush()
+            if self._dirty:
+                self.snapshot()
+            if ChromaBackend._open.get(self._key) is self:
+                del ChromaBackend._open[self._key]
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with Chroma's default model, encoding only those not cached."""
+        with self._lock:
+            if not texts:
+                return []
+            cache = self._embedding_cache
+            keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+            embeddings = [cache.get(key) for key in keys]
+            # dict.fromkeys dedupes repeated texts within the batch, keeping order
+            missing = list(dict.fromkeys(key for key, emb in zip(keys, embeddings) if emb is None))
+
+            if missing:
+                if self._embedding_fn is None:
+                    self._embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+                texts_by_key = dict(zip(keys, texts))
+                encoded = self._embedding_fn([texts_by_key[key] for key in missing])
+                for key, emb in zip(missing, encoded):
+                    cache[key] = list(map(float, emb))
+                embeddings = [cache[key] for key in keys]
+
+            for key in keys:
+                cache.move_to_end(key)
+            while len(cache) > self.embedding_cache_size:
+                cache.popitem(last=False)
+            return embeddings
+
+    def _metadata(self, entry: MemoryEntry) -> Dict[str, Any]:
+        """Chroma metadata for an entry (everything except embedding and text)."""
+        return {
             "type": entry.type.value,
             "source": entry.source,
             "importance": float(entry.importance_score),
             "timestamp": entry.timestamp.isoformat(),
+            "ts": entry.timestamp.timestamp(),  # Numeric copy for $gte/$lte range filters
             "user_id": entry.user_id or "",
             "tags": ",".join(entry.tags),
+            **{_TAG_PREFIX + t: True for t in entry.tags},
             **entry.metadata,
         }
 
-        # If entry already exists, delete it first (Chroma upsert doesn't exist)
-        try:
-            self.collection.delete(ids=[entry.id])
-        except Exception:
-            pass  # Memory may not exist yet
-
-        # Add to collection
-        # If entry.embedding is None, Chroma will compute it automatically
-        if entry.embedding:
-            self.collection.add(
-                ids=[entry.id],
-                documents=[entry.text],
-                metadatas=[metadata],
-                embeddings=[entry.embedding],
-            )
-        else:
-            self.collection.add(
-                ids=[entry.id],
-                documents=[entry.text],
-                metadatas=[metadata],
-            )
-
-        logger.debug(f"Indexed memory {entry.id} in Chroma")
-
     def search(
         self,
         query_embedding: Optional[List[float]],
         top_k: int,
         mem_types: Optional[List[MemoryType]] = None,
+        user_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
     ) -> List[MemoryEntry]:
         """
         Search for memories using semantic similarity.
@@ -113,71 +466,167 @@ class ChromaBackend(MemoryBackend):
             query_embedding: Embedding vector (ignored if None; Chroma will embed the query text).
             top_k: Number of results to return.
             mem_types: Optional filter by memory types.
+            user_id: Optional filter by user.
+            tags: Optional filter by tags (any match).
+            time_range: Optional (start, end) datetime range.
         
         Returns:
             List of MemoryEntry objects.
         """
-        # Build where filter if needed
-        where_filter = None
+        self.flush()
+        where_filter = self._where(mem_types, user_id, tags, time_range)
+        if where_filter is None and query_embedding:
+            top_ids = self._local_top_ids(query_embedding, top_k)
+            if top_ids is not None:
+                return self._get_ordered(top_ids)
+        results = self._query(query_embedding, top_k, where_filter, include=["documents", "metadatas"])
+        if not results or not results.get("ids"):
+            return []
+
+        return self._parse_entries(
+            results["ids"][0], results["documents"][0], results["metadatas"][0],
+        )
+
+    def search_ids(
+        self,
+        query_embedding: Optional[List[float]],
+        top_k: int,
+        mem_types: Optional[List[MemoryType]] = None,
+        user_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+    ) -> List[str]:
+        """Search like search(), but fetch only the matching ids (no documents or metadata)."""
+        self.flush()
+        where_filter = self._where(mem_types, user_id, tags, time_range)
+        if where_filter is None and query_embedding:
+            top_ids = self._local_top_ids(query_embedding, top_k)
+            if top_ids is not None:
+                return top_ids
+        results = self._query(query_embedding, top_k, where_filter, include=[])
+        if not results or not results.get("ids"):
+            return []
+        return list(results["ids"][0])
+
+    def get(self, mem_ids: List[str]) -> List[MemoryEntry]:
+        """Fetch memories by id, with their embeddings."""
+        self.flush()
+        try:
+            results = self.collection.get(ids=mem_ids, include=["documents", "metadatas", "embeddings"])
+        except Exception as e:
+            logger.error(f"Chroma get failed: {e}")
+            return []
+        return self._parse_entries(
+            results["ids"], results["documents"], results["metadatas"], results.get("embeddings"),
+        )
+
+    def _get_ordered(self, mem_ids: List[str]) -> List[MemoryEntry]:
+        """Fetch entries (without embeddings) in the order of mem_ids."""
+        if not mem_ids:
+            return []
+        try:
+            results = self.collection.get(ids=mem_ids, include=["documents", "metadatas"])
+        except Exception as e:
+            logger.error(f"Chroma get failed: {e}")
+            return []
+        by_id = {m.id: m for m in self._parse_entries(results["ids"], results["documents"], results["metadatas"])}
+        return [by_id[mem_id] for mem_id in mem_ids if mem_id in by_id]
+
+    @staticmethod
+    def _where(
+        mem_types: Optional[List[MemoryType]],
+        user_id: Optional[str],
+        tags: Optional[List[str]],
+        time_range: Optional[Tuple[datetime, datetime]],
+    ) -> Optional[Dict[str, Any]]:
+        """Build a Chroma where clause from the search filters (None if there are none)."""
+        conditions = []
         if mem_types:
             type_values = [t.value for t in mem_types]
             if len(type_values) == 1:
-                where_filter = {"type": {"$eq": type_values[0]}}
+                conditions.append({"type": {"$eq": type_values[0]}})
             else:
-                where_filter = {"type": {"$in": type_values}}
+                conditions.append({"type": {"$in": type_values}})
+
+        if user_id:
+            conditions.append({"user_id": {"$eq": user_id}})
+
+        if tags:
+            tag_conditions = [{_TAG_PREFIX + t: {"$eq": True}} for t in tags]
+            conditions.append(tag_conditions[0] if len(tag_conditions) == 1 else {"$or": tag_conditions})
 
+        if time_range:
+            start, end = time_range
+            conditions.append({"ts": {"$gte": start.timestamp()}})
+            conditions.append({"ts": {"$lte": end.timestamp()}})
+
+        if not conditions:
+            return None
+        # Chroma's $and needs at least two operands
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def _query(
+        self,
+        query_embedding: Optional[List[float]],
+        top_k: int,
+        where_filter: Optional[Dict[str, Any]],
+        include: List[str],
+    ) -> Optional[Dict[str, Any]]:
+        """Run a Chroma query with an optional where filter; None on failure."""
         # Query Chroma
         # If query_embedding provided, use it; otherwise Chroma auto-embeds query text
         try:
-            results = self.collection.query(
+            return self.collection.query(
                 query_embeddings=[query_embedding] if query_embedding else None,
                 n_results=top_k,
                 where=where_filter,
+                include=include,
             )
         except Exception as e:
             logger.error(f"Chroma query failed: {e}")
-            return []
+            return None
 
-        # Convert results to MemoryEntry objects
+    def _parse_entries(self, ids, documents, metadatas, embeddings=None) -> List[MemoryEntry]:
+        """Convert Chroma result columns to MemoryEntry objects."""
         memories = []
-        if results and results.get("ids"):
-            for i, mem_id in enumerate(results["ids"][0]):
-                try:
-                    metadata = results["metadatas"][0][i]
-                    text = results["documents"][0][i]
-                    embedding = (
-                        results["embeddings"][0][i]
-                        if results.get("embeddings") and results["embeddings"][0]
-                        else None
-                    )
+        for i, mem_id in enumerate(ids):
+            try:
+                metadata = metadatas[i]
+                embedding = embeddings[i] if embeddings is not None and len(embeddings) else None
+                if embedding is not None:
+                    embedding = list(map(float, embedding))
 
-                    from datetime import datetime
-                    entry = MemoryEntry(
-                        id=mem_id,
-                        text=text,
-                        type=MemoryType(metadata.get("type", "episodic")),
-                        timestamp=datetime.fromisoformat(metadata["timestamp"]),
-                        embedding=embedding,
-                        importance_score=float(metadata.get("importance", 0.5)),
-                        source=metadata.get("source", "unknown"),
-                        tags=metadata.get("tags", "").split(",") if metadata.get("tags") else [],
-                        user_id=metadata.get("user_id") or None,
-                        metadata={k: v for k, v in metadata.items() 
-                                 if k not in ["type", "source", "importance", "timestamp", "user_id", "tags"]},
-                    )
-                    memories.append(entry)
-                except Exception as e:
-                    logger.error(f"Failed to parse memory {mem_id}: {e}")
+                entry = MemoryEntry(
+                    id=mem_id,
+                    text=documents[i],
+                    type=MemoryType(metadata.get("type", "episodic")),
+                    timestamp=datetime.fromisoformat(metadata["timestamp"]),
+                    embedding=embedding,
+                    importance_score=float(metadata.get("importance", 0.5)),
+                    source=metadata.get("source", "unknown"),
+                    tags=metadata.get("tags", "").split(",") if metadata.get("tags") else [],
+                    user_id=metadata.get("user_id") or None,
+                    metadata={k: v for k, v in metadata.items()
+                             if k not in _RESERVED_KEYS and not k.startswith(_TAG_PREFIX)},
+                )
+                memories.append(entry)
+            except Exception as e:
+                logger.error(f"Failed to parse memory {mem_id}: {e}")
 
         return memories
 
     def delete(self, mem_id: str) -> None:
         """Delete a memory from Chroma."""
-        try:
-            self.collection.delete(ids=[mem_id])
-            logger.debug(f"Deleted memory {mem_id} from Chroma")
-        except Exception as e:
-            logger.error(f"Failed to delete memory {mem_id}: {e}")
+        with self._lock:
+            self._pending.pop(mem_id, None)
+            try:
+                self.collection.delete(ids=[mem_id])
+                self._remove_row(mem_id)
+                self._dirty = True
+                self.maybe_snapshot()
+                logger.debug(f"Deleted memory {mem_id} from Chroma")
+            except Exception as e:
+                logger.error(f"Failed to delete memory {mem_id}: {e}")
 
     def similarity(
         self, emb1: Optional[List[float]], emb2: Optional[List[float]]
@@ -192,40 +641,346 @@ class ChromaBackend(MemoryBackend):
         Returns:
             Similarity score (0-1); 0 = dissimilar, 1 = identical.
         """
-        if emb1 is None or emb2 is None:
-            return 0.5  # Default if embeddings missing
-
-        emb1 = np.array(emb1, dtype=np.float32)
-        emb2 = np.array(emb2, dtype=np.float32)
-
-        # Cosine similarity: (A · B) / (||A|| * ||B||)
-        dot_product = np.dot(emb1, emb2)
-        norm1 = np.linalg.norm(emb1)
-        norm2 = np.linalg.norm(emb2)
-
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-
-        similarity = dot_product / (norm1 * norm2)
-        # Map from [-1, 1] to [0, 1]
-        return (similarity + 1.0) / 2.0
+        return _cosine_similarity(emb1, emb2)
 
     def clear(self) -> None:
         """Delete all memories from the collection."""
-        try:
-            # Get all IDs and delete them
-            all_data = self.collection.get()
-            if all_data["ids"]:
-                self.collection.delete(ids=all_data["ids"])
-            logger.info("Cleared all memories from Chroma")
-        except Exception as e:
-            logger.error(f"Failed to clear Chroma collection: {e}")
+        with self._lock:
+            self._pending.clear()
+            try:
+                # Get all IDs and delete them
+                all_data = self.collection.get()
+                if all_data["ids"]:
+                    self.collection.delete(ids=all_data["ids"])
+                    self._dirty = True
+                self._matrix = None
+                self._row_ids = []
+                self._rows = {}
+                logger.info("Cleared all memories from Chroma")
+            except Exception as e:
+                logger.error(f"Failed to clear Chroma collection: {e}")
 
     def get_stats(self) -> Dict[str, Any]:
         """Get collection statistics."""
+        self.flush()
         try:
             count = self.collection.count()
             return {"memory_count": count, "persist_dir": self.persist_dir}
         except Exception as e:
             logger.error(f"Failed to get stats: {e}")
             return {}
+
+
+class FaissBackend(MemoryBackend):
+    """
+    In-process FAISS HNSW backend for the hot search path.
+
+    Features:
+    - Cosine search via inner product over L2-normalized vectors, no IPC per query.
+    - Entries are held in RAM next to the index; only embedded entries are searchable
+      by vector, so pair it with a MemoryManager that has an embedding_func.
+    - Optional cold backend (e.g. ChromaBackend) that receives every write on a
+      background thread, purely for durability.
+    - Optional 8-bit scalar quantization (IndexHNSWSQ), cutting vector memory 4x;
+      candidates are re-ranked with the full-precision embeddings.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        persist_backend: Optional[MemoryBackend] = None,
+        hnsw_m: int = 32,
+        ef_search: int = 64,
+        quantize: bool = False,
+        train_size: int = 1000,
+    ):
+        """
+        Initialize FAISS backend.
+
+        Args:
+            dim: Embedding dimension (384 for all-MiniLM-L6-v2).
+            persist_backend: Optional backend mirrored asynchronously for persistence.
+            hnsw_m: HNSW graph degree.
+            ef_search: HNSW search breadth; higher = better recall, slower queries.
+            quantize: Store vectors as 8-bit scalar codes instead of float32.
+            train_size: Vectors to collect before training the quantizer; until then
+                        searches run exactly over the collected vectors.
+        """
+        if faiss is None:
+            raise ImportError(
+                "faiss is required for FaissBackend. Install with: pip install faiss-cpu"
+            )
+
+        self.dim = dim
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.quantize = quantize
+        self.train_size = train_size
+        self.persist_backend = persist_backend
+        self._mirror = ThreadPoolExecutor(max_workers=1) if persist_backend else None
+        self._lock = threading.RLock()  # Searches run on retrieval worker threads
+
+        self.entries: Dict[str, MemoryEntry] = {}
+        self.labels: Dict[str, int] = {}  # memory id -> live int64 FAISS label
+        self.ids_by_label: Dict[int, str] = {}
+        # Normalized float32 rows of the live vectors, for exact scoring without renormalizing
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._next_label = 0
+        self._stale = 0  # vectors left in the graph by updates/deletes (HNSW can't remove)
+        # Vectors waiting for the quantizer to be trained (quantized index only)
+        self._pending_labels: List[int] = []
+        self._pending_vectors: List[np.ndarray] = []
+        self._new_index()
+
+        logger.info(f"Initialized FAISS backend with dim={dim}")
+
+    def _new_index(self) -> None:
+        """Create an empty HNSW index wrapped so vectors carry our int64 labels."""
+        if self.quantize:
+            hnsw = faiss.IndexHNSWSQ(
+                self.dim, faiss.ScalarQuantizer.QT_8bit, self.hnsw_m, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            hnsw = faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efSearch = self.ef_search
+        self.index = faiss.IndexIDMap2(hnsw)
+        self._pending_labels = []
+        self._pending_vectors = []
+
+    def _normalized(self, embedding) -> np.ndarray:
+        """Embedding as a (1, dim) L2-normalized float32 row."""
+        vec = np.array(embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vec)
+        return vec
+
+    def _add_vector(self, entry: MemoryEntry) -> None:
+        """Add an entry's embedding to the graph under a fresh label."""
+        label = self._next_label
+        self._next_label += 1
+        vec = self._normalized(entry.embedding)
+        self.labels[entry.id] = label
+        self.ids_by_label[label] = entry.id
+        self._vectors[entry.id] = vec[0]
+
+        if self.index.is_trained:
+            self.index.add_with_ids(vec, np.array([label], dtype=np.int64))
+            return
+
+        # The quantizer needs a training sample; hold vectors back until there is one
+        self._pending_labels.append(label)
+        self._pending_vectors.append(vec)
+        if len(self._pending_vectors) >= self.train_size:
+            sample = np.vstack(self._pending_vectors)
+            self.index.train(sample)
+            self.index.add_with_ids(sample, np.array(self._pending_labels, dtype=np.int64))
+            self._pending_labels = []
+            self._pending_vectors = []
+            logger.debug(f"Trained FAISS scalar quantizer on {len(sample)} vectors")
+
+    def _drop_vector(self, mem_id: str) -> None:
+        """Orphan an entry's label; its vector stays in the graph until the next rebuild."""
+        label = self.labels.pop(mem_id, None)
+        if label is not None:
+            del self.ids_by_label[label]
+            del self._vectors[mem_id]
+            self._stale += 1
+
+    def _maybe_rebuild(self) -> None:
+        """Rebuild the graph once orphaned vectors outnumber live ones."""
+        if self._stale < 1000 or self._stale < len(self.labels):
+            return
+        self._new_index()
+        self.labels.clear()
+        self.ids_by_label.clear()
+        self._vectors.clear()
+        self._stale = 0
+        for entry in self.entries.values():
+            if entry.embedding is not None and len(entry.embedding) == self.dim:
+                self._add_vector(entry)
+        logger.debug(f"Rebuilt FAISS index with {len(self.labels)} vectors")
+
+    def index(self, entry: MemoryEntry) -> None:
+        """Index (or re-index) a memory entry."""
+        with self._lock:
+            self._drop_vector(entry.id)
+            self.entries[entry.id] = entry
+            if entry.embedding is not None:
+                if len(entry.embedding) == self.dim:
+                    self._add_vector(entry)
+                else:
+                    logger.warning(f"Memory {entry.id} has a {len(entry.embedding)}-dim embedding, expected {self.dim}")
+            self._maybe_rebuild()
+
+            if self._mirror:
+                self._mirror.submit(self.persist_backend.index, entry)
+
+    def search(
+        self,
+        query_embedding: Optional[List[float]],
+        top_k: int,
+        mem_types: Optional[List[MemoryType]] = None,
+        user_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+    ) -> List[MemoryEntry]:
+        """
+        Search for memories by cosine similarity.
+
+        With filters, the graph walk is restricted to matching labels through an
+        IDSelector; small matching sets are searched exactly instead, since a very
+        selective filter leaves HNSW few paths to the matches.
+
+        Args:
+            query_embedding: Embedding vector; if None, the most recent entries are returned.
+            top_k: Number of results to return.
+            mem_types: Optional filter by memory types.
+            user_id: Optional filter by user.
+            tags: Optional filter by tags (any match).
+            time_range: Optional (start, end) datetime range.
+
+        Returns:
+            List of MemoryEntry objects.
+        """
+        with self._lock:
+            filtered = bool(mem_types or user_id or tags or time_range)
+
+            if query_embedding is None or not self.labels:
+                pool = self.entries.values()
+                if filtered:
+                    pool = [e for e in pool if _matches(e, mem_types, user_id, tags, time_range)]
+                return heapq.nlargest(top_k, pool, key=lambda e: e.timestamp)
+
+            query = self._normalized(query_embedding)
+
+            # Over-fetch for exact re-ranking when scores come from 8-bit codes
+            keep = top_k * (4 if self.quantize else 1)
+
+            if filtered:
+                allowed = np.array(
+                    [label for label, mem_id in self.ids_by_label.items()
+                     if _matches(self.entries[mem_id], mem_types, user_id, tags, time_range)],
+                    dtype=np.int64,
+                )
+                if len(allowed) == 0:
+                    return []
+                if self._pending_vectors or len(allowed) <= max(keep, 1000):
+                    vecs = np.vstack([self._vectors[self.ids_by_label[int(label)]] for label in allowed])
+                    labels = allowed[np.argsort(-(vecs @ query[0]), kind="stable")[:keep]]
+                else:
+                    params = faiss.SearchParametersHNSW(
+                        sel=faiss.IDSelectorBatch(allowed), efSearch=self.ef_search
+                    )
+                    _, labels = self.index.search(query, min(keep, len(allowed)), params=params)
+                    labels = labels[0]
+            elif self._pending_vectors:
+                # Quantizer not trained yet: exact search over the held-back vectors
+                sims = np.vstack(self._pending_vectors) @ query[0]
+                labels = np.asarray(self._pending_labels)[np.argsort(-sims)[:keep + self._stale]]
+            else:
+                # Over-fetch to make room for orphaned vectors
+                _, labels = self.index.search(query, min(keep + self._stale, self.index.ntotal))
+                labels = labels[0]
+
+            memories = []
+            for label in labels:
+                mem_id = self.ids_by_label.get(int(label))
+                if mem_id is None:
+                    continue  # -1 padding or an orphaned vector
+                memories.append(self.entries[mem_id])
+                if len(memories) == keep:
+                    break
+
+            if self.quantize and not self._pending_vectors and len(memories) > 1:
+                exact = np.vstack([self._vectors[m.id] for m in memories]) @ query[0]
+                memories = [memories[i] for i in np.argsort(-exact, kind="stable")]
+            return memories[:top_k]
+
+    def get(self, mem_ids: List[str]) -> List[MemoryEntry]:
+        """Fetch memories by id."""
+        return [self.entries[mem_id] for mem_id in mem_ids if mem_id in self.entries]
+
+    def delete(self, mem_id: str) -> None:
+        """Delete a memory from the index."""
+        with self._lock:
+            self._drop_vector(mem_id)
+            self.entries.pop(mem_id, None)
+            self._maybe_rebuild()
+
+            if self._mirror:
+                self._mirror.submit(self.persist_backend.delete, mem_id)
+
+    def similarity(
+        self, emb1: Optional[List[float]], emb2: Optional[List[float]]
+    ) -> float:
+        """Compute cosine similarity between two embeddings (0-1)."""
+        return _cosine_similarity(emb1, emb2)
+
+    def clear(self) -> None:
+        """Delete all memories from the index (and the cold backend, if any)."""
+        with self._lock:
+            self._new_index()
+            self.entries.clear()
+            self.labels.clear()
+            self.ids_by_label.clear()
+            self._vectors.clear()
+            self._stale = 0
+            if self._mirror and hasattr(self.persist_backend, "clear"):
+                self._mirror.submit(self.persist_backend.clear)
+
+    def flush(self) -> None:
+        """Have the cold backend write out anything it buffers (after the queued writes)."""
+        if self._mirror:
+            self._mirror.submit(self.persist_backend.flush)
+
+    def close(self) -> None:
+        """Wait for pending writes to reach the cold backend."""
+        if self._mirror:
+            self.flush()
+            self._mirror.shutdown(wait=True)
+            self.persist_backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        return {
+            "memory_count": len(self.entries),
+            "indexed_vectors": len(self.labels),
+            "orphaned_vectors": self._stale,
+        }
+
+
+def _matches(
+    entry: MemoryEntry,
+    mem_types: Optional[List[MemoryType]],
+    user_id: Optional[str],
+    tags: Optional[List[str]],
+    time_range: Optional[Tuple[datetime, datetime]],
+) -> bool:
+    """Whether an entry passes the search filters."""
+    if mem_types and entry.type not in mem_types:
+        return False
+    if user_id and entry.user_id != user_id:
+        return False
+    if tags and not any(t in entry.tags for t in tags):
+        return False
+    if time_range and not time_range[0] <= entry.timestamp <= time_range[1]:
+        return False
+    return True
+
+
+def _cosine_similarity(emb1: Optional[List[float]], emb2: Optional[List[float]]) -> float:
+    """Cosine similarity mapped from [-1, 1] to [0, 1]; 0.5 if either embedding is missing."""
+    if emb1 is None or emb2 is None:
+        return 0.5  # Default if embeddings missing
+
+    # asarray: no copy when callers already hold float32 arrays
+    emb1 = np.asarray(emb1, dtype=np.float32)
+    emb2 = np.asarray(emb2, dtype=np.float32)
+
+    # Cosine similarity: (A · B) / sqrt(||A||² * ||B||²), one square root
+    norms_sq = np.dot(emb1, emb1) * np.dot(emb2, emb2)
+    if norms_sq == 0:
+        return 0.0
+
+    similarity = float(np.dot(emb1, emb2) / np.sqrt(norms_sq))
+    # Map from [-1, 1] to [0, 1]
+    return (similarity + 1.0) / 2.0
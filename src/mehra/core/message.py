@@ -1,7 +1,25 @@
 from dataclasses import dataclass
+from typing import List
 
-@dataclass
+@dataclass(init=False, slots=True)
 class Message:
     """Class representing a message in a conversation."""
     role: str  # "system", "user", or "assistant"
-    content: str
+    chunks: List[str]  # Content pieces, joined with spaces when read
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.chunks = [content]
+
+    @property
+    def content(self) -> str:
+        """Full message text."""
+        return " ".join(self.chunks)
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self.chunks = [value]
+
+    def append(self, content: str) -> None:
+        """Append content to the message without rebuilding the whole string."""
+        self.chunks.append(content)
@@ -3,12 +3,17 @@ Unit tests for the memory system.
 Tests MemoryManager and ChromaBackend functionality.
 """
 
+import asyncio
+import os
 import unittest
 from datetime import datetime, timedelta
-from .memory import MemoryManager, MemoryType, MemoryEntry
-from .memory_backends import ChromaBackend
+import numpy as np
+from .memory import MemoryManager, MemoryStore, MemoryType, MemoryEntry
+from .memory_backends import ChromaBackend, FaissBackend, faiss
 import tempfile
 import shutil
+import msgpack
+import time
 
 
 class TestMemoryEntry(unittest.TestCase):
@@ -95,6 +100,66 @@ class TestMemoryEntry(unittest.TestCase):
         self.assertEqual(restored.type, entry.type)
 
 
+class TestMemoryStore(unittest.TestCase):
+    """Test the columnar MemoryStore."""
+
+    def _entry(self, mem_id, embedding=None, importance=0.5):
+        return MemoryEntry(
+            id=mem_id,
+            text=mem_id,
+            type=MemoryType.EPISODIC,
+            timestamp=datetime.now(),
+            embedding=embedding,
+            importance_score=importance,
+        )
+
+    def test_put_grow_and_overwrite(self):
+        """Test rows survive growth and re-putting an entry reuses its row."""
+        store = MemoryStore(capacity=2)
+        for i in range(5):
+            store.put(self._entry(f"m{i}", embedding=[3.0, 4.0]))
+        self.assertEqual(store.size, 5)
+        self.assertGreaterEqual(store.capacity, 5)
+        self.assertAlmostEqual(float(store.embeddings[store.rows["m4"]][0]), 0.6, places=2)
+
+        row = store.rows["m1"]
+        store.put(self._entry("m1", importance=0.9))
+        self.assertEqual(store.rows["m1"], row)
+        self.assertAlmostEqual(float(store.importance[row]), 0.9, places=5)
+        self.assertFalse(store.has_embedding[row])
+
+    def test_remove_and_compact(self):
+        """Test tombstoned rows are skipped and compaction keeps ids aligned."""
+        store = MemoryStore()
+        for i in range(4):
+            store.put(self._entry(f"m{i}", importance=i / 10))
+        store.remove("m0")
+        store.remove("m2")
+        self.assertEqual(list(store.row_indices(["m0", "m1", "m2", "m3"])), [1, 3])
+
+        store.compact()
+        self.assertEqual(store.ids, ["m1", "m3"])
+        self.assertAlmostEqual(float(store.importance[store.rows["m3"]]), 0.3, places=5)
+
+
+    def test_match_tags(self):
+        """Test tag bitmasks, including tags past the interned limit."""
+        store = MemoryStore()
+        store.MAX_TAG_BITS = 2
+        entries = {}
+        for mem_id, tags in [("a", ["pets"]), ("b", ["work", "pets"]), ("c", ["rare"]), ("d", [])]:
+            entries[mem_id] = self._entry(mem_id)
+            entries[mem_id].tags = tags
+            store.put(entries[mem_id])
+        self.assertEqual(store.tag_bits, {"pets": 0, "work": 1})
+
+        rows = store.row_indices(["a", "b", "c", "d"])
+        tags_of = lambda r: entries[store.ids[r]].tags
+        self.assertEqual(list(store.match_tags(rows, ["pets"], tags_of)), [True, True, False, False])
+        self.assertEqual(list(store.match_tags(rows, ["rare", "work"], tags_of)), [False, True, True, False])
+        self.assertEqual(list(store.match_tags(rows, ["unknown"], tags_of)), [False, False, False, False])
+
+
 class TestMemoryManager(unittest.TestCase):
     """Test MemoryManager functionality."""
 
@@ -143,6 +208,34 @@ class TestMemoryManager(unittest.TestCase):
         results = self.manager.retrieve("Python", top_k=10)
         self.assertGreater(len(results), 0)
 
+    def test_retrieve_async(self):
+        """Test async retrieval matches the synchronous result."""
+        self.manager.add("Python is great", mem_type=MemoryType.SEMANTIC)
+        results = asyncio.run(self.manager.retrieve_async("Python", top_k=5, mem_types=[MemoryType.SEMANTIC]))
+        self.assertEqual(results, self.manager.retrieve("Python", top_k=5, mem_types=[MemoryType.SEMANTIC]))
+
+    def test_retrieve_concurrent(self):
+        """Test concurrent retrievals, racing a writer on an unflushed backend, stay consistent."""
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: [float(len(text)), 1.0, 0.0])
+        for i in range(20):
+            manager.add(f"memory {i}")  # Left in the backend's write buffer (batch_size 128)
+
+        async def retrieve_all():
+            queries = [f"query {i % 5}" for i in range(20)]
+            writer = asyncio.to_thread(manager.add_many, [f"later {i}" for i in range(50)])
+            *results, _ = await asyncio.gather(
+                *(manager.retrieve_async(query, top_k=5) for query in queries), writer
+            )
+            return results
+
+        results = asyncio.run(retrieve_all())
+        self.backend.flush()  # The writer may have finished after the last search
+        self.assertEqual(len(self.backend._row_ids), len(set(self.backend._row_ids)))
+        self.assertEqual(len(self.backend._row_ids), 70)
+        for hits in results:
+            self.assertEqual(len(hits), 5)
+            self.assertEqual(len({m.id for m in hits}), 5)
+
     def test_retrieve_with_filters(self):
         """Test retrieval with type and tag filters."""
         id1 = self.manager.add(
@@ -169,6 +262,138 @@ class TestMemoryManager(unittest.TestCase):
         )
         self.assertGreater(len(tagged), 0)
 
+    def test_retrieve_ranks_by_similarity(self):
+        """Test that hybrid scoring puts the closest embedding first."""
+        vectors = {
+            "User likes cats": [1.0, 0.0, 0.0],
+            "User likes dogs": [0.0, 1.0, 0.0],
+            "cats": [0.9, 0.1, 0.0],
+        }
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: vectors[text])
+        manager.add("User likes dogs")
+        manager.add("User likes cats")
+
+        results = manager.retrieve("cats", top_k=1)
+        self.assertEqual([m.text for m in results], ["User likes cats"])
+
+    def test_add_many(self):
+        """Test batch adding embeds every text and keeps the order."""
+        calls = []
+
+        def embed(text):
+            calls.append(text)
+            return [float(len(text)), 1.0, 0.0]
+
+        manager = MemoryManager(backend=self.backend, embedding_func=embed)
+        ids = manager.add_many(["one", "three"], mem_type=MemoryType.SEMANTIC, tags=["batch"])
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual([manager.memories[i].text for i in ids], ["one", "three"])
+        self.assertEqual(manager.memories[ids[1]].embedding, [5.0, 1.0, 0.0])
+        self.assertEqual(calls, ["one", "three"])
+        self.assertEqual(manager.memories[ids[0]].tags, ["batch"])
+
+    def test_embedding_cache(self):
+        """Test repeated texts and queries are embedded only once."""
+        calls = []
+
+        def embed(text):
+            calls.append(text)
+            return [1.0, 0.0, 0.0]
+
+        manager = MemoryManager(backend=self.backend, embedding_func=embed, embedding_cache_size=2)
+        manager.add("same text")
+        manager.add("same text")
+        manager.retrieve("same text")
+        self.assertEqual(calls, ["same text"])
+
+        manager.add_many(["a", "b"])  # evicts "same text"
+        manager.add("same text")
+        self.assertEqual(calls, ["same text", "a", "b", "same text"])
+
+    def test_retrieve_with_query_embedding(self):
+        """Test a precomputed query embedding is used instead of embedding the query."""
+        vectors = {"User likes cats": [1.0, 0.0, 0.0], "User likes dogs": [0.0, 1.0, 0.0]}
+        calls = []
+
+        def embed(text):
+            calls.append(text)
+            return vectors[text]
+
+        manager = MemoryManager(backend=self.backend, embedding_func=embed)
+        manager.add("User likes cats")
+        manager.add("User likes dogs")
+
+        results = manager.retrieve("pets", top_k=1, query_embedding=[0.1, 0.9, 0.0])
+        self.assertEqual([m.text for m in results], ["User likes dogs"])
+        self.assertNotIn("pets", calls)
+
+    def test_retrieve_many(self):
+        """Test batched retrieval embeds all queries in one call and keeps their order."""
+        vectors = {"cats": [1.0, 0.0, 0.0], "dogs": [0.0, 1.0, 0.0]}
+        batches = []
+
+        class Encoder:
+            def encode(self, texts, **kwargs):
+                batches.append(list(texts))
+                return np.array([vectors[text] for text in texts], dtype=np.float32)
+
+        manager = MemoryManager(backend=self.backend, embedding_func=Encoder())
+        manager.add_many(["cats", "dogs"])
+        batches.clear()
+
+        results = manager.retrieve_many(["dogs", "cats"], top_k=1)
+        self.assertEqual([[m.text for m in hits] for hits in results], [["dogs"], ["cats"]])
+        self.assertEqual(batches, [["dogs", "cats"]])
+
+    def test_query_cache(self):
+        """Test near-duplicate queries skip the backend until a memory changes."""
+        vectors = {"cats": [1.0, 0.0, 0.0], "kittens": [0.99, 0.01, 0.0], "dogs": [0.0, 1.0, 0.0]}
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: vectors[text])
+        manager.add("cats")
+
+        searches = []
+        search_ids = self.backend.search_ids
+        self.backend.search_ids = lambda *args, **kwargs: searches.append(1) or search_ids(*args, **kwargs)
+
+        first = manager.retrieve("cats", top_k=1)
+        self.assertEqual(manager.retrieve("kittens", top_k=1), first)
+        self.assertEqual(len(searches), 1)
+
+        manager.retrieve("kittens", top_k=2)  # different filters
+        manager.add("dogs")
+        manager.retrieve("cats", top_k=1)
+        self.assertEqual(len(searches), 3)
+
+    def test_query_cache_expiry(self):
+        """Test cached results drop memories that expired and are reused only briefly."""
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: [1.0, 0.0, 0.0])
+        mem_id = manager.add("cats", ttl_seconds=3600)
+
+        searches = []
+        search_ids = self.backend.search_ids
+        self.backend.search_ids = lambda *args, **kwargs: searches.append(1) or search_ids(*args, **kwargs)
+
+        self.assertEqual([m.id for m in manager.retrieve("cats", top_k=1)], [mem_id])
+        manager.memories[mem_id].timestamp -= timedelta(hours=2)  # Now past its TTL
+        self.assertEqual(manager.retrieve("cats", top_k=1), [])
+        self.assertEqual(len(searches), 1)
+
+        manager.QUERY_CACHE_TTL = 0.0
+        manager.retrieve("cats", top_k=1)
+        self.assertEqual(len(searches), 2)
+
+    def test_retrieve_fills_top_k_past_expired(self):
+        """Test expired hits are replaced by further candidates instead of shrinking results."""
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: [float(len(text)), 1.0, 0.0])
+        ids = [manager.add("x" * n, ttl_seconds=3600) for n in (1, 2, 3, 4)]
+        for mem_id in ids[:2]:
+            manager.memories[mem_id].timestamp -= timedelta(hours=2)  # Past their TTL
+            manager.store.put(manager.memories[mem_id])
+
+        results = manager.retrieve("x", top_k=2)
+        self.assertEqual(sorted(m.id for m in results), sorted(ids[2:]))
+
     def test_update_memory(self):
         """Test updating a memory."""
         mem_id = self.manager.add("Original text", importance_score=0.5)
@@ -200,6 +425,26 @@ class TestMemoryManager(unittest.TestCase):
         self.assertIsNotNone(summary)
         self.assertEqual(summary.type, MemoryType.LONG_TERM)
 
+    def test_summarize_filters_and_bound(self):
+        """Test summarize only reads matching memories, capped at the most recent."""
+        now = datetime.now()
+        for i in range(5):
+            mem_id = self.manager.add(f"Alice fact {i}", user_id="alice")
+            self.manager.memories[mem_id].timestamp = now - timedelta(minutes=10 - i)
+            self.manager.store.put(self.manager.memories[mem_id])
+        self.manager.add("Bob fact", user_id="bob")
+        self.manager.add("Semantic fact", mem_type=MemoryType.SEMANTIC, user_id="alice")
+
+        seen = []
+        summary = self.manager.summarize(
+            mem_types=[MemoryType.EPISODIC],
+            user_id="alice",
+            summarizer_func=lambda texts: seen.extend(texts) or "summary",
+            max_inputs=3,
+        )
+        self.assertEqual(seen, ["Alice fact 2", "Alice fact 3", "Alice fact 4"])
+        self.assertEqual(summary.metadata["summarized_count"], 3)
+
     def test_cleanup(self):
         """Test cleanup of expired memories."""
         # Add a memory with short TTL
@@ -212,6 +457,15 @@ class TestMemoryManager(unittest.TestCase):
         removed = self.manager.cleanup(max_age_hours=0.0001)
         self.assertGreater(removed, 0)
 
+    def test_cleanup_keeps_important(self):
+        """Test old memories are only dropped when their importance is low."""
+        trivial = self.manager.add("Trivial", importance_score=0.1)
+        important = self.manager.add("Important", importance_score=0.9)
+
+        self.assertEqual(self.manager.cleanup(max_age_hours=0.0), 1)
+        self.assertNotIn(trivial, self.manager.memories)
+        self.assertIn(important, self.manager.memories)
+
     def test_context_block(self):
         """Test context block generation."""
         self.manager.add("Memory 1", mem_type=MemoryType.EPISODIC)
@@ -221,6 +475,18 @@ class TestMemoryManager(unittest.TestCase):
         self.assertIsInstance(context, str)
         self.assertIn("Recent Context", context)
 
+    def test_context_block_recent_order(self):
+        """Test the no-query context block lists the newest memories first, truncated."""
+        self.manager.add("Oldest")
+        deleted = self.manager.add("Deleted")
+        self.manager.add("x" * 150, tags=["long"])
+        self.manager.delete(deleted)
+
+        lines = self.manager.get_context_block(top_k=5).splitlines()
+        self.assertEqual(lines[2], f"1. [episodic] {'x' * 100} (importance=0.50, tags=long)")
+        self.assertEqual(lines[3], "2. [episodic] Oldest (importance=0.50, tags=none)")
+        self.assertEqual(len(lines), 4)
+
     def test_persistence(self):
         """Test save/load functionality."""
         mem_id = self.manager.add("Persistent memory", importance_score=0.8)
@@ -237,6 +503,39 @@ class TestMemoryManager(unittest.TestCase):
             new_manager.memories[mem_id].importance_score, 0.8
         )
 
+    def test_persistence_with_embeddings(self):
+        """Test embeddings round-trip through the .npy sidecar."""
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: [0.25, 0.5, 1.0])
+        mem_id = manager.add("Embedded memory")
+
+        persist_file = f"{self.temp_dir}/memories.bin"
+        manager.persist(persist_file)
+
+        new_manager = MemoryManager(backend=self.backend)
+        new_manager.load(persist_file)
+        self.assertEqual(new_manager.memories[mem_id].embedding, [0.25, 0.5, 1.0])
+
+    def test_append_only_log(self):
+        """Test changes are replayed from the log and survive compaction."""
+        log_path = f"{self.temp_dir}/memories.log"
+        manager = MemoryManager(backend=self.backend, embedding_func=lambda text: [0.5, 0.25, 1.0], log_path=log_path)
+        kept = manager.add("Kept memory", importance_score=0.4)
+        dropped = manager.add("Dropped memory")
+        manager.update(kept, importance_score=0.9)
+        manager.delete(dropped)
+        manager.close()
+
+        replayed = MemoryManager(backend=self.backend, log_path=log_path)
+        self.assertEqual(list(replayed.memories), [kept])
+        self.assertEqual(replayed.memories[kept].importance_score, 0.9)
+        self.assertEqual(replayed.memories[kept].embedding, [0.5, 0.25, 1.0])
+
+        replayed.compact()
+        replayed.close()
+        reopened = MemoryManager(backend=self.backend, log_path=log_path)
+        self.assertEqual(reopened._log_records, 1)
+        reopened.close()
+
 
 class TestChromaBackend(unittest.TestCase):
     """Test ChromaBackend functionality."""
@@ -278,6 +577,99 @@ class TestChromaBackend(unittest.TestCase):
         ids = [r.id for r in results]
         self.assertNotIn("test_delete", ids)
 
+    def test_buffered_writes(self):
+        """Test writes are upserted in batches and reads see buffered entries."""
+        self.backend.close()  # Only one backend may be open per persist_dir
+        backend = ChromaBackend(persist_dir=self.temp_dir, batch_size=2)
+        backend.clear()
+        backend.index(MemoryEntry(id="b1", text="first", type=MemoryType.EPISODIC, timestamp=datetime.now()))
+        self.assertEqual(backend.collection.count(), 0)
+
+        backend.index(MemoryEntry(id="b2", text="second", type=MemoryType.EPISODIC, timestamp=datetime.now()))
+        self.assertEqual(backend.collection.count(), 2)
+
+        backend.index(MemoryEntry(id="b3", text="third", type=MemoryType.EPISODIC, timestamp=datetime.now()))
+        self.assertEqual([m.id for m in backend.get(["b3"])], ["b3"])
+
+    def test_embedding_cache(self):
+        """Test repeated texts are embedded once and stored with their vectors."""
+        self.backend.index(MemoryEntry(id="c1", text="same words", type=MemoryType.EPISODIC, timestamp=datetime.now()))
+        self.backend.index(MemoryEntry(id="c2", text="same words", type=MemoryType.EPISODIC, timestamp=datetime.now()))
+        self.backend.flush()
+        self.assertEqual(len(self.backend._embedding_cache), 1)
+
+        stored = self.backend.get(["c1", "c2"])
+        self.assertEqual(len(stored), 2)
+        self.assertEqual(stored[0].embedding, stored[1].embedding)
+
+    def test_search_ids_and_get(self):
+        """Test id-only search and fetching entries back by id."""
+        entry = MemoryEntry(
+            id="test_ids",
+            text="Lightweight search",
+            type=MemoryType.SEMANTIC,
+            timestamp=datetime.now(),
+            embedding=[0.0, 1.0, 0.0],
+            tags=["a", "b"],
+        )
+        self.backend.index(entry)
+
+        self.assertEqual(self.backend.search_ids(query_embedding=[0.0, 1.0, 0.0], top_k=1), ["test_ids"])
+
+        fetched = self.backend.get(["test_ids", "missing"])
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(fetched[0].text, "Lightweight search")
+        self.assertEqual(fetched[0].tags, ["a", "b"])
+        self.assertEqual(fetched[0].embedding, [0.0, 1.0, 0.0])
+
+    def test_local_vector_search(self):
+        """Test unfiltered vector queries rank exactly and see deletes."""
+        for mem_id, embedding in [("x", [1.0, 0.0, 0.0]), ("xy", [1.0, 1.0, 0.0]), ("z", [0.0, 0.0, 2.0])]:
+            self.backend.index(MemoryEntry(
+                id=mem_id, text=mem_id, type=MemoryType.SEMANTIC,
+                timestamp=datetime.now(), embedding=embedding,
+            ))
+        self.assertEqual(self.backend.search_ids([2.0, 0.0, 0.0], top_k=2), ["x", "xy"])
+        self.assertEqual([m.id for m in self.backend.search([0.0, 0.0, 1.0], top_k=1)], ["z"])
+
+        self.backend.delete("x")
+        self.assertEqual(self.backend.search_ids([1.0, 0.0, 0.0], top_k=3), ["xy", "z"])
+
+    def test_search_filters(self):
+        """Test user, tag and time filters are applied inside the query."""
+        now = datetime.now()
+        for mem_id, user, tags, age in [
+            ("alice_old", "alice", ["pets"], 48),
+            ("alice_new", "alice", ["work"], 0),
+            ("bob_new", "bob", ["pets"], 0),
+        ]:
+            self.backend.index(MemoryEntry(
+                id=mem_id,
+                text=mem_id,
+                type=MemoryType.EPISODIC,
+                timestamp=now - timedelta(hours=age),
+                embedding=[1.0, 0.0, 0.0],
+                user_id=user,
+                tags=tags,
+            ))
+
+        query = [1.0, 0.0, 0.0]
+        self.assertEqual(
+            sorted(self.backend.search_ids(query, top_k=3, user_id="alice")), ["alice_new", "alice_old"]
+        )
+        self.assertEqual(
+            sorted(self.backend.search_ids(query, top_k=3, tags=["pets"])), ["alice_old", "bob_new"]
+        )
+        self.assertEqual(
+            self.backend.search_ids(
+                query, top_k=3, user_id="alice", time_range=(now - timedelta(hours=1), now)
+            ),
+            ["alice_new"],
+        )
+        results = self.backend.search(query, top_k=3, tags=["work"])
+        self.assertEqual([r.id for r in results], ["alice_new"])
+        self.assertEqual(results[0].metadata, {})
+
     def test_similarity(self):
         """Test similarity computation."""
         emb1 = [1.0, 0.0, 0.0]
@@ -295,6 +687,125 @@ class TestChromaBackend(unittest.TestCase):
         self.assertIn("memory_count", stats)
         self.assertIn("persist_dir", stats)
 
+    def test_snapshot_round_trip(self):
+        """Test close() snapshots the collection and a fresh backend reloads it."""
+        self.backend.index(MemoryEntry(
+            id="snap_1", text="Snapshotted memory", type=MemoryType.SEMANTIC,
+            timestamp=datetime.now(), embedding=[0.0, 1.0, 0.0],
+        ))
+        self.backend.close()
+        self.assertTrue(os.path.exists(self.backend.snapshot_path))
+
+        # Drop the in-process collection so the next backend has to read the snapshot
+        self.backend.client.delete_collection(self.backend.collection.name)
+        reloaded = ChromaBackend(persist_dir=self.temp_dir)
+        [entry] = reloaded.get(["snap_1"])
+        self.assertEqual(entry.text, "Snapshotted memory")
+        self.assertEqual(entry.embedding, [0.0, 1.0, 0.0])
+
+    def test_one_backend_per_dir(self):
+        """Test a second backend on an open persist_dir is refused until the first is closed."""
+        with self.assertRaises(ValueError):
+            ChromaBackend(persist_dir=self.temp_dir)
+        self.backend.close()
+        ChromaBackend(persist_dir=self.temp_dir).close()
+
+    def test_timed_snapshot(self):
+        """Test buffered writes reach the snapshot within snapshot_interval, without close()."""
+        self.backend.close()
+        backend = ChromaBackend(persist_dir=self.temp_dir, snapshot_interval=0.05)
+        backend.index(MemoryEntry(
+            id="t1", text="Saved on a timer", type=MemoryType.EPISODIC,
+            timestamp=datetime.now(), embedding=[1.0, 0.0, 0.0],
+        ))
+        deadline = time.monotonic() + 5.0
+        while not os.path.exists(backend.snapshot_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with open(backend.snapshot_path, "rb") as f:
+            self.assertEqual(msgpack.unpackb(f.read(), raw=False)["ids"], ["t1"])
+        backend.close()
+
+    def test_snapshot_upgrades_legacy_metadata(self):
+        """Test entries saved without "ts" and tag keys still match time and tag filters."""
+        now = datetime.now()
+        self.backend.close()
+        with open(self.backend.snapshot_path, "wb") as f:
+            f.write(msgpack.packb({
+                "ids": ["old_1"],
+                "documents": ["Saved by an older version"],
+                "metadatas": [{"type": "episodic", "source": "unknown", "importance": 0.5,
+                               "timestamp": now.isoformat(), "user_id": "", "tags": "work,home"}],
+                "embeddings": [np.array([1.0, 0.0, 0.0], dtype=np.float32).tobytes()],
+            }, use_bin_type=True))
+
+        self.backend.client.delete_collection(self.backend.collection.name)
+        reloaded = ChromaBackend(persist_dir=self.temp_dir)
+        self.assertEqual(
+            reloaded.search_ids([1.0, 0.0, 0.0], top_k=3, tags=["home"],
+                                time_range=(now - timedelta(hours=1), now + timedelta(hours=1))),
+            ["old_1"],
+        )
+
+
+@unittest.skipIf(faiss is None, "faiss is not installed")
+class TestFaissBackend(unittest.TestCase):
+    """Test FaissBackend functionality."""
+
+    def _entry(self, mem_id, embedding, mem_type=MemoryType.EPISODIC):
+        return MemoryEntry(
+            id=mem_id,
+            text=mem_id,
+            type=mem_type,
+            timestamp=datetime.now(),
+            embedding=embedding,
+        )
+
+    def test_index_search_and_delete(self):
+        """Test nearest-neighbour search, type filtering and deletion."""
+        backend = FaissBackend(dim=3)
+        backend.index(self._entry("cats", [1.0, 0.0, 0.0]))
+        backend.index(self._entry("dogs", [0.0, 1.0, 0.0], MemoryType.SEMANTIC))
+
+        results = backend.search(query_embedding=[0.9, 0.1, 0.0], top_k=1)
+        self.assertEqual([r.id for r in results], ["cats"])
+
+        results = backend.search(query_embedding=[0.9, 0.1, 0.0], top_k=1, mem_types=[MemoryType.SEMANTIC])
+        self.assertEqual([r.id for r in results], ["dogs"])
+
+        backend.delete("cats")
+        results = backend.search(query_embedding=[0.9, 0.1, 0.0], top_k=2)
+        self.assertEqual([r.id for r in results], ["dogs"])
+
+    def test_search_filters(self):
+        """Test filtered search only returns matching memories."""
+        backend = FaissBackend(dim=3)
+        for i in range(20):
+            entry = self._entry(f"m{i}", [1.0, i / 20, 0.0])
+            entry.user_id = "alice" if i % 2 else "bob"
+            entry.tags = ["pets"] if i % 5 == 0 else []
+            backend.index(entry)
+
+        results = backend.search(query_embedding=[1.0, 0.0, 0.0], top_k=3, user_id="alice")
+        self.assertEqual([r.id for r in results], ["m1", "m3", "m5"])
+
+        results = backend.search(query_embedding=[1.0, 0.0, 0.0], top_k=10, tags=["pets"])
+        self.assertEqual([r.id for r in results], ["m0", "m5", "m10", "m15"])
+
+        self.assertEqual(backend.search(query_embedding=[1.0, 0.0, 0.0], top_k=3, user_id="carol"), [])
+
+    def test_quantized_index(self):
+        """Test exact search before the quantizer is trained and re-ranked search after."""
+        backend = FaissBackend(dim=3, quantize=True, train_size=4)
+        backend.index(self._entry("cats", [1.0, 0.0, 0.0]))
+        backend.index(self._entry("dogs", [0.0, 1.0, 0.0]))
+        self.assertFalse(backend.index.is_trained)
+        self.assertEqual(backend.search(query_embedding=[0.9, 0.1, 0.0], top_k=1)[0].id, "cats")
+
+        backend.index(self._entry("birds", [0.0, 0.0, 1.0]))
+        backend.index(self._entry("fish", [0.0, 0.7, 0.7]))
+        self.assertTrue(backend.index.is_trained)
+        self.assertEqual(backend.search(query_embedding=[0.1, 0.9, 0.0], top_k=1)[0].id, "dogs")
+
 
 if __name__ == "__main__":
     unittest.main()
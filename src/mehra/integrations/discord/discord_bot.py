@@ -38,29 +38,36 @@ class DiscordBot(discord.Client):
 
                 message_template = f"{message.author.name}: {message.content}\n"
 
+                # Send each sentence in the background so the next one isn't gated on the REST round-trip;
+                # every send waits for the previous one so messages keep their order
+                send_task = None
                 async for sentence in self.mehra.chat(message_template):
-                    # Create tasks for both sending message and queueing audio
-                    # send_task = asyncio.create_task(self.send_message(message.channel, sentence))
-                    await self.send_message(message.channel, sentence)
+                    send_task = asyncio.create_task(self.send_message(message.channel, sentence, after=send_task))
+                if send_task:
+                    await send_task
 
             elif self.read0nly:
                 if str(message.author.id) == self.read0nly_ai_id:
                     print("Gura detected")
                     message_segment = str(message.content).split(". ")
 
+                    # Walk the list by index instead of deleting processed segments from the front
+                    n = len(message_segment)
+                    start = 0
                     i = 0
-                    while len(message_segment) > 0:
+                    while start < n:
                         growing_number = max(2 * i, 1)  # Ensure growing_number is at least 1
 
-                        text_stream_batch = '. '.join(message_segment[:growing_number]) + '. '  # Properly join sentences
+                        text_stream_batch = '. '.join(message_segment[start:start + growing_number]) + '. '  # Properly join sentences
 
                         self.mehra.tts_engine.say(text_stream_batch)
 
-                        # Remove processed segments
-                        del message_segment[:growing_number]
+                        start += growing_number
                         i += 1
     
-    async def send_message(self, channel, sentence):
+    async def send_message(self, channel, sentence, after=None):
+        if after:
+            await after
         await channel.send(sentence)
         # print(f"Sent message: {sentence}")
 
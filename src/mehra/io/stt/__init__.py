@@ -1,4 +1,13 @@
-from .whisper_engine import WhisperEngine
+# WhisperEngine pulls in torch and faster_whisper, so it is imported on first use
+# rather than whenever something imports the interface from this package
+
+
+def __getattr__(name):
+    if name == "WhisperEngine":
+        from .whisper_engine import WhisperEngine
+        return WhisperEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Factory function to get the appropriate STT engine
 def get_stt_engine(engine_type="whisper", **kwargs):
@@ -14,6 +23,7 @@ def get_stt_engine(engine_type="whisper", **kwargs):
     """
     
     if engine_type.lower() == "whisper":
+        from .whisper_engine import WhisperEngine
         return WhisperEngine(**kwargs).initialize()
     else:
         raise ValueError(f"Unknown STT engine type: {engine_type}")
\ No newline at end of file
@@ -1,18 +1,26 @@
+import os
 import pyaudio
 import numpy as np
 import threading
 import queue
 import time
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 from collections import deque
 import torch
 import asyncio
 
+from ..tts.spsc_queue import SPSCQueue
+
 class WhisperEngine:
-    def __init__(self, model_path="Systran/faster-whisper-small", vad_threshold=0.5):
+    _INV32768 = np.float32(1.0 / 32768.0)  # int16 -> [-1, 1) scale, kept float32 so nothing upcasts
+
+    def __init__(self, model_path="Systran/faster-whisper-small", vad_threshold=0.5, compute_type=None, beam_size=3):
         # Model configuration
         self.model_path = model_path
         self.model = None
+        self.pipeline = None  # Batched decoding of the 30s windows in long segments
+        self.compute_type = compute_type  # None = int8_float16 on CUDA, int8 on CPU
+        self.beam_size = beam_size  # 1 = greedy decoding, lowest latency
         
         # Audio settings
         self.chunk = 1024
@@ -21,9 +29,15 @@ class WhisperEngine:
         self.rate = 16000
         
         # Processing queues and buffers
-        self.audio_queue = queue.Queue()
+        self.audio_queue = SPSCQueue()  # VAD thread -> transcription thread
         self.smart_audio = []
-        self.audio_buffer = deque(maxlen=80)  # Store ~2.5 seconds of audio
+        # Ring buffer of the latest 80 chunks of raw int16 samples (as recorded); the
+        # oldest are overwritten when full
+        self.ring_size = 80 * self.chunk
+        self._ring = np.empty(self.ring_size, dtype=np.int16)
+        self._ring_write = 0
+        self._ring_count = 0
+        self._ring_lock = threading.Lock()
         
         # PyAudio elements
         self.audio_stream = None
@@ -32,16 +46,23 @@ class WhisperEngine:
         # Thread control
         self.recording = False
         self.transcription_thread = None
-        self.recording_thread = None
         self.vad_thread = None
         
         # VAD settings
         self.vad_threshold = vad_threshold
         self.vad_model = None
+        self._vad_device = "cpu"
+        self._vad_buf = None  # Preallocated (windows, 512) input on the VAD device
+        self._vad_probs = None  # Per-window probabilities, kept on the device until counted
         self.silence_counter = 0
         self.speaking = False
         self.interrupt_event = asyncio.Event()
-        self.current_audio_chunk = []
+        # Speech segment being collected, appended in place; cut off after 60 seconds
+        self.speech_cut_off_samples = 60 * self.rate
+        # One ring's worth of headroom: a pass never overflows before the cut-off check.
+        # Kept as int16 and converted once when the segment is queued
+        self._seg_buf = np.empty(self.speech_cut_off_samples + self.ring_size, dtype=np.int16)
+        self._seg_len = 0
         
         # Performance tracking
         self.processing_times = deque(maxlen=10)
@@ -55,32 +76,47 @@ class WhisperEngine:
             import torch
             device = "cuda" if torch.cuda.is_available() else "cpu"
             # device = "cpu"
-            compute_type = "float16" if torch.cuda.is_available() else "int8"
-            # compute_type = "int8"
+            # int8 weights with float16 activations: half the weight bandwidth of float16
+            compute_type = "int8_float16" if torch.cuda.is_available() else "int8"
         except ImportError:
             device = "cpu"
             compute_type = "int8"
+        if self.compute_type:
+            compute_type = self.compute_type
             
         self.model = WhisperModel(
             self.model_path, 
             device=device, 
-            compute_type=compute_type
+            compute_type=compute_type,
+            cpu_threads=max(1, (os.cpu_count() or 2) // 2),  # Leave cores for VAD, TTS and the LLM
+            num_workers=1,
         )
+        self.pipeline = BatchedInferencePipeline(model=self.model)
         
         # Initialize VAD model
         print("Initializing VAD model...")
         import torch
+        torch.backends.cudnn.benchmark = True  # VAD input shapes are fixed, so tuned kernels stay valid
         self.vad_model, utils = torch.hub.load("snakers4/silero-vad", "silero_vad", force_reload=False)
         self.vad_model.eval()
+        # Same device as Whisper, with input buffers sized for a full ring of audio
+        self._vad_device = device
+        self.vad_model.to(device)
+        self._vad_buf = torch.empty((self.ring_size // 512, 512), dtype=torch.float32, device=device)
+        self._vad_probs = torch.empty(self.ring_size // 512, dtype=torch.float32, device=device)
+        self.vad_model = self._specialize_vad(self.vad_model)
         
-        # Initialize PyAudio
+        # Initialize PyAudio; PortAudio hands each chunk to _pa_callback, so no
+        # Python thread has to sit in a blocking read loop
         self.p = pyaudio.PyAudio()
         self.audio_stream = self.p.open(
             format=self.format, 
             channels=self.channels, 
             rate=self.rate,
             input=True, 
-            frames_per_buffer=self.chunk
+            frames_per_buffer=self.chunk,
+            stream_callback=self._pa_callback,
+            start=False,
         )
 
         self.start_stream() 
@@ -89,6 +125,43 @@ class WhisperEngine:
 
     
     
+    def _specialize_vad(self, model):
+        """Specialize the VAD forward for its one fixed (1, 512) @ 16kHz call shape.
+
+        The hub model is already TorchScript, so it is frozen and fused with
+        optimize_for_inference; a plain nn.Module goes through torch.compile instead.
+        Three warm-up calls trigger the compilation before audio starts arriving.
+        Falls back to the unmodified model if any step fails.
+        """
+        sample = torch.zeros((1, 512), dtype=torch.float32, device=self._vad_device)
+        try:
+            if isinstance(model, torch.jit.ScriptModule):
+                # Freezing keeps only forward unless told otherwise; reset_states is
+                # needed to clear the state the warm-up calls advance
+                keep = ["reset_states"] if hasattr(model, "reset_states") else []
+                specialized = torch.jit.optimize_for_inference(
+                    torch.jit.freeze(model, preserved_attrs=keep), other_methods=keep
+                )
+            elif hasattr(torch, "compile"):
+                specialized = torch.compile(model, mode="reduce-overhead", fullgraph=False)
+            else:
+                specialized = torch.jit.trace(model, (sample, torch.tensor(self.rate)))
+            with torch.inference_mode():
+                for _ in range(3):
+                    specialized(sample, self.rate)
+            if hasattr(model, "reset_states"):
+                # Warm-up calls advanced the recurrent state; a specialized model that
+                # lost the method can't be reset, so fall back to the eager one
+                if not hasattr(specialized, "reset_states"):
+                    raise RuntimeError("specialized model has no reset_states")
+                specialized.reset_states()
+            return specialized
+        except Exception as e:
+            print(f"VAD specialization failed, using the eager model: {e}")
+            if hasattr(model, "reset_states"):
+                model.reset_states()
+            return model
+
     def start_stream(self):
         """Start all processing threads"""
         if not self.model:
@@ -105,29 +178,49 @@ class WhisperEngine:
             self.vad_thread = threading.Thread(target=self._vad_processing, daemon=True)
             self.vad_thread.start()
             
-        # Start recording thread
-        if self.recording_thread is None or not self.recording_thread.is_alive():
-            self.recording_thread = threading.Thread(target=self._start_recording, daemon=True)
-            self.recording_thread.start()
+        # Start recording
+        if not self.audio_stream.is_active():
+            self.recording = True
+            self.audio_stream.start_stream()
+            print("Recording started")
             return True
         else:
             print("Transcription stream already running.")
             return False
     
-    def _start_recording(self):
-        """Record audio from microphone and add to processing queue"""
-        self.recording = True
-        print("Recording started")
-        
-        while self.recording:
-            try:
-                data = self.audio_stream.read(self.chunk, exception_on_overflow=False)
-                audio_array = self._bytes_to_float_array(data)
-                self.audio_buffer.append(audio_array)
-                # print(len(self.audio_buffer))
-            except Exception as e:
-                print(f"Error in recording: {e}")
-                time.sleep(0.1)  # Prevent tight loop on error
+    def _pa_callback(self, in_data, frame_count, time_info, status):
+        """PyAudio callback: add a recorded chunk to the ring buffer as raw int16"""
+        try:
+            self._ring_push(np.frombuffer(in_data, dtype=np.int16))
+        except Exception as e:
+            print(f"Error in recording: {e}")
+        return (None, pyaudio.paContinue)
+
+    def _ring_push(self, samples):
+        """Append samples to the ring buffer, wrapping around and dropping the oldest when full."""
+        n = len(samples)
+        with self._ring_lock:
+            w = self._ring_write
+            first = min(n, self.ring_size - w)
+            self._ring[w:w + first] = samples[:first]
+            self._ring[:n - first] = samples[first:]
+            self._ring_write = (w + n) % self.ring_size
+            self._ring_count = min(self._ring_count + n, self.ring_size)
+
+    def _ring_pop_all(self):
+        """Take every buffered sample, oldest first, as a copy made under the lock.
+
+        The recorder keeps writing into the ring afterwards, so a view could be
+        overwritten while the caller still reads it.
+        """
+        with self._ring_lock:
+            count = self._ring_count
+            start = (self._ring_write - count) % self.ring_size
+            self._ring_count = 0
+            end = start + count
+            if end <= self.ring_size:
+                return self._ring[start:end].copy()
+            return np.concatenate((self._ring[start:], self._ring[:end - self.ring_size]))
 
     def _vad_processing(self):
         """Process audio with Voice Activity Detection"""
@@ -137,97 +230,94 @@ class WhisperEngine:
         window_size = 512  # Set window size for VAD
         num_chunk = 2
         percent_of_speech = (self.chunk * num_chunk // window_size) // 20 #0.2 litrally mean if >= 0
-        self.speech_cut_off = (self.rate / (self.chunk * num_chunk)) * 60 // 1  # 20 seconds  
-        # print(self.speech_cut_off // 1)
-        while self.recording:
-            if len(self.audio_buffer) < num_chunk:  # Wait for any audio data
-                time.sleep(0.05)
-                continue
+        # Every torch call on this thread is inference; enter the mode once, not per pass
+        with torch.inference_mode():
+            while self.recording:
+                if self._ring_count < num_chunk * self.chunk:  # Wait for any audio data
+                    time.sleep(0.05)
+                    continue
                 
-            # Get the latest audio data
-            audio_data = np.concatenate(list(self.audio_buffer))
-            self.audio_buffer.clear()
+                # Get the latest audio data
+                audio_data = self._ring_pop_all()
 
-            # Process audio in appropriate chunks for VAD
-            speech_detected = False
-            speech_counter = 0
+                # Process audio in appropriate chunks for VAD
+                speech_detected = self._detect_speech(audio_data, window_size, percent_of_speech)
 
-            for i in range(0, len(audio_data), window_size):
-                chunk = audio_data[i:i+window_size]
-                if len(chunk) > 0:  # Only process complete chunks
-                    speech_prob = self._get_speech_probability(chunk)
-                    if speech_prob > self.vad_threshold:
-                        speech_counter += 1
-                        if speech_counter > percent_of_speech:
-                            # print("Speech detected")
-                            # print(len(self.current_audio_chunk))
-                            speech_detected = True
-                            break
-            
-            if speech_detected:
-                self.interrupt_event.set()
-                # Voice detected
-                if not self.speaking:
-                    print("Speech detected, starting transcription")
-                    self.speaking = True
-                    self.current_audio_chunk = []
+                if speech_detected:
+                    self.interrupt_event.set()
+                    # Voice detected
+                    if not self.speaking:
+                        print("Speech detected, starting transcription")
+                        self.speaking = True
+                        self._seg_len = 0
                 
-                # Add audio to current chunk
-                self.current_audio_chunk.append(audio_data)
-                self.silence_counter = 0
+                    # Add audio to the current segment
+                    self._seg_buf[self._seg_len:self._seg_len + len(audio_data)] = audio_data
+                    self._seg_len += len(audio_data)
+                    self.silence_counter = 0
 
-                if len(self.current_audio_chunk) >= self.speech_cut_off:
-                    full_audio = np.concatenate(self.current_audio_chunk)
-                    self.audio_queue.put(full_audio)
-                    # print(f"Speech segment queued for processing ({len(full_audio)/self.rate:.1f}s)")
-                    self.current_audio_chunk = []
+                    if self._seg_len >= self.speech_cut_off_samples:
+                        self._flush_segment()
 
-            else:
-                # No voice detected
-                if self.speaking:
-                    self.silence_counter += 1
+                else:
+                    # No voice detected
+                    if self.speaking:
+                        self.silence_counter += 1
                     
-                    # If silence for more than ~0.128*3 second, process the chunk
-                    if self.silence_counter >= 3:
-                        self.interrupt_event.clear()
-                        if self.current_audio_chunk:
-                            full_audio = np.concatenate(self.current_audio_chunk)
-                            self.audio_queue.put(full_audio)
-                            # print(f"Speech segment queued for processing ({len(full_audio)/self.rate:.1f}s)")
+                        # If silence for more than ~0.128*3 second, process the chunk
+                        if self.silence_counter >= 3:
+                            self.interrupt_event.clear()
+                            self._flush_segment()
                         
-                        self.speaking = False
-                        self.current_audio_chunk = []
-                        self.silence_counter = 0
+                            self.speaking = False
+                            self.silence_counter = 0
             
-            # Clear buffer to prevent reprocessing the same audio
-            # time.sleep(0.1)  # Prevent tight CPU usage
+                # Clear buffer to prevent reprocessing the same audio
+                # time.sleep(0.1)  # Prevent tight CPU usage
     
 
-    def _get_speech_probability(self, audio_data):
-        """Calculate probability of speech in audio segment"""
+    def _flush_segment(self):
+        """Queue the collected speech segment for transcription and start a new one"""
+        if self._seg_len:
+            # The float conversion is also the copy out of the reused segment buffer
+            self.audio_queue.put(self._int16_to_float(self._seg_buf[:self._seg_len]))
+            # print(f"Speech segment queued for processing ({self._seg_len/self.rate:.1f}s)")
+        self._seg_len = 0
+
+    def _detect_speech(self, audio_data, window_size, percent_of_speech):
+        """Return True once more than percent_of_speech VAD windows are speech.
+
+        Silero VAD keeps recurrent state between calls, so windows have to be scored
+        in order rather than as one (N, 512) batch. The audio is still converted to a
+        tensor once and sliced into row views. Runs under _vad_processing's inference_mode.
+        """
         if self.vad_model is None:
-            return 0.5  # Default if VAD not initialized
-        
+            return False
+
+        n_windows = min(len(audio_data) // window_size, len(self._vad_buf))
+        on_cpu = self._vad_device == "cpu"
         try:
-            # Silero VAD expects chunks of 512 samples
-            # Make sure audio_data is a numpy array
-            if not isinstance(audio_data, np.ndarray):
-                audio_data = np.array(audio_data)
-                
-            # Take only the first 512 samples or pad if needed
-            if len(audio_data) >= 512:
-                audio_sample = audio_data[:512]
-            else:
-                audio_sample = np.pad(audio_data, (0, 512 - len(audio_data)))
-            
-            # Convert to tensor correctly - use unsqueeze to add batch dimension
-            with torch.no_grad():
-                vad_tensor = torch.from_numpy(audio_sample).unsqueeze(0)
-                speech_prob = self.vad_model(vad_tensor, self.rate).item()
-            return speech_prob
+            # One host-to-device copy into the preallocated buffer; copy_ casts the
+            # int16 samples and the in-place scale brings them to [-1, 1)
+            windows = self._vad_buf[:n_windows]
+            windows.copy_(torch.from_numpy(audio_data[:n_windows * window_size]).view(n_windows, window_size))
+            windows.mul_(float(self._INV32768))
+            speech_counter = 0
+            for i in range(n_windows):
+                speech_prob = self.vad_model(windows[i:i + 1], self.rate)
+                if not on_cpu:
+                    # Reading each probability back would sync the GPU once per window
+                    self._vad_probs[i] = speech_prob.reshape(())
+                elif speech_prob.item() > self.vad_threshold:
+                    speech_counter += 1
+                    if speech_counter > percent_of_speech:
+                        return True
+            if not on_cpu:
+                return int((self._vad_probs[:n_windows] > self.vad_threshold).sum()) > percent_of_speech
         except Exception as e:
             print(f"VAD error: {e}")
-            return 0.0
+        return False
+
         
     def _process_audio(self):
         """Process audio segments with Whisper for transcription"""
@@ -251,14 +341,23 @@ class WhisperEngine:
                 # Measure processing time
                 start_time = time.time()
                 
-                # Process with Whisper
-                segments, info = self.model.transcribe(
-                    audio_data, 
-                    language="en",
-                    beam_size=3,
-                    # vad_filter=True,  # Use Whisper's built-in VAD as additional filter
-                    # vad_parameters={"threshold": 0.5}
-                )
+                # Process with Whisper; segments longer than one 30s window
+                # decode their windows as a batch
+                if len(audio_data) > 30 * self.rate:
+                    segments, info = self.pipeline.transcribe(
+                        audio_data,
+                        language="en",
+                        beam_size=self.beam_size,
+                        batch_size=8,
+                    )
+                else:
+                    segments, info = self.model.transcribe(
+                        audio_data, 
+                        language="en",
+                        beam_size=self.beam_size,
+                        # vad_filter=True,  # Use Whisper's built-in VAD as additional filter
+                        # vad_parameters={"threshold": 0.5}
+                    )
                 
                 # Get transcription text
                 transcript = ""
@@ -289,9 +388,9 @@ class WhisperEngine:
         print("Stopping transcription stream...")
         self.recording = False  # Stop recording
         
-        # Safely stop recording thread
-        if self.recording_thread and self.recording_thread.is_alive():
-            self.recording_thread.join(timeout=2.0)
+        # Stop callbacks before tearing anything else down
+        if self.audio_stream and self.audio_stream.is_active():
+            self.audio_stream.stop_stream()
             
         # Signal transcription thread to stop and wait
         self.audio_queue.put(None)
@@ -306,11 +405,16 @@ class WhisperEngine:
             
         print("Transcription stream stopped")
 
+    def _int16_to_float(self, samples):
+        """Convert int16 samples to a new normalized float32 array in one pass"""
+        out = np.empty(samples.shape, dtype=np.float32)
+        np.multiply(samples, self._INV32768, out=out)
+        return out
+
     def _bytes_to_float_array(self, audio_bytes):
         """Convert raw audio bytes to normalized float array"""
         try:
-            raw_data = np.frombuffer(buffer=audio_bytes, dtype=np.int16)
-            return raw_data.astype(np.float32) / 32768.0
+            return self._int16_to_float(np.frombuffer(buffer=audio_bytes, dtype=np.int16))
         except Exception as e:
             print(f"Error converting audio: {e}")
             return np.zeros(1, dtype=np.float32)
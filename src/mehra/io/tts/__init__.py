@@ -1,7 +1,20 @@
 from .tts_interface import TTSEngineInterface
-from .pyttsx3_engine import PyTTSX3Engine
-from .kokoro.interface import KokoroEngineInterface
-from .kokoro_engine import KokoroEngine
+
+# The engines pull in pyttsx3, torch and kokoro, so they are imported on first use
+# rather than whenever something imports the interface from this package
+_LAZY_ENGINES = {
+    "PyTTSX3Engine": ".pyttsx3_engine",
+    "KokoroEngineInterface": ".kokoro.interface",
+    "KokoroEngine": ".kokoro_engine",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ENGINES:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_ENGINES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Factory function to get the appropriate TTS engine
 def get_tts_engine(engine_type="pyttsx3", **kwargs):
@@ -16,9 +29,11 @@ def get_tts_engine(engine_type="pyttsx3", **kwargs):
         TTSEngineInterface: An initialized TTS engine
     """
     if engine_type.lower() == "pyttsx3":
+        from .pyttsx3_engine import PyTTSX3Engine
         return PyTTSX3Engine(voice="female", rate=140, **kwargs).initialize()
     
     elif engine_type.lower() == "kokoro":
+        from .kokoro_engine import KokoroEngine
         return KokoroEngine(**kwargs).initialize()
     else:
         raise ValueError(f"Unknown TTS engine type: {engine_type}")
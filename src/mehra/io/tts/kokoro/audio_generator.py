@@ -1,5 +1,3 @@
-import os
-import time
 import soundfile as sf
 import queue
 
@@ -18,20 +16,48 @@ def generate_audio_for_text(engine, text, sentence_index):
         
         # Submit each segment for processing
         segment_count = 0
+        sound_file = None
         for i, (gs, ps, audio) in enumerate(generator):
             if engine.stop_event.is_set():
                 break
             
-            # Optional: Save the audio to file
-            output_file = os.path.join(engine.audio_output_dir, f"segment_{time.time()}_{i}.wav")
-            sf.write(output_file, audio, 24000)
+            # Optional: Append the audio to this utterance's file on the I/O thread
+            if engine.config.save_segments:
+                if sound_file is None:
+                    sound_file = engine.io_pool.submit(_open_utterance_file, engine)
+                engine.io_pool.submit(_write_segment, sound_file, audio)
             
             # Queue the audio segment for playback
             audio_queue.put((audio, gs, sentence_index))
             segment_count += 1
+
+        if sound_file is not None:
+            engine.io_pool.submit(_close_utterance_file, sound_file)
             
         return segment_count, text
         
     except Exception as e:
         print(f"Error generating audio: {e}")
         return 0, text
+    finally:
+        # End-of-batch marker: lets the player move on to the next sentence_index
+        audio_queue.put((None, None, sentence_index))
+
+def _open_utterance_file(engine):
+    """Open a single WAV file that collects every segment of one utterance."""
+    output_file = f"{engine.utterance_path_prefix}{next(engine.utterance_counter)}.wav"
+    return sf.SoundFile(output_file, mode='w', samplerate=24000, channels=1)
+
+def _write_segment(sound_file, audio):
+    """Append one segment to the utterance file (runs on the I/O thread)."""
+    try:
+        sound_file.result().write(audio)
+    except Exception as e:
+        print(f"Error saving audio segment: {e}")
+
+def _close_utterance_file(sound_file):
+    """Close the utterance file once all its segments are written."""
+    try:
+        sound_file.result().close()
+    except Exception as e:
+        print(f"Error closing audio file: {e}")
@@ -1,44 +1,43 @@
-import sounddevice as sd
-import threading
+import heapq
+import itertools
+import numpy as np
 from . import audio_generator
 import queue
 
-ordered_audio_segments = {}
-audio_ordering_lock = threading.Lock()
-next_segment_to_play = 1
-
 def play_audio(engine):
-    """Worker thread that plays audio segments from the audio queue."""
+    """Worker thread that plays audio segments from the audio queue in sentence order.
+
+    Segments can only be reordered by this thread, so they wait in a plain local
+    min-heap keyed by (sentence_index, arrival order); no lock is needed. A segment
+    with audio None marks the end of a batch and advances playback to the next one.
+    """
     print("Player worker thread started")
     
-    # Track the next segment that should be played
-    global next_segment_to_play
+    pending = []
+    arrival = itertools.count()
     next_segment_to_play = 1
 
     while not engine.stop_event.is_set():
         try:
-            # Get the next audio segment to play
-            audio, text, sentence_index = audio_generator.audio_queue.get()
+            # Get the next audio segment to play, waking periodically so the worker notices stop_event
+            audio, text, sentence_index = audio_generator.audio_queue.get(timeout=0.05)
+            heapq.heappush(pending, (sentence_index, next(arrival), audio, text))
             
-            # Check for termination signal
-            if audio is None:
-                audio_generator.audio_queue.task_done()
-                break
-            
-            with audio_ordering_lock:
-                # Store this segment in our ordered dictionary
-                ordered_audio_segments[sentence_index] = (audio, text)
-                
-                # Process as many segments as we can in order
-                _process_ordered_segments(engine)
+            # Play as many segments as we can in order
+            while pending and pending[0][0] == next_segment_to_play:
+                _, _, audio, text = heapq.heappop(pending)
+                if audio is None:
+                    next_segment_to_play += 1
+                    continue
+
+                display_text = text[:30] + "..." if len(text) > 30 else text
+                print(f"Playing segment {next_segment_to_play}: '{display_text}'")
+                _play_audio(engine, audio, text)
             
             # Mark this audio segment as done
             audio_generator.audio_queue.task_done()
             
         except queue.Empty:
-            # No audio to play, check if we have segments ready that were previously queued
-            with audio_ordering_lock:
-                _process_ordered_segments(engine)
             continue
         except Exception as e:
             print(f"Error in player worker: {e}")
@@ -48,32 +47,14 @@ def play_audio(engine):
             except:
                 pass
 
-def _process_ordered_segments(engine):
-    """Process segments in order based on sentence_index."""
-    # This method should be called with audio_ordering_lock held
-    global next_segment_to_play
-    while next_segment_to_play in ordered_audio_segments:
-        # Get the next segment to play
-        audio, text = ordered_audio_segments.pop(next_segment_to_play)
-        
-        display_text = text[:30] + "..." if len(text) > 30 else text
-        print(f"Playing segment {next_segment_to_play}: '{display_text}'")
-        
-        # Play the audio
-        _play_audio(engine, audio, text)
-        
-        # Move to the next segment
-        next_segment_to_play += 1
-
-def _play_audio(engine, audio_data, text, sample_rate=24000):
+def _play_audio(engine, audio_data, text):
     """Play audio data and update subtitle."""
     try:
         # Update subtitle with current segment being spoken
         _update_subtitle(engine, text)
         
-        # Play the audio synchronously
-        sd.play(audio_data, sample_rate)
-        sd.wait()  # Wait until playback is finished
+        # Play the audio synchronously; write() blocks until the stream has taken it all
+        engine.output_stream.write(np.ascontiguousarray(audio_data, dtype=np.float32))
     except Exception as e:
         print(f"Error playing audio: {e}")
     finally:
@@ -83,7 +64,14 @@ def _play_audio(engine, audio_data, text, sample_rate=24000):
 def _update_subtitle(engine, text):
     """Update subtitle file with current text."""
     try:
-        with open(engine.config.subtitle_path, 'w', encoding="utf-8") as file:
-            file.write(text)
+        # The player and interface threads both write subtitles
+        with engine.subtitle_lock:
+            if engine.subtitle_file is None:
+                engine.subtitle_file = open(engine.config.subtitle_path, 'w+b', buffering=0)
+            file = engine.subtitle_file
+            # Overwrite, then cut off what's left of longer old text; readers never see it empty
+            file.seek(0)
+            file.write(text.encode("utf-8"))
+            file.truncate()
     except Exception as e:
         print(f"Error updating subtitle file: {e}")
@@ -5,11 +5,17 @@ class KokoroConfig:
             lang_code='a', 
             rate=1.0, 
             subtitle_path="subtitles.txt", 
-            batch_delay=0.2
+            batch_delay=0.2,
+            max_batch_chars=400,
+            adaptive_batch_delay=True,
+            save_segments=False
         ):
         
         self.voice = voice
         self.lang_code = lang_code
         self.rate = rate
         self.subtitle_path = subtitle_path
-        self.batch_delay = batch_delay
+        self.batch_delay = batch_delay  # Longest wait for more text after a batch's first item
+        self.max_batch_chars = max_batch_chars  # A batch this long is synthesized without waiting out batch_delay
+        self.adaptive_batch_delay = adaptive_batch_delay  # Retune batch_delay from measured synthesis time
+        self.save_segments = save_segments
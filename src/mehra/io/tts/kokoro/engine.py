@@ -5,6 +5,7 @@ import time
 import soundfile as sf
 import sounddevice as sd
 import concurrent.futures
+import itertools
 import os
 
 from . import text_processor, audio_generator, audio_player, config
@@ -17,10 +18,21 @@ class KokoroEngine:
         self.config = config.KokoroConfig(**kwargs)
         self.stop_event = threading.Event()
         self.pipeline = None
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # One pipeline per language, all sharing the first pipeline's model weights
+        self.pipeline_cache = {}
+        self.pipeline_lock = threading.Lock()
         self.processor_thread = None
         self.player_thread = None
+        self.output_stream = None  # Opened once; every segment is written to it
+        # Subtitle file kept open and rewritten in place (see audio_player._update_subtitle)
+        self.subtitle_file = None
+        self.subtitle_lock = threading.Lock()
         self.audio_output_dir = "audio_output"
+
+        # Dedicated I/O worker so saving segments never blocks synthesis
+        self.io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1) if self.config.save_segments else None
+        self.utterance_counter = itertools.count()
+        self.utterance_path_prefix = os.path.join(self.audio_output_dir, "utterance_")
         
         # Ensure audio output directory exists
         os.makedirs(self.audio_output_dir, exist_ok=True)
@@ -29,8 +41,12 @@ class KokoroEngine:
         """Initialize the Kokoro TTS engine and start worker threads."""
         try:
             # Initialize Kokoro pipeline with the specified language code
-            self.pipeline = KPipeline(lang_code=self.config.lang_code, device='cuda')
+            self.pipeline = self.get_pipeline(self.config.lang_code)
             print(f"Kokoro TTS initialized with language code: {self.config.lang_code}")
+
+            # Keep one output stream open instead of opening a device per segment
+            self.output_stream = sd.OutputStream(samplerate=24000, channels=1, dtype='float32', blocksize=1024)
+            self.output_stream.start()
             
             # Start the processor thread (collects text and generates audio)
             self.processor_thread = threading.Thread(
@@ -53,22 +69,39 @@ class KokoroEngine:
             print(f"Error initializing Kokoro TTS: {e}")
             raise
     
+    def get_pipeline(self, lang_code):
+        """Return the pipeline for lang_code, creating it around the shared model if needed."""
+        with self.pipeline_lock:
+            pipeline = self.pipeline_cache.get(lang_code)
+            if pipeline is None:
+                model = next(iter(self.pipeline_cache.values())).model if self.pipeline_cache else True
+                pipeline = KPipeline(lang_code=lang_code, model=model, device='cuda')
+                self.pipeline_cache[lang_code] = pipeline
+            return pipeline
+
     def shutdown(self):
         """Stop all worker threads and clean up resources."""
+        # Workers poll with a short timeout and exit once they see the stop event
         self.stop_event.set()
         
-        # Send termination signals to both queues
-        text_processor.text_queue.put(None)
-        audio_generator.audio_queue.put((None, None, None))
-        
         # Wait for threads to terminate
         if self.processor_thread and self.processor_thread.is_alive():
             self.processor_thread.join(timeout=2)
         
         if self.player_thread and self.player_thread.is_alive():
             self.player_thread.join(timeout=2)
+
+        if self.output_stream:
+            self.output_stream.close()
+            self.output_stream = None
+
+        with self.subtitle_lock:
+            if self.subtitle_file:
+                self.subtitle_file.close()
+                self.subtitle_file = None
             
-        # Shutdown thread pool
-        self.thread_pool.shutdown(wait=False)
+        # Let pending segment writes finish
+        if self.io_pool:
+            self.io_pool.shutdown(wait=True)
         
         print("Kokoro TTS engine shut down")
@@ -1,7 +1,6 @@
 from .engine import KokoroEngine
 from . import text_processor, audio_generator, audio_player, config
 from ..tts_interface import TTSEngineInterface
-from kokoro import KPipeline
 
 class KokoroEngineInterface(TTSEngineInterface):
     def __init__(self, **kwargs):
@@ -26,11 +25,10 @@ class KokoroEngineInterface(TTSEngineInterface):
     
     def set_language(self, lang_code):
         """Change the language used for synthesis."""
-        # This requires reinitializing the pipeline
         self.engine.config.lang_code = lang_code
         try:
-            # Create a new pipeline with the updated language
-            self.engine.pipeline = KPipeline(lang_code=lang_code)
+            # Reuse the cached pipeline for this language, building it on first use
+            self.engine.pipeline = self.engine.get_pipeline(lang_code)
             print(f"Language changed to: {lang_code}")
         except Exception as e:
             print(f"Error changing language: {e}")
@@ -41,6 +39,12 @@ class KokoroEngineInterface(TTSEngineInterface):
         print(f"Speech rate changed to: {self.engine.config.rate}")
         
     def set_batch_delay(self, delay):
-        """Set the delay time for batching queue items (in seconds)."""
+        """Set the delay time for batching queue items (in seconds); this turns off adaptive tuning."""
+        self.engine.config.adaptive_batch_delay = False
         self.engine.config.batch_delay = float(delay)
         print(f"Batch delay set to: {self.engine.config.batch_delay} seconds")
+
+    def set_max_batch_chars(self, max_chars):
+        """Set the batch length (in characters) that is synthesized without waiting out the batch delay."""
+        self.engine.config.max_batch_chars = int(max_chars)
+        print(f"Max batch length set to: {self.engine.config.max_batch_chars} characters")
@@ -1,21 +1,28 @@
-import queue
 import time
 from . import audio_generator
+from ..spsc_queue import BatchQueue
 
-text_queue = queue.Queue()
+text_queue = BatchQueue()
+
+# Adaptive batch delay: a fraction of the smoothed synthesis time, within these bounds
+MIN_BATCH_DELAY = 0.05
+MAX_BATCH_DELAY = 0.5
+DELAY_PER_LATENCY = 0.25
+LATENCY_EMA_ALPHA = 0.3
 
 def process_text(engine):
     """Worker thread that processes text queue and generates audio segments."""
     print("Processor worker thread started")
     
     sentence_index = 0
+    ema_latency = None  # Smoothed seconds per generate_audio_for_text call
 
     while not engine.stop_event.is_set():
         try:
             # Batch multiple queue items into a single text
             combined_text = _batch_queue_items(engine)
             
-            # If no text was collected or exit signal received
+            # Nothing arrived before the poll timeout; loop to re-check the stop event
             if combined_text is None:
                 continue
                 
@@ -24,8 +31,20 @@ def process_text(engine):
             sentences_number = len(combined_text.split(". "))
             sentence_index += 1  # counting each batch not each sentence
 
-            # Process text in the thread pool to allow for parallel processing
-            future = engine.thread_pool.submit(audio_generator.generate_audio_for_text, engine, combined_text, sentence_index)
+            # Generate inline: this is already a dedicated thread, and synthesis on one GPU is serial anyway
+            start_time = time.monotonic()
+            audio_generator.generate_audio_for_text(engine, combined_text, sentence_index)
+            latency = time.monotonic() - start_time
+
+            # Slow calls widen the next batch window so more text shares one call;
+            # fast ones narrow it so the first audio isn't held back
+            if engine.config.adaptive_batch_delay:
+                ema_latency = latency if ema_latency is None else (
+                    LATENCY_EMA_ALPHA * latency + (1 - LATENCY_EMA_ALPHA) * ema_latency
+                )
+                engine.config.batch_delay = min(
+                    MAX_BATCH_DELAY, max(MIN_BATCH_DELAY, DELAY_PER_LATENCY * ema_latency)
+                )
             
             # Mark all items in this batch as done
             for _ in range(sentences_number):
@@ -41,32 +60,14 @@ def process_text(engine):
 
 def _batch_queue_items(engine):
     """Batch multiple queue items into a single text with a short delay."""
-    combined_text = []
-    
-    # Get the first item
-    try:
-        item = text_queue.get()
-        if item is None:  # Exit signal
-            return None
-        combined_text.append(item)
-    except queue.Empty:
-        return None
-        
-    # Wait for a short time to see if more items arrive
-    batch_end_time = time.time() + engine.config.batch_delay
-    
-    # Keep collecting items until the batch delay expires or queue is empty
-    while time.time() < batch_end_time:
-        try:
-            item = text_queue.get_nowait()
-            if item is None:  # Exit signal
-                # Mark all collected items as done and return None
-                for _ in range(len(combined_text)):
-                    text_queue.task_done()
-                return None
-            combined_text.append(item)
-        except queue.Empty:
-            break
+    # Wait for the first item (waking periodically so the worker notices stop_event),
+    # then keep filling the batch until batch_delay passes or max_batch_chars is reached,
+    # so bursts are synthesized in fewer, larger pipeline calls
+    combined_text = text_queue.drain(
+        timeout=0.05,
+        max_delay=engine.config.batch_delay,
+        max_size=engine.config.max_batch_chars,
+    )
             
     # Combine all collected text items with a period between them
     return ". ".join(combined_text) if combined_text else None
@@ -1,14 +1,22 @@
 import os
+import contextlib
+import heapq
 import threading
 import queue
 import torch
 import time
+import numpy as np
 import soundfile as sf
 import sounddevice as sd
 import concurrent.futures
+import collections
+import itertools
 import logging
+import re
+from scipy.signal import firwin, resample_poly
 from kokoro import KPipeline, KModel
 from .tts_interface import TTSEngineInterface
+from .spsc_queue import SPSCQueue
 
 import warnings
 
@@ -23,35 +31,89 @@ warnings.filterwarnings("ignore", category=FutureWarning, module="torch.nn.utils
 
 logging.basicConfig(level=logging.INFO)
 
+# Playback speed-up as a 20/23 (= 100/115) polyphase resample. The low-pass FIR matches
+# resample_poly's default design but in float32, so the output stays float32 with no extra cast pass.
+SPEEDUP_UP, SPEEDUP_DOWN = 20, 23
+SPEEDUP_FIR = firwin(2 * 10 * SPEEDUP_DOWN + 1, 1.0 / SPEEDUP_DOWN, window=('kaiser', 5.0)).astype(np.float32)
+
+# Split batches at line breaks and sentence ends so each sentence is synthesized, and played, on its own.
+# Precompiled: KPipeline hands it straight to re.split, which takes a compiled pattern as is
+SEGMENT_SPLIT_PATTERN = re.compile(r'\n+|(?<=[.!?])\s+')
+
 class KokoroEngine(TTSEngineInterface):
     """TTS engine implementation using Kokoro TTS with parallel processing."""
     
-    def __init__(self, voice="bf_isabella", lang_code='a', rate=1.0, subtitle_path="subtitles.txt", batch_delay=0.1):
+    def __init__(
+            self, 
+            voice="bf_isabella", 
+            lang_code='a', 
+            rate=1.0, 
+            subtitle_path="subtitles.txt", 
+            batch_delay=0.1, 
+            save_segments=False,
+            preload_languages=(),
+            output_device="Voicemeeter AUX Input (VB-Audio Voicemeeter VAIO), Windows DirectSound"
+        ):
         self.voice = voice
         self.lang_code = lang_code
         self.rate = rate
         self.subtitle_path = subtitle_path
-        self.text_queue = queue.Queue()  # Queue for incoming text
-        self.audio_queue = queue.Queue()  # Queue for processed audio segments
+        self.text_queue = SPSCQueue()  # Queue for incoming text
+        self.audio_queue = SPSCQueue()  # Queue for processed audio segments
         self.spoken_text = queue.Queue()  
         self.stop_event = threading.Event()
         self.pipeline = None
+        # One pipeline per language, all sharing the first pipeline's model weights
+        self._pipeline_cache = {}
+        self._pipeline_lock = threading.Lock()
+        self.preload_languages = preload_languages
         self.audio_output_dir = "audio_output"
         self.batch_delay = batch_delay
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+        # Optional disk persistence of generated audio, kept off the synthesis path
+        self.save_segments = save_segments
+        self.io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1) if save_segments else None
+        self._utterance_counter = itertools.count()
+        self._utterance_path_prefix = os.path.join(self.audio_output_dir, "utterance_")
+        # PCM conversion buffers reused across segments (only touched on the single I/O thread)
+        self._pcm_buffer = np.empty(0, dtype=np.int16)
+        self._pcm_scratch = np.empty(0, dtype=np.float32)
         self.processor_thread = None
         self.player_thread = None
+        self.monitor_thread = None
         
         #checking if talking
         self.is_talking = False # tracking if tts is talking to know between iteration of chatting (for resetting batch delay)
+        self.on_done_talking = None  # Optional callback, run (on an engine thread) whenever is_talking drops to False
+        # Texts passed to say() that the processor hasn't finished generating; is_talking
+        # only turns True once generation starts, so is_busy counts these as well
+        self._texts_queued = 0
+        self._texts_queued_lock = threading.Lock()
         self.is_generating = False # NO IDEA WHAT IT DOES NOW
         
-        # Ordered storage for audio segments
-        self.ordered_audio_segments = {}
+        # Min-heap of (batch index, arrival order, audio, text, ready_event), owned by the player thread;
+        # an entry with audio None marks the end of its batch
+        self._pending_heap = []
+        self._arrival_counter = itertools.count()
         self.next_segment_to_play = 1
-        self.audio_ordering_lock = threading.Lock()
 
         self.interrupt_event = None
+
+        # Output device name, resolved to an index once in initialize()
+        self.output_device = output_device
+
+        # Persistent output stream fed from playback_buffer by the PortAudio callback;
+        # the callback reports segment start/finish through playback_events
+        self.stream = None
+        self.playback_buffer = collections.deque()
+        self.playback_events = SPSCQueue()
+        # Only the callback ever pops playback_buffer. Other threads drop what is queued
+        # by bumping the generation; the callback discards segments from older ones.
+        self.playback_generation = 0
+
+        # Non-default CUDA stream for synthesis so device->host copies overlap playback
+        self.gen_stream = None
+        self.autocast_dtype = torch.float32
         
         # Ensure audio output directory exists
         os.makedirs(self.audio_output_dir, exist_ok=True)
@@ -59,9 +121,37 @@ class KokoroEngine(TTSEngineInterface):
     def initialize(self):
         """Initialize the Kokoro TTS engine and start worker threads."""
         try:
+            # cuDNN autotuning pays off on Kokoro's recurring shapes (CPU threads are set by run.py)
+            torch.backends.cudnn.benchmark = os.environ.get("MEHRA_CUDNN_BENCHMARK", "1") != "0"
+
             # Initialize Kokoro pipeline with the specified language code
-            self.pipeline = KPipeline(lang_code=self.lang_code, repo_id='hexgrad/Kokoro-82M', device='cuda')
+            self.pipeline = self._get_pipeline(self.lang_code)
             logging.debug(f"Kokoro TTS initialized with language code: {self.lang_code}")
+
+            # Put the model in eval mode once instead of relying on per-call mode flips
+            if self.pipeline.model is not None:
+                self.pipeline.model.eval()
+
+            for lang_code in self.preload_languages:
+                self._get_pipeline(lang_code)
+
+            self.output_device = self._resolve_output_device(self.output_device)
+            self.stream = sd.OutputStream(
+                samplerate=24000,
+                channels=1,
+                dtype='float32',
+                blocksize=1024,
+                device=self.output_device,
+                callback=self._playback_callback
+            )
+            self.stream.start()
+
+            if torch.cuda.is_available():
+                self.gen_stream = torch.cuda.Stream(device='cuda')
+                # BF16 where the GPU supports it, otherwise FP16
+                self.autocast_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+            self._warmup()
             
             # Start the processor thread (collects text and generates audio)
             self.processor_thread = threading.Thread(
@@ -76,6 +166,13 @@ class KokoroEngine(TTSEngineInterface):
                 daemon=True
             )
             self.player_thread.start()
+
+            # Start the monitor thread (subtitles and spoken text follow actual playback)
+            self.monitor_thread = threading.Thread(
+                target=self._playback_monitor,
+                daemon=True
+            )
+            self.monitor_thread.start()
             
             return self
         except Exception as e:
@@ -84,7 +181,14 @@ class KokoroEngine(TTSEngineInterface):
     
     def say(self, text):
         """Add text to the TTS queue."""
+        with self._texts_queued_lock:
+            self._texts_queued += 1
         self.text_queue.put(text)
+
+    @property
+    def is_busy(self):
+        """True while text is queued, being generated or playing."""
+        return self.is_talking or self._texts_queued > 0
     
     def update_subtitle(self, text):
         """Update subtitle file with current text."""
@@ -106,14 +210,23 @@ class KokoroEngine(TTSEngineInterface):
             self.processor_thread.join(timeout=0.5)  # Give threads 2 seconds to stop
         if hasattr(self, 'player_thread') and self.player_thread.is_alive():
             self.player_thread.join(timeout=0.5)
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=0.5)
+
+        self._done_talking()
 
-        self.is_talking = False         
+        # Drop anything still waiting on the output stream
+        self.playback_generation += 1
+        self.playback_events = SPSCQueue()
+        self.update_subtitle("")
 
         # Reset all queues and states
-        self.text_queue = queue.Queue()  # Fresh queue for text input
-        self.audio_queue = queue.Queue()  # Fresh queue for audio output
+        self.text_queue = SPSCQueue()  # Fresh queue for text input
+        self.audio_queue = SPSCQueue()  # Fresh queue for audio output
+        with self._texts_queued_lock:
+            self._texts_queued = 0
 
-        self.ordered_audio_segments.clear()  # Clear any stored audio segments
+        self._pending_heap.clear()  # Clear any stored audio segments
         self.next_segment_to_play = 1  # Reset playback order
         self.sentence_index = 0  # Reset sentence tracking
         self.batch_delay = 0.1  # Reset any timing delays
@@ -125,27 +238,35 @@ class KokoroEngine(TTSEngineInterface):
         self.processor_thread.start()
         self.player_thread = threading.Thread(target=self._player_worker, daemon=True)
         self.player_thread.start()
+        self.monitor_thread = threading.Thread(target=self._playback_monitor, daemon=True)
+        self.monitor_thread.start()
 
         # Allow new tasks to proceed
         logging.info("TTS interruption complete.")
 
     def shutdown(self):
         """Stop all worker threads and clean up resources."""
+        # Workers poll with a short timeout and exit once they see the stop event
         self.stop_event.set()
         
-        # Send termination signals to both queues
-        self.text_queue.put(None)
-        self.audio_queue.put((None, None, None))
-        
         # Wait for threads to terminate
         if self.processor_thread and self.processor_thread.is_alive():
             self.processor_thread.join(timeout=2)
         
         if self.player_thread and self.player_thread.is_alive():
             self.player_thread.join(timeout=2)
-            
-        # Shutdown thread pool
-        self.thread_pool.shutdown(wait=False)
+
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=2)
+
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+
+
+        # Let pending segment writes finish so saved files are complete
+        if self.io_pool:
+            self.io_pool.shutdown(wait=True)
         
         logging.debug("Kokoro TTS engine shut down")
 
@@ -157,26 +278,34 @@ class KokoroEngine(TTSEngineInterface):
 
         while not self.stop_event.is_set():
             try:
-                # Batch multiple queue items into a single text
-                # print(self.is_talking)
-                combined_text = self._batch_queue_items()
+                # Batch multiple queue items into a single pipeline call
+                items = self._batch_queue_items()
                 
-                # If no text was collected or exit signal received
-                if combined_text is None:
+                # Nothing arrived before the poll timeout; loop to re-check the stop event
+                if items is None:
                     continue
-                    
+
+                # One line per queued item so Kokoro splits them into segments itself
+                combined_text = "\n".join(items)
                 logging.debug(f"Processing batch: '{combined_text[:50]}...' ({len(combined_text)} chars)")
 
-                sentences_number = len(combined_text.split(". "))
                 self.sentence_index += 1  # counting each batch not each sentence
-                print(sentences_number)
-                # Process text in the thread pool to allow for parallel processing
-                future = self.thread_pool.submit(self._generate_audio_for_text, combined_text, self.sentence_index)
+                # Generate inline: this is already a dedicated thread, and synthesis on one GPU is serial anyway
+                segment_count, _ = self._generate_audio_for_text(combined_text, self.sentence_index)
+                with self._texts_queued_lock:
+                    self._texts_queued = max(0, self._texts_queued - len(items))
+
+                # No audio means no playback event will ever report the end of talking,
+                # so report it here if nothing else is still queued or playing
+                if (segment_count == 0 and not self._texts_queued and not self.playback_buffer
+                        and self.audio_queue.empty() and not self._pending_heap):
+                    self._done_talking()
                 
-                self.batch_delay *= 3
+                # Widen the batching window while talking, but keep it bounded
+                self.batch_delay = min(self.batch_delay * 1.5, 0.5)
 
                 # Mark all items in this batch as done
-                for _ in range(sentences_number-1):
+                for _ in range(len(items)):
                     self.text_queue.task_done()
                     
             except Exception as e:
@@ -188,73 +317,205 @@ class KokoroEngine(TTSEngineInterface):
                     pass
     
     def _batch_queue_items(self):
-        """Batch multiple queue items into a single text with a short delay."""
+        """Collect queued text items into one batch; returns the list of items or None."""
         combined_text = []
         
-        # Get the first item
+        # Get the first item, waking periodically so the worker notices stop_event
         try:
-            item = self.text_queue.get()
-            if item is None:  # Exit signal
-                return None
-            combined_text.append(item)
+            combined_text.append(self.text_queue.get(timeout=0.05))
         except queue.Empty:
             return None
             
         # Wait for a short time to see if more items arrive
-        batch_end_time = time.time() + self.batch_delay
-
-        # if self.is_talking:
-        #     # Keep collecting items until the batch delay expires or queue is empty
-        #     while time.time() < batch_end_time:
-        #         try:
-        #             item = self.text_queue.get_nowait()
-        #             if item is None:  # Exit signal
-        #                 # Mark all collected items as done and return None
-        #                 for _ in range(len(combined_text)):
-        #                     self.text_queue.task_done()
-        #                 return None
-        #             combined_text.append(item)
-        #         except queue.Empty:
-        #             continue
-        # #if tts not talking, then no need to get next item, also reset batch delay to prevent exploding time
-        if not self.is_talking:
+        batch_end_time = time.monotonic() + self.batch_delay
+
+        if self.is_talking:
+            # Keep collecting items until the batch delay expires, sleeping until each arrives
+            while True:
+                remaining = batch_end_time - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    combined_text.append(self.text_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        #if tts not talking, then no need to get next item, also reset batch delay to prevent exploding time
+        else:
             self.batch_delay = 0.1
                 
-        # Combine all collected text items with a period between them
-        return " ".join(combined_text) if combined_text else None
+        return combined_text if combined_text else None
     
     def _generate_audio_for_text(self, text, sentence_index):
         """Generate audio segments for text and queue them for playback."""
+        # Bind the queue once: if interrupt() swaps in a fresh one mid-batch, stale segments stay in the old queue
+        audio_queue = self.audio_queue
+        # Locals for everything the per-segment loop touches
+        stop_event = self.stop_event
+        io_pool = self.io_pool if self.save_segments else None
+        stage_audio = self._stage_audio
+        prepare_audio = self._prepare_audio
         try:
-            # Generate speech using Kokoro
-            generator = self.pipeline(
-                text, 
-                voice=self.voice,
-                speed=self.rate, 
-                # split_pattern=r'\n+'
-            )
-            
-            self.is_talking = True
-
-            # Submit each segment for processing
-            segment_count = 0
-            for i, (gs, ps, audio) in enumerate(generator):
-                if self.stop_event.is_set():
-                    break
+            with self._inference_context():
+                # Generate speech using Kokoro
+                generator = self.pipeline(
+                    text, 
+                    voice=self.voice,
+                    speed=self.rate, 
+                    split_pattern=SEGMENT_SPLIT_PATTERN
+                )
                 
-                # Optional: Save the audio to file
-                output_file = os.path.join(self.audio_output_dir, f"segment_{time.time()}_{i}.wav")
-                sf.write(output_file, audio, 24000)
-                
-                # Queue the audio segment for playback
-                self.audio_queue.put((audio, gs, sentence_index))
-                segment_count += 1
+                self.is_talking = True
+
+                # Submit each segment for processing
+                segment_count = 0
+                sound_file = None
+                for i, (gs, ps, audio) in enumerate(generator):
+                    if stop_event.is_set():
+                        break
+
+                    audio, ready_event = stage_audio(audio)
+                    
+                    # Optional: Append the audio to this utterance's file on the I/O thread
+                    if io_pool is not None:
+                        if sound_file is None:
+                            sound_file = io_pool.submit(self._open_utterance_file)
+                        io_pool.submit(self._write_segment, sound_file, audio, ready_event)
+
+                    # Host audio is prepared here; staged CUDA audio once its copy has landed
+                    if ready_event is None:
+                        audio = prepare_audio(audio)
+                    
+                    # Queue the audio segment for playback
+                    audio_queue.put((audio, gs, sentence_index, ready_event))
+                    segment_count += 1
+
+            if sound_file is not None:
+                io_pool.submit(self._close_utterance_file, sound_file)
                 
             return segment_count, text
             
         except Exception as e:
             logging.error(f"Error generating audio: {e}")
             return 0, text
+        finally:
+            # Tell the player this batch is complete so ordering can move past it
+            audio_queue.put((None, None, sentence_index, None))
+
+    def _get_pipeline(self, lang_code):
+        """Return the pipeline for lang_code, creating it around the shared model if needed."""
+        with self._pipeline_lock:
+            pipeline = self._pipeline_cache.get(lang_code)
+            if pipeline is None:
+                # Only the first pipeline loads weights; later languages just add their G2P frontend
+                model = next(iter(self._pipeline_cache.values())).model if self._pipeline_cache else True
+                pipeline = KPipeline(lang_code=lang_code, repo_id='hexgrad/Kokoro-82M', model=model, device='cuda')
+                self._pipeline_cache[lang_code] = pipeline
+            return pipeline
+
+    def _inference_context(self):
+        """Context for running the pipeline: generator CUDA stream, inference mode and autocast."""
+        stack = contextlib.ExitStack()
+        if self.gen_stream:
+            stack.enter_context(torch.cuda.stream(self.gen_stream))
+        stack.enter_context(torch.inference_mode())
+        stack.enter_context(torch.autocast(device_type='cuda', dtype=self.autocast_dtype, enabled=self.gen_stream is not None))
+        return stack
+
+    def _warmup(self):
+        """Run one short utterance so lazy init, voice loading and cuDNN autotuning happen before the first reply."""
+        try:
+            with self._inference_context():
+                for _ in self.pipeline("Hello.", voice=self.voice, speed=self.rate):
+                    pass
+            if self.gen_stream:
+                self.gen_stream.synchronize()
+        except Exception as e:
+            logging.warning(f"Kokoro warmup failed: {e}")
+
+    def _stage_audio(self, audio):
+        """Start an async copy of CUDA audio into pinned float32 host memory.
+
+        Returns the host tensor and an event that is set once the copy has landed,
+        or the (float32) audio and None when it is already on the CPU.
+        """
+        if not torch.is_tensor(audio):
+            return audio, None
+        if not audio.is_cuda:
+            # Autocast may hand back half precision, which numpy/sounddevice can't play
+            return audio.float(), None
+
+        # Pinned blocks are recycled by torch's caching host allocator; copy_ upcasts to float32
+        host_audio = torch.empty(audio.shape, dtype=torch.float32, pin_memory=True)
+        host_audio.copy_(audio, non_blocking=True)
+        ready_event = torch.cuda.Event()
+        ready_event.record(self.gen_stream)
+        return host_audio, ready_event
+
+    def _prepare_audio(self, audio, sample_rate=24000):
+        """Trim the segment edges and apply the playback speed-up in one pass."""
+        if torch.is_tensor(audio):
+            audio = audio.numpy(force=False)  # shares memory with the CPU tensor
+        audio = np.asarray(audio, dtype=np.float32)
+
+        # Cut 0.24s from the start and 0.14s from the end (slicing is a view, no copy)
+        start_to_cut = int(0.24 * sample_rate)
+        end_to_cut = int(0.14 * sample_rate)
+        if len(audio) > start_to_cut + end_to_cut:
+            audio = audio[start_to_cut:len(audio) - end_to_cut]
+
+        # Resample by 100/115 so playing at the native rate is 15% faster,
+        # instead of asking PortAudio to convert from a fractional samplerate
+        return resample_poly(audio, up=SPEEDUP_UP, down=SPEEDUP_DOWN, window=SPEEDUP_FIR)
+
+    def _resolve_output_device(self, device):
+        """Look up the output device index once so playback doesn't match names per call."""
+        if device is None or isinstance(device, int):
+            return device
+        try:
+            return sd.query_devices(device, 'output')['index']
+        except (ValueError, sd.PortAudioError) as e:
+            logging.warning(f"Output device '{device}' not found, using default: {e}")
+            return None
+
+    def _open_utterance_file(self):
+        """Open a single 16-bit WAV file, behind a 64 KB write buffer, for one utterance."""
+        output_file = f"{self._utterance_path_prefix}{next(self._utterance_counter)}.wav"
+        raw_file = open(output_file, 'wb', buffering=65536)
+        wav_file = sf.SoundFile(raw_file, mode='w', samplerate=24000, channels=1, format='WAV', subtype='PCM_16')
+        return wav_file, raw_file
+
+    def _to_pcm16(self, audio):
+        """Convert float audio to int16 PCM in buffers reused across segments."""
+        audio = np.asarray(audio, dtype=np.float32)
+        if self._pcm_buffer.size < audio.size:
+            self._pcm_buffer = np.empty(audio.size, dtype=np.int16)
+            self._pcm_scratch = np.empty(audio.size, dtype=np.float32)
+
+        scratch = self._pcm_scratch[:audio.size]
+        np.clip(audio, -1.0, 1.0, out=scratch)
+        scratch *= 32767
+        pcm = self._pcm_buffer[:audio.size]
+        np.copyto(pcm, scratch, casting='unsafe')
+        return pcm
+
+    def _write_segment(self, sound_file, audio, ready_event=None):
+        """Append one segment to the utterance file (runs on the I/O thread)."""
+        try:
+            if ready_event is not None:
+                ready_event.synchronize()
+            wav_file, _ = sound_file.result()
+            wav_file.buffer_write(self._to_pcm16(audio), dtype='int16')
+        except Exception as e:
+            logging.error(f"Error saving audio segment: {e}")
+
+    def _close_utterance_file(self, sound_file):
+        """Close the utterance file once all its segments are written."""
+        try:
+            wav_file, raw_file = sound_file.result()
+            wav_file.close()
+            raw_file.close()
+        except Exception as e:
+            logging.error(f"Error closing audio file: {e}")
 
     def _player_worker(self):
         """Worker thread that plays audio segments from the audio queue."""
@@ -263,34 +524,30 @@ class KokoroEngine(TTSEngineInterface):
         # Track the next segment that should be played
         self.next_segment_to_play = 1
 
-        while not self.stop_event.is_set():
+        # Locals for the loop; interrupt() restarts this thread whenever it swaps these objects
+        stop_event = self.stop_event
+        audio_queue = self.audio_queue
+        pending_heap = self._pending_heap
+        arrival_counter = self._arrival_counter
+        process_ordered_segments = self._process_ordered_segments
+
+        while not stop_event.is_set():
             try:
-                # Get the next audio segment to play
-                audio, text, sentence_index = self.audio_queue.get()
+                # Get the next audio segment to play, waking periodically so the worker notices stop_event
+                audio, text, sentence_index, ready_event = audio_queue.get(timeout=0.05)
                 
-                # Check for termination signal
-                if audio is None:
-                    self.audio_queue.task_done()
-                    break
+                # Arrival order breaks ties within a batch, so segments (and the end marker) keep generation order
+                heapq.heappush(pending_heap, (sentence_index, next(arrival_counter), audio, text, ready_event))
                 
-                with self.audio_ordering_lock:
-                    # Store this segment in our ordered dictionary
-                    self.ordered_audio_segments[sentence_index] = (audio, text)
-                    
-                    # Process as many segments as we can in order
-                    self._process_ordered_segments()
+                # Process as many segments as we can in order
+                process_ordered_segments()
 
                 # Mark this audio segment as done
-                self.audio_queue.task_done()
-
-                if self.audio_queue.empty():
-                    self.is_talking = False
-
+                audio_queue.task_done()
                 
             except queue.Empty:
                 # No audio to play, check if we have segments ready that were previously queued
-                with self.audio_ordering_lock:
-                    self._process_ordered_segments()
+                process_ordered_segments()
                 continue
             except Exception as e:
                 logging.error(f"Error in player worker: {e}")
@@ -302,47 +559,85 @@ class KokoroEngine(TTSEngineInterface):
 
     def _process_ordered_segments(self):
         """Process segments in order based on sentence_index."""
-        # This method should be called with audio_ordering_lock held
-        while self.next_segment_to_play in self.ordered_audio_segments:
+        # Only called from the player thread, which owns the heap
+        pending_heap = self._pending_heap
+        while pending_heap and pending_heap[0][0] == self.next_segment_to_play:
             # Get the next segment to play
-            audio, text = self.ordered_audio_segments.pop(self.next_segment_to_play)
+            _, _, audio, text, ready_event = heapq.heappop(pending_heap)
+
+            if audio is None:
+                # End of batch marker: the whole batch has been generated and played
+                self.next_segment_to_play += 1
+                continue
+
+            # Wait for the device->host copy of this segment to complete
+            if ready_event is not None:
+                ready_event.synchronize()
+                audio = self._prepare_audio(audio)
             
             display_text = text[:30] + "..." if len(text) > 30 else text
             logging.debug(f"Playing segment {self.next_segment_to_play}: '{display_text}'")
             
             # Play the audio
             self.play_audio(audio, text)
-            
-            # Move to the next segment
-            self.next_segment_to_play += 1
 
-    def play_audio(self, audio_data, text, sample_rate=24000):
-        """Play audio data and update subtitle."""
+    def play_audio(self, audio_data, text):
+        """Queue audio data on the output stream without waiting for it to play."""
         if not self.interrupt_event.is_set():
+            self.playback_buffer.append([audio_data, text, 0, self.playback_generation])
+        else:
+            self.playback_generation += 1
+            self.update_subtitle("")
+
+    def _playback_callback(self, outdata, frames, time_info, status):
+        """PortAudio callback: fill the block from queued segments, zero-filling on underrun."""
+        filled = 0
+        generation = self.playback_generation
+        while filled < frames and self.playback_buffer:
+            segment = self.playback_buffer[0]
+            audio, text, offset, segment_generation = segment
+            if segment_generation != generation:
+                self.playback_buffer.popleft()  # Flushed by interrupt() or play_audio()
+                continue
+            if offset == 0:
+                self.playback_events.put((text, False))
+
+            count = min(frames - filled, len(audio) - offset)
+            outdata[filled:filled + count, 0] = audio[offset:offset + count]
+            filled += count
+            segment[2] = offset + count
+
+            if segment[2] >= len(audio):
+                self.playback_buffer.popleft()
+                self.playback_events.put((text, True))
+
+        if filled < frames:
+            outdata[filled:] = 0
+
+    def _playback_monitor(self):
+        """Worker thread that keeps subtitles and spoken text in step with the output stream."""
+        logging.debug("Playback monitor thread started")
+
+        while not self.stop_event.is_set():
             try:
-                # Cut the beginning of the audio by 0.2 seconds
-                # Calculate how many samples to cut (0.2 seconds * sample_rate)
-                start_to_cut = int(0.24 * sample_rate)
-                end_to_cut = int(0.14 * sample_rate)
-                
-                # Make sure we don't try to cut more than we have
-                if len(audio_data) > start_to_cut + end_to_cut:
-                    trimmed_audio = audio_data[start_to_cut:-end_to_cut]
-                else:
-                    trimmed_audio = audio_data
-                
-                # Play the trimmed audio synchronously
-                sd.play(trimmed_audio, sample_rate*1.15, device="Voicemeeter AUX Input (VB-Audio Voicemeeter VAIO), Windows DirectSound")
-                sd.wait()  # Wait until playback is finished
-                self.spoken_text.put(text)
+                text, finished = self.playback_events.get(timeout=0.1)
+            except queue.Empty:
+                continue
 
-            except Exception as e:
-                logging.error(f"Error playing audio: {e}")
-            finally:
-                # Reset subtitle after this segment is done
-                self.update_subtitle("")
-        else:
+            if not finished:
+                self.update_subtitle(text)
+                continue
+
+            self.spoken_text.put(text)
             self.update_subtitle("")
+            if not self.playback_buffer and self.audio_queue.empty():
+                self._done_talking()
+
+    def _done_talking(self):
+        """Mark playback as finished and notify on_done_talking (after spoken_text is filled)."""
+        self.is_talking = False
+        if self.on_done_talking:
+            self.on_done_talking()
 
     def set_voice(self, voice):
         """Change the voice used for synthesis."""
@@ -351,11 +646,10 @@ class KokoroEngine(TTSEngineInterface):
     
     def set_language(self, lang_code):
         """Change the language used for synthesis."""
-        # This requires reinitializing the pipeline
         self.lang_code = lang_code
         try:
-            # Create a new pipeline with the updated language
-            self.pipeline = KPipeline(lang_code=lang_code)
+            # Reuse the cached pipeline for this language, building it on first use
+            self.pipeline = self._get_pipeline(lang_code)
             logging.info(f"Language changed to: {lang_code}")
         except Exception as e:
             logging.error(f"Error changing language: {e}")
@@ -1,15 +1,33 @@
 """
 This module implements the TTS engine using pyttsx3.
 """
+import math
 import os
+import sys
 import pyttsx3
 import threading
 import queue
 from .tts_interface import TTSEngineInterface
 
+# On Windows, talk to SAPI directly: it queues utterances itself and speaks them
+# asynchronously, so the worker never blocks inside runAndWait()
+win32com = None
+if sys.platform == "win32":
+    try:
+        import pythoncom
+        import win32com.client
+    except ImportError:
+        win32com = None
+
+SVSF_ASYNC = 1  # SpeechVoiceSpeakFlags.SVSFlagsAsync
+SVSF_PURGE_BEFORE_SPEAK = 2  # SpeechVoiceSpeakFlags.SVSFPurgeBeforeSpeak
+
 class PyTTSX3Engine(TTSEngineInterface):
     """TTS engine implementation using pyttsx3."""
     
+    MAX_BATCH = 8  # Most queued utterances spoken per runAndWait() call
+    POLL_MS = 10  # How often a speaking SAPI worker checks stop_event
+    
     def __init__(self, voice="female", rate=140, subtitle_path="subtitles.txt"):
         self.voice_type = voice
         self.rate = rate
@@ -18,9 +36,13 @@ class PyTTSX3Engine(TTSEngineInterface):
         self.queue = queue.Queue()
         self.stop_event = threading.Event()
         self.worker_thread = None
+        # Subtitle file kept open and rewritten in place
+        self.subtitle_file = None
+        self.subtitle_lock = threading.Lock()
     
     def initialize(self):
         """Initialize the TTS engine and start the worker thread."""
+        self.subtitle_file = open(self.subtitle_path, 'w+b', buffering=0)
         # Start the worker thread
         self.worker_thread = threading.Thread(
             target=self._tts_worker,
@@ -36,8 +58,15 @@ class PyTTSX3Engine(TTSEngineInterface):
     def update_subtitle(self, text):
         """Update subtitle file with current text."""
         try:
-            with open(self.subtitle_path, 'w', encoding="utf-8") as file:
-                file.write(text)
+            # The worker and caller threads can both write subtitles
+            with self.subtitle_lock:
+                if self.subtitle_file is None:
+                    self.subtitle_file = open(self.subtitle_path, 'w+b', buffering=0)
+                file = self.subtitle_file
+                # Overwrite, then cut off what's left of longer old text; readers never see it empty
+                file.seek(0)
+                file.write(text.encode("utf-8"))
+                file.truncate()
         except Exception as e:
             print(f"Error updating subtitle file: {e}")
     
@@ -46,9 +75,27 @@ class PyTTSX3Engine(TTSEngineInterface):
         if self.worker_thread and self.worker_thread.is_alive():
             self.stop_event.set()
             self.worker_thread.join(timeout=2)
+        with self.subtitle_lock:
+            if self.subtitle_file:
+                self.subtitle_file.close()
+                self.subtitle_file = None
+    
+    def _next_batch(self):
+        """Wait up to 0.5s for a text, then take whatever else is already queued (up to MAX_BATCH)."""
+        texts = [self.queue.get(timeout=0.5)]
+        while len(texts) < self.MAX_BATCH:
+            try:
+                texts.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return texts
     
     def _tts_worker(self):
         """Worker thread that processes the TTS queue."""
+        if win32com is not None:
+            self._sapi_worker()
+            return
+        
         # Initialize engine in the worker thread
         self.engine = pyttsx3.init()
         
@@ -65,20 +112,64 @@ class PyTTSX3Engine(TTSEngineInterface):
         while not self.stop_event.is_set():
             try:
                 # Non-blocking get with timeout
-                text = self.queue.get(timeout=0.5)
-                # print(f"TTS worker processing: {text}")
+                texts = self._next_batch()
+                # print(f"TTS worker processing: {texts}")
                 
-                # Update subtitle file
-                self.update_subtitle(str(text))
+                # Update subtitle file once for the whole batch
+                self.update_subtitle(" ".join(str(text) for text in texts))
                 
-                # Perform TTS
-                self.engine.say(text)
+                # Perform TTS: queue every utterance, then pump the driver once
+                for text in texts:
+                    self.engine.say(text)
                 self.engine.runAndWait()
                 
-                # print(f"TTS worker finished playing: {text}")
-                self.queue.task_done()
+                # print(f"TTS worker finished playing: {texts}")
+                for _ in texts:
+                    self.queue.task_done()
             except queue.Empty:
                 # No items in queue, just continue
                 continue
             except Exception as e:
-                print(f"Error in TTS worker: {e}")
\ No newline at end of file
+                print(f"Error in TTS worker: {e}")
+    
+    def _sapi_worker(self):
+        """Worker thread that hands the TTS queue to SAPI's own asynchronous queue."""
+        pythoncom.CoInitialize()  # COM objects belong to the thread that created them
+        try:
+            voice = win32com.client.Dispatch("SAPI.SpVoice")
+            
+            # Configure voice
+            voices = voice.GetVoices()
+            if self.voice_type == "female" and voices.Count > 1:
+                voice.Voice = voices.Item(1)
+            else:
+                voice.Voice = voices.Item(0)
+            # SAPI rates run -10..10, each step about 10% faster, with 0 near 200 wpm
+            voice.Rate = max(-10, min(10, round(math.log(self.rate / 200.0, 1.1))))
+            self.engine = voice
+            
+            # Process queue until stopped
+            while not self.stop_event.is_set():
+                try:
+                    texts = self._next_batch()
+                except queue.Empty:
+                    continue
+                
+                try:
+                    # Update subtitle file once for the whole batch
+                    self.update_subtitle(" ".join(str(text) for text in texts))
+                    
+                    # Enqueue every utterance without blocking, then wait in short slices
+                    for text in texts:
+                        voice.Speak(str(text), SVSF_ASYNC)
+                    while not voice.WaitUntilDone(self.POLL_MS):
+                        if self.stop_event.is_set():
+                            voice.Speak("", SVSF_ASYNC | SVSF_PURGE_BEFORE_SPEAK)
+                            break
+                    
+                    for _ in texts:
+                        self.queue.task_done()
+                except Exception as e:
+                    print(f"Error in TTS worker: {e}")
+        finally:
+            pythoncom.CoUninitialize()
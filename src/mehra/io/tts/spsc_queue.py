@@ -0,0 +1,115 @@
+"""
+Low-overhead queues for handing items between TTS pipeline stages.
+"""
+import collections
+import queue
+import threading
+import time
+
+
+class SPSCQueue:
+    """Queue with a lock-free hot path for a single consumer thread.
+
+    Items live in a deque, whose append/popleft are atomic, so put/get never
+    take a lock while the consumer is busy. An Event is only touched when the
+    consumer runs dry and has to sleep. Mirrors the queue.Queue methods used by
+    the engines (put/get/get_nowait/empty/task_done) so it can be swapped in.
+    """
+
+    def __init__(self):
+        self._items = collections.deque()
+        self._not_empty = threading.Event()
+
+    def put(self, item):
+        """Append an item and wake the consumer if it is waiting."""
+        self._items.append(item)
+        if not self._not_empty.is_set():
+            self._not_empty.set()
+
+    def get(self, timeout=None):
+        """Pop the oldest item, blocking up to timeout seconds (forever if None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._items.popleft()
+            except IndexError:
+                pass
+
+            self._not_empty.clear()
+            # A producer may have appended between popleft and clear
+            if self._items:
+                continue
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            self._not_empty.wait(remaining)
+
+    def get_nowait(self):
+        """Pop the oldest item or raise queue.Empty."""
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise queue.Empty from None
+
+    def empty(self):
+        """Return True if there are no items waiting."""
+        return not self._items
+
+    def task_done(self):
+        """No-op, kept for queue.Queue compatibility."""
+        pass
+
+
+class BatchQueue:
+    """Queue whose consumer takes everything that arrives within a batching window.
+
+    Items live in a deque guarded by one Condition. The consumer sleeps on the
+    condition for the first item, then until the window closes, and pops the whole
+    batch under a single lock acquisition instead of one get() per item.
+    """
+
+    def __init__(self):
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Append an item and wake the consumer."""
+        with self._cond:
+            self._items.append(item)
+            self._cond.notify()
+
+    def drain(self, timeout, max_delay, max_size=None, size=len):
+        """Wait up to timeout seconds for a first item, then keep collecting until
+        max_delay has passed since it arrived or the items' total size(item)
+        reaches max_size, whichever comes first.
+
+        Returns every item that arrived, oldest first, or [] if none did in time.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return []
+            deadline = time.monotonic() + max_delay
+            remaining = max_delay
+            counted = total = 0
+            while remaining > 0:
+                if max_size is not None:
+                    # Only items appended since the last wakeup still need sizing
+                    while counted < len(self._items):
+                        total += size(self._items[counted])
+                        counted += 1
+                    if total >= max_size:
+                        break
+                self._cond.wait(remaining)
+                remaining = deadline - time.monotonic()
+            batch = list(self._items)
+            self._items.clear()
+        return batch
+
+    def empty(self):
+        """Return True if there are no items waiting."""
+        return not self._items
+
+    def task_done(self):
+        """No-op, kept for queue.Queue compatibility."""
+        pass
@@ -10,10 +10,27 @@ import asyncio
 import time
 import re
 import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import uvloop  # libuv-based event loop; not available on Windows
+except ImportError:
+    uvloop = None
+
+# End of a sentence: terminal punctuation followed by whitespace
+SENTENCE_END = re.compile(r'[.!?]\s+')
 
 class MeHRa:
     """Modular AI agent that can be extended with various capabilities."""
 
+    # Sentences are held back and sent to TTS together until this many characters
+    # are waiting or this many seconds have passed since the last send
+    TTS_COALESCE_CHARS = 120
+    TTS_COALESCE_DELAY = 0.2
+    # Longest chat waits for the TTS engine to report it stopped talking, in seconds
+    TTS_DONE_TIMEOUT = 60.0
+
     def __init__(
         self,
         model_provider: ModelProvider,
@@ -33,14 +50,21 @@ class MeHRa:
         self.conversation = Conversation()
         self.tools = tools or []
 
-        # Create a new event loop and start it in a separate thread.
-        self.loop = asyncio.new_event_loop()
+        # Create a new event loop (uvloop when installed) and start it in a separate thread.
+        new_event_loop = uvloop.new_event_loop if uvloop else asyncio.new_event_loop
+        self.loop = new_event_loop()
+        self._loop_thread_ident = None  # Set by the loop thread before it starts running
         self.loop_thread = threading.Thread(target=self._start_loop, daemon=True)
         self.loop_thread.start()
         self.critical_section = asyncio.Lock()
 
+        # Sync (llama.cpp) response streams are iterated here, off the chat loop
+        self._llm_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+
         # Add system prompt as the first message
         self.add_message("assistant", system_prompt)
+        # It never changes, so the provider can process it before the first turn
+        self.model_provider.set_system_prompt(system_prompt, role="assistant")
 
         # Optional components (to be implemented later)
         self.retriever = None  # For RAG
@@ -55,6 +79,15 @@ class MeHRa:
         self.spoken_text = self.tts_engine.spoken_text if self.tts_engine else None
         self.tts_engine.interrupt_event = self.interrupt_event
         self.tts_engine.is_generating = False
+        # Set on the loop when the TTS engine stops talking, so chat can await it
+        self._done_talking = asyncio.Event()
+        self.tts_engine.on_done_talking = lambda: self.loop.call_soon_threadsafe(self._done_talking.set)
+
+        # Sentences waiting to be sent to TTS as one say() call
+        self._tts_coalesce_buf = []
+        self._tts_coalesce_chars = 0
+        self._tts_last_flush = time.monotonic()
+        self._tts_flush_timer = None  # Flushes held sentences TTS_COALESCE_DELAY after the first
 
         # Flag to interrupt operations
         self.stop_processing = False 
@@ -73,7 +106,19 @@ class MeHRa:
     def _start_loop(self):
         """Set the event loop for the thread and run it forever."""
         asyncio.set_event_loop(self.loop)
+        self._loop_thread_ident = threading.get_ident()
         self.loop.run_forever()
+
+    def _assert_loop_thread(self):
+        """Fail fast if called off the event loop thread.
+
+        Loop-owned state (critical_section, the coroutines in chat) is not thread-safe;
+        other threads must go through run_coroutine_threadsafe / call_soon_threadsafe.
+        A plain thread id comparison, much cheaper than asyncio's debug-mode check.
+        """
+        assert threading.get_ident() == self._loop_thread_ident, (
+            "MeHRa loop state touched from outside the event loop thread"
+        )
     
     def add_tool(self, tool: Tool) -> None:
         """Add a tool to the agent.
@@ -83,6 +128,20 @@ class MeHRa:
         """
         self.tools.append(tool)
         
+    async def run_tools(self, calls: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Run several tools' calls from one turn concurrently.
+
+        Args:
+            calls: Tool name -> inputs for that tool; each tool gets its inputs as one batch
+
+        Returns:
+            Tool name -> results, one per input
+        """
+        tools = {tool.name: tool for tool in self.tools}
+        names = [name for name in calls if name in tools]
+        results = await asyncio.gather(*(tools[name].arun(calls[name]) for name in names))
+        return dict(zip(names, results))
+
     async def consume_chat(self, user_input: str, **kwargs) -> None:
         """Consume the async generator returned by chat to ensure it runs to completion."""
         async for sentence in self.chat(user_input, **kwargs):
@@ -106,12 +165,30 @@ class MeHRa:
         """
         while True:
             transcript = self.transcript_queue.get()
-            if transcript:
+            if transcript is None:
+                return
+
+            # Take whatever else arrives shortly after, so a burst of transcripts
+            # becomes one chat instead of several queued behind critical_section
+            chunks = [transcript]
+            end = time.monotonic() + 0.05
+            while True:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    chunks.append(self.transcript_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            text = " ".join(filter(None, chunks))
+            if text:
                 # Schedule the chat coroutine in the main event loop from this thread.
-                asyncio.run_coroutine_threadsafe(self.consume_chat(transcript), self.loop)
+                asyncio.run_coroutine_threadsafe(self.consume_chat(text), self.loop)
+            for _ in chunks:
                 self.transcript_queue.task_done()
-            else:
-                time.sleep(0.015)
+            if None in chunks:
+                return
 
     async def chat(self, user_input: str, **kwargs) -> AsyncIterator[str]:
         """Process user input and generate a response, segmenting by sentence.
@@ -128,6 +205,14 @@ class MeHRa:
         if not user_input:
             return
 
+        if asyncio.get_running_loop() is not self.loop:
+            # Called from another loop (run.py's CLI, the Discord bot): run the turn on
+            # MeHRa's loop, which owns critical_section, and relay its sentences here
+            async for sentence in self._relay_chat(user_input, **kwargs):
+                yield sentence
+            return
+
+        self._assert_loop_thread()
         async with self.critical_section:
             # Add user message to conversation
             self.add_message("user", user_input)
@@ -144,56 +229,80 @@ class MeHRa:
             
             # Get streaming response from the model provider
             partial_sentence = ""
-            full_response = ""
+            scan_from = 0  # Everything before this offset is known to hold no sentence end
+            full_response_parts = []  # Joined once, if the full response is needed
             # while self.tts_engine.is_talking:
             #     await asyncio.sleep(0.025)
 
             # await asyncio.sleep(0.05)
             ##############################
-            async for chunk in self.model_provider.generate_response_stream(
-                self.get_history(),
-                **kwargs
-            ):
+            interrupted = False
+            async for chunk in self._stream_response(self.get_history(), **kwargs):
                 if self.interrupt_event.is_set() or not self.transcript_queue.empty():
+                    interrupted = True
                     break
 
                 self.tts_engine.is_generating = True #sending info to tts_engine (no idea what it does, probably useless)
-                full_response += chunk
+                full_response_parts.append(chunk)
                 partial_sentence += chunk
 
-                # More robust sentence segmentation with regex
-                sentences = re.split(r'(?<=[.!?])\s+', partial_sentence)
-
-
-                # Yield complete sentences
-                for i in range(len(sentences) - 1):
-                    sentence = sentences[i].strip()
-
+                # Scan only the new text for sentence ends, starting one character back
+                # in case the previous chunk ended on the punctuation
+                start = 0
+                for match in SENTENCE_END.finditer(partial_sentence, scan_from):
+                    sentence = partial_sentence[start:match.start() + 1].strip()
 
                     # Send to TTS engine if configured
                     if self.tts_engine:
-                        self.tts_engine.say(sentence)
+                        self._maybe_flush_to_tts(sentence)
                     yield sentence
+                    start = match.end()
 
                 # Keep the last partial sentence
-                partial_sentence = sentences[-1]
+                partial_sentence = partial_sentence[start:]
+                scan_from = max(0, len(partial_sentence) - 1)
 
             ########################################
+            # Speak what is still held back, unless the user cut in
+            if interrupted:
+                if self._tts_flush_timer is not None:
+                    self._tts_flush_timer.cancel()
+                    self._tts_flush_timer = None
+                self._tts_coalesce_buf.clear()
+                self._tts_coalesce_chars = 0
+            else:
+                self._flush_to_tts()
             self.tts_engine.is_generating = False
 
             spoken_text = []
 
-            while not self.spoken_text.empty() or self.tts_engine.is_talking:
+            # Sleep until the engine reports it stopped talking instead of polling;
+            # clearing before the re-check means a stop in between is never missed.
+            # is_busy also covers text said but not yet generated, so the reply just
+            # flushed above is waited for. Bounded, so an engine that never reports
+            # can't hold critical_section forever.
+            deadline = time.monotonic() + self.TTS_DONE_TIMEOUT
+            while self.tts_engine.is_busy:
+                self._done_talking.clear()
+                if not self.tts_engine.is_busy:
+                    break
                 try:
-                    spoken = self.spoken_text.get(timeout=0.05)
-                    # print("spoken:", spoken)
+                    await asyncio.wait_for(self._done_talking.wait(), timeout=deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    print("TTS engine did not report it stopped talking; continuing")
+                    break
 
-                    if spoken:
-                        spoken_text.append(spoken)
-                        self.spoken_text.task_done()
+            # The engine queues spoken text before it stops talking, so it's all here now
+            while True:
+                try:
+                    spoken = self.spoken_text.get_nowait()
                 except queue.Empty:
-                    await asyncio.sleep(0.05)
-                    continue
+                    break
+                # print("spoken:", spoken)
+
+                if spoken:
+                    spoken_text.append(spoken)
+                    self.spoken_text.task_done()
             
             if spoken_text != []:
                 spoken_text = " ".join(spoken_text)
@@ -201,7 +310,7 @@ class MeHRa:
 
             # if not self.interrupt_event.is_set():
             #     # Add the full response to the conversation
-            #     self.add_message("assistant", full_response)
+            #     self.add_message("assistant", "".join(full_response_parts))
 
             #     # Yield any remaining partial sentence
             #     if partial_sentence:
@@ -213,6 +322,116 @@ class MeHRa:
 
 
 
+    async def _relay_chat(self, user_input: str, **kwargs) -> AsyncIterator[str]:
+        """Run chat() on MeHRa's loop and yield its sentences on the calling loop."""
+        caller = asyncio.get_running_loop()
+        sentences = asyncio.Queue()
+        end = object()
+
+        async def produce():
+            try:
+                async for sentence in self.chat(user_input, **kwargs):
+                    caller.call_soon_threadsafe(sentences.put_nowait, sentence)
+            finally:
+                caller.call_soon_threadsafe(sentences.put_nowait, end)
+
+        turn = asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        # turn only completes once MeHRa's loop runs the task's done callback, which can
+        # be after end arrives here, so turn.done() can't tell a finished turn apart
+        finished = False
+        try:
+            while True:
+                sentence = await sentences.get()
+                if sentence is end:
+                    finished = True
+                    break
+                yield sentence
+        finally:
+            if not finished:
+                turn.cancel()  # The caller stopped early (or was cancelled)
+        await asyncio.wrap_future(turn)  # Re-raise anything chat() raised
+
+    async def _stream_response(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Yield the model's response chunks without blocking the event loop.
+
+        Async streams (Ollama) are passed through. Sync generators (llama.cpp) block
+        for every token, so they are drained on the LLM executor thread into a deque.
+        The worker only wakes the loop (call_soon_threadsafe) when the consumer is
+        waiting, so a burst of tokens costs one wakeup rather than one per token.
+        """
+        stream = self.model_provider.generate_response_stream(messages, **kwargs)
+        if hasattr(stream, "__aiter__"):
+            async for chunk in stream:
+                yield chunk
+            return
+
+        loop = asyncio.get_running_loop()
+        chunks = deque()  # append/popleft are atomic, so no lock is needed
+        ready = asyncio.Event()  # Set (on the loop) once chunks has something new
+        stop = threading.Event()  # Set when the consumer stops early
+
+        def push(chunk):
+            chunks.append(chunk)
+            # Appended before the check: a consumer that cleared `ready` re-checks chunks
+            if not ready.is_set():
+                loop.call_soon_threadsafe(ready.set)
+
+        def drain():
+            try:
+                for chunk in stream:
+                    if stop.is_set():
+                        break
+                    push(chunk)
+            finally:
+                push(None)  # End of stream
+
+        worker = loop.run_in_executor(self._llm_exec, drain)
+        try:
+            while True:
+                try:
+                    chunk = chunks.popleft()
+                except IndexError:
+                    ready.clear()
+                    if not chunks:
+                        await ready.wait()
+                    continue
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            stop.set()
+        await worker  # Re-raise anything the stream raised
+
+    def _maybe_flush_to_tts(self, sentence: str) -> None:
+        """Hold a sentence for TTS, sending the held ones once enough text or time has built up.
+
+        A timer sends them TTS_COALESCE_DELAY after the first one is held, so a slow
+        stream never keeps a sentence back waiting for the next.
+        """
+        self._tts_coalesce_buf.append(sentence)
+        self._tts_coalesce_chars += len(sentence)
+        if (self._tts_coalesce_chars >= self.TTS_COALESCE_CHARS
+                or time.monotonic() - self._tts_last_flush > self.TTS_COALESCE_DELAY):
+            self._flush_to_tts()
+        elif self._tts_flush_timer is None:
+            self._tts_flush_timer = self.loop.call_later(self.TTS_COALESCE_DELAY, self._flush_to_tts)
+
+    def _flush_to_tts(self) -> None:
+        """Send all held sentences to the TTS engine as one utterance."""
+        if self._tts_flush_timer is not None:
+            self._tts_flush_timer.cancel()
+            self._tts_flush_timer = None
+        if self._tts_coalesce_buf and self.tts_engine:
+            # say() only queues the text; synthesis runs on the engine's own threads
+            self.tts_engine.say(" ".join(self._tts_coalesce_buf))
+        self._tts_coalesce_buf.clear()
+        self._tts_coalesce_chars = 0
+        self._tts_last_flush = time.monotonic()
+
+    async def aclose(self) -> None:
+        """Release the model provider's resources (e.g. its pooled HTTP session)."""
+        await self.model_provider.aclose()
+
     def set_retriever(self, retriever: Any) -> None:
         """Set a retriever component for RAG capabilities.
 
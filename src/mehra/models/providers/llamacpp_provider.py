@@ -1,4 +1,5 @@
-from typing import Dict, List, Any, Generator
+from typing import Dict, List, Any, Generator, Optional
+from functools import cached_property, partial
 import time
 from .model_provider import ModelProvider
 
@@ -42,6 +43,9 @@ class LlamaCppProvider(ModelProvider):
         n_ctx: int = 2048,
         n_threads: int = 8,
         n_gpu_layers: int = 0,
+        n_batch: int = 512,
+        chat_format: Optional[str] = None,
+        sample_params: Optional[Dict[str, Any]] = None,
         verbose: bool = False,
         **kwargs
     ):
@@ -52,6 +56,11 @@ class LlamaCppProvider(ModelProvider):
             n_ctx: Context window size (default: 2048)
             n_threads: Number of threads for inference (default: 8)
             n_gpu_layers: Number of layers to offload to GPU (0 = CPU only, default: 0)
+            n_batch: Prompt tokens evaluated per batch (default: 512)
+            chat_format: llama.cpp chat format name, e.g. "chatml" or "llama-3"
+                (default: None, use the template embedded in the GGUF metadata)
+            sample_params: Overrides for the default sampling parameters (temperature 0.7,
+                top_p 0.95, top_k 40, repeat_penalty 1.1)
             verbose: Enable verbose output (default: False)
             **kwargs: Additional parameters to pass to Llama
         """
@@ -67,11 +76,18 @@ class LlamaCppProvider(ModelProvider):
                 n_ctx=n_ctx,
                 n_threads=n_threads,
                 n_gpu_layers=n_gpu_layers,
+                n_batch=n_batch,
+                chat_format=chat_format,
                 verbose=verbose,
                 **kwargs
             )
         except Exception as e:
             raise RuntimeError(f"Failed to load model from {model_path}: {str(e)}")
+        
+        # Sampling parameters are fixed per provider, so bind them into the call once
+        self._sample_params = {"temperature": 0.7, "top_p": 0.95, "top_k": 40, "repeat_penalty": 1.1}
+        self._sample_params.update(sample_params or {})
+        self._completion = partial(self.model.create_chat_completion, stream=True, **self._sample_params)
     
     def generate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Generate a complete response using Llama.cpp.
@@ -86,11 +102,8 @@ class LlamaCppProvider(ModelProvider):
         Returns:
             Complete text response
         """
-        # Collect all chunks from streaming and return as single string
-        full_response = ""
-        for chunk in self.generate_response_stream(messages, **kwargs):
-            full_response += chunk
-        return full_response
+        # Collect all chunks from streaming and join them once
+        return "".join(self.generate_response_stream(messages, **kwargs))
     
     def generate_response_stream(
         self,
@@ -109,65 +122,82 @@ class LlamaCppProvider(ModelProvider):
         Yields:
             Text chunks as they are generated
         """
-        # Record overall start time (including setup)
-        overall_start_time = time.time()
+        # Record overall start time (including setup); monotonic ns, converted to ms once at the end
+        overall_start_ns = time.monotonic_ns()
         
-        # Extract generation parameters
-        temperature = kwargs.get("temperature", 0.7)
-        top_p = kwargs.get("top_p", 0.95)
+        # Extract generation parameters; sampling ones only when overridden for this call
         max_tokens = kwargs.get("max_tokens", 512)
+        overrides = {k: kwargs[k] for k in self._sample_params if k in kwargs}
         
-        # Format messages into a prompt (setup phase)
-        setup_start = time.time()
-        prompt = self._format_messages_to_prompt(messages)
-        setup_end = time.time()
+        # Setup phase: just the parameters, prompt assembly happens inside llama.cpp
+        model_start_ns = time.monotonic_ns()  # When model inference starts
         
         # Initialize latency tracking
         metrics = LatencyMetrics()
-        metrics.setup_latency = (setup_end - setup_start) * 1000
-        
-        first_token_time = None
+        first_token_ns = None
         token_count = 0
-        model_start_time = setup_end  # When model inference starts
 
         try:
-            # Use llama_cpp's streaming capability
-            response = self.model(
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                stream=True,
-            )
+            # Stream a chat completion: llama.cpp renders the model's own chat template,
+            # tokenizes it, and keeps the KV cache for the prefix shared with the last call
+            response = iter(self._completion(messages=messages, max_tokens=max_tokens, **overrides))
             
-            # Yield text chunks from the stream
+            # Peeled: run up to the first text chunk (the first chunk usually only
+            # carries the role) and time it, so the main loop has no first-token branch
             for chunk in response:
-                if "choices" in chunk and len(chunk["choices"]) > 0:
-                    delta = chunk["choices"][0].get("text", "")
-                    if delta:
-                        token_count += 1
-                        
-                        # Record first token latency (from model start)
-                        if first_token_time is None:
-                            first_token_time = time.time()
-                            metrics.first_token_latency = (first_token_time - model_start_time) * 1000
-                        
-                        yield delta
+                choices = chunk.get("choices")
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    first_token_ns = time.monotonic_ns()
+                    token_count = 1
+                    yield delta
+                    break
+            
+            # Yield the remaining text chunks
+            for chunk in response:
+                choices = chunk.get("choices")
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    token_count += 1
+                    yield delta
                         
             # Calculate final metrics
-            end_time = time.time()
-            metrics.total_latency = (end_time - overall_start_time) * 1000
+            end_ns = time.monotonic_ns()
+            metrics.setup_latency = (model_start_ns - overall_start_ns) / 1e6
+            metrics.total_latency = (end_ns - overall_start_ns) / 1e6
             metrics.tokens_generated = token_count
             
             if token_count > 0:
+                metrics.first_token_latency = (first_token_ns - model_start_ns) / 1e6
                 metrics.time_per_token = (metrics.total_latency - metrics.setup_latency) / token_count
-                metrics.tokens_per_second = token_count / ((end_time - model_start_time) or 1)
+                metrics.tokens_per_second = token_count / (((end_ns - model_start_ns) / 1e9) or 1)
             
             self.last_metrics = metrics
                         
         except Exception as e:
             yield f"Error: Failed to generate response. {str(e)}"
     
+    def set_system_prompt(self, text: str, role: str = "system") -> None:
+        """Prefill the KV cache with the conversation's fixed opening message.
+        
+        Runs a one-token chat completion over just that message. llama.cpp keeps the
+        evaluated tokens, and every later prompt starts with the same rendered
+        prefix, so the first turn skips the system prompt's forward pass too.
+        
+        Args:
+            text: Content of the opening message
+            role: Role it is sent with (default: "system")
+        """
+        if not text:
+            return
+        try:
+            self.model.create_chat_completion(
+                messages=[{"role": role, "content": text}],
+                max_tokens=1,
+            )
+        except Exception as e:
+            print(f"Failed to prefill the system prompt: {e}")
+    
     def get_latency_metrics(self) -> LatencyMetrics:
         """Get the latency metrics from the last inference.
         
@@ -176,47 +206,28 @@ class LlamaCppProvider(ModelProvider):
         """
         return self.last_metrics
     
-    def _format_messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
-        """Convert messages to a prompt string.
-        
-        Args:
-            messages: List of message dictionaries with 'role' and 'content'
+    @cached_property
+    def model_info(self) -> Dict[str, Any]:
+        """Information about the loaded model, built once (none of it changes after __init__).
         
         Returns:
-            Formatted prompt string
+            Dictionary containing model information
         """
-        prompt = ""
-        for message in messages:
-            role = message.get("role", "user").lower()
-            content = message.get("content", "")
-            
-            if role == "system":
-                prompt += f"{content}\n\n"
-            elif role == "user":
-                prompt += f"User: {content}\n"
-            elif role == "assistant":
-                prompt += f"Assistant: {content}\n"
-        
-        # Add prompt for assistant response
-        prompt += "Assistant:"
-        return prompt
+        return {
+            "model_path": self.model_path,
+            "context_size": self.n_ctx,
+            "threads": self.n_threads,
+            "gpu_layers": self.n_gpu_layers,
+            "model_loaded": self.model is not None,
+        }
     
     def get_model_info(self) -> Dict[str, Any]:
-        """Get information about the loaded model.
+        """Get information about the loaded model (same as the model_info property).
         
         Returns:
             Dictionary containing model information
         """
-        try:
-            return {
-                "model_path": self.model_path,
-                "context_size": self.n_ctx,
-                "threads": self.n_threads,
-                "gpu_layers": self.n_gpu_layers,
-                "model_loaded": self.model is not None,
-            }
-        except Exception as e:
-            return {"error": str(e)}
+        return self.model_info
     
     def __del__(self):
         """Clean up model resources."""
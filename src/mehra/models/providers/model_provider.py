@@ -1,3 +1,4 @@
+import asyncio
 from typing import List, Dict
 
 class ModelProvider:
@@ -6,3 +7,16 @@ class ModelProvider:
     def generate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Generate a response from the model."""
         raise NotImplementedError("Subclasses must implement this method")
+
+    async def agenerate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Async generate_response(); by default runs it on a worker thread."""
+        return await asyncio.to_thread(self.generate_response, messages, **kwargs)
+
+    def set_system_prompt(self, text: str, role: str = "system") -> None:
+        """Tell the provider the conversation's fixed opening message, so it can prepare
+        for it ahead of the first turn (no-op by default)."""
+        pass
+
+    async def aclose(self) -> None:
+        """Release any connections or other resources the provider holds (no-op by default)."""
+        pass
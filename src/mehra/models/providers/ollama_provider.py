@@ -1,24 +1,137 @@
+import asyncio
+import contextlib
 import aiohttp
-import requests
 import json
-from typing import Dict, List, Any, AsyncGenerator
+from typing import Dict, List, Any, AsyncGenerator, Optional, Tuple
 from .model_provider import ModelProvider
 
+try:
+    import orjson  # Parses straight from bytes, several times faster than json
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads  # Also accepts bytes
+
+try:
+    import ijson  # Incremental JSON parser, only needed for stream_bytes mode
+except ImportError:
+    ijson = None
+
 class OllamaProvider(ModelProvider):
     """Ollama model provider."""
+
+    # aiohttp refuses lines longer than twice its read buffer (64 KiB by default),
+    # which large tool-call or multimodal NDJSON records can exceed
+    READ_BUFSIZE = 1024 * 1024
     
-    def __init__(self, model_name: str = "llama3", base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        model_name: str = "llama3",
+        base_url: str = "http://localhost:11434",
+        max_concurrent_requests: int = 2,
+        stream_bytes: bool = False,
+    ):
         """Initialize the Ollama provider.
         
         Args:
             model_name: Name of the model to use
             base_url: Base URL for the Ollama API
+            max_concurrent_requests: Chat requests allowed in flight at once; the rest
+                wait their turn (see set_cap())
+            stream_bytes: Parse the response stream incrementally with ijson instead of
+                line by line, so a huge record (e.g. a large tool_calls array) is never
+                held in memory as one line. Requires ijson.
         """
+        if stream_bytes and ijson is None:
+            raise ImportError("stream_bytes=True requires ijson (pip install ijson)")
         self.model_name = model_name
         self.base_url = base_url
         self.api_endpoint = f"{base_url}/api/chat"
+        self.stream_bytes = stream_bytes
+        # Created on first use, inside the loop that streams, and reused across turns
+        # so every request goes over an already-open keep-alive connection
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop = None
+        # Admission control: many Discord users chatting at once would otherwise all
+        # hit the one local model together
+        self._cap = max_concurrent_requests
+        self._active = 0
+        self._cond = asyncio.Condition()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on the running loop if needed."""
+        if self._session is not None and self._session_loop is not asyncio.get_running_loop():
+            # A session only works on the loop it was created on (e.g. one warmed up
+            # at startup, when chat later runs on MeHRa's loop thread)
+            await self.aclose()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=16, keepalive_timeout=60),
+                read_bufsize=self.READ_BUFSIZE,
+            )
+            self._session_loop = asyncio.get_running_loop()
+        return self._session
+
+    async def set_cap(self, n: int) -> None:
+        """Change how many chat requests may run at once.
+
+        Raising the cap wakes waiters that now fit; lowering it takes effect as
+        running requests finish.
+        """
+        async with self._cond:
+            grew = n > self._cap
+            self._cap = n
+            if grew:
+                self._cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def _admitted(self):
+        """Hold one of the cap's request slots for the duration of the block."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._cap)
+            self._active += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._active -= 1
+                self._cond.notify(1)
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP session and its pooled connections."""
+        session, self._session = self._session, None
+        if session is None or session.closed:
+            return
+        loop = self._session_loop
+        if loop is asyncio.get_running_loop() or loop.is_closed() or not loop.is_running():
+            await session.close()
+        else:
+            # The session belongs to another thread's loop; close it there
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+
+    async def __aenter__(self) -> "OllamaProvider":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
     
     def generate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Blocking agenerate_response() for code that has no event loop running."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("generate_response() would block the running loop; await agenerate_response() instead")
+
+        async def fetch():
+            try:
+                return await self.agenerate_response(messages, **kwargs)
+            finally:
+                await self.aclose()  # The session is bound to this temporary loop
+
+        return asyncio.run(fetch())
+
+    async def agenerate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Generate a complete response using Ollama.
         
         Args:
@@ -31,17 +144,44 @@ class OllamaProvider(ModelProvider):
         Returns:
             Complete text response
         """
-        # For non-streaming, collect all chunks and return as single string
-        full_response = ""
-        for chunk in self.generate_response_stream(messages, **kwargs):
-            full_response += chunk
-        return full_response
+        # Ask for the whole reply as one JSON object rather than parsing a line per token
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            **kwargs,
+            "stream": False,
+        }
+
+        async with self._admitted():
+            try:
+                session = await self._get_session()
+                async with session.post(self.api_endpoint, json=payload) as response:
+                    response.raise_for_status()
+                    # Parse the raw body; response.json() would decode it to str first
+                    data = json_loads(await response.read())
+                    return data["message"]["content"]
+            except aiohttp.ClientError as e:
+                print(f"Error calling Ollama API: {e}")
+                return f"Error: Failed to get response from model. {str(e)}"
     
-    async def generate_response_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+    async def generate_response_stream(
+        self,
+        messages: List[Dict[str, str]],
+        coalesce_ms: float = 20.0,
+        coalesce_chars: int = 32,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
         """Generate a streaming response using Ollama asynchronously.
 
+        Ollama sends one token per line, so tokens are held back and yielded
+        together once coalesce_chars characters are waiting or coalesce_ms has
+        passed since the last yield, so downstream work (printing, TTS, translation)
+        runs once per batch rather than once per token.
+
         Args:
             messages: List of message dictionaries with 'role' and 'content'.
+            coalesce_ms: Longest time tokens are held back, in milliseconds.
+            coalesce_chars: Number of held-back characters that triggers a yield.
             **kwargs: Additional parameters to pass to the Ollama API.
 
         Yields:
@@ -54,40 +194,113 @@ class OllamaProvider(ModelProvider):
             **kwargs
         }
 
-        try:
-            async with aiohttp.ClientSession() as session:
+        loop = asyncio.get_running_loop()
+        coalesce_s = coalesce_ms / 1000
+        buf = []
+        buf_chars = 0
+        last_flush = loop.time()
+
+        async with self._admitted():
+            try:
+                session = await self._get_session()
                 async with session.post(self.api_endpoint, json=payload) as response:
                     response.raise_for_status()
 
                     # Process the streaming response asynchronously
-                    async for line in response.content:
-                        line_text = line.decode('utf-8').strip()
+                    records = self._parse_bytes(response) if self.stream_bytes else self._parse_lines(response)
+                    async for content, done in records:
+                        # Buffer content
+                        if content:
+                            buf.append(content)
+                            buf_chars += len(content)
+                            now = loop.time()
+                            if buf_chars >= coalesce_chars or now - last_flush >= coalesce_s:
+                                yield "".join(buf)
+                                buf.clear()
+                                buf_chars = 0
+                                last_flush = now
 
-                        if not line_text:
-                            continue
+                        if done:
+                            break  # End of stream
 
-                        try:
-                            chunk_data = json.loads(line_text)
+                if buf:
+                    yield "".join(buf)
 
-                            # Extract and yield content
-                            if "message" in chunk_data and "content" in chunk_data["message"]:
-                                yield chunk_data["message"]["content"]
-                            elif "done" in chunk_data and chunk_data["done"]:
-                                break  # End of stream
-                        except json.JSONDecodeError:
-                            continue  # Skip invalid JSON lines
+            except aiohttp.ClientError as e:
+                print(f"Error calling Ollama API: {e}")
+                if buf:
+                    yield "".join(buf)
+                yield f"Error: Failed to get response from model. {str(e)}"
 
-        except aiohttp.ClientError as e:
-            print(f"Error calling Ollama API: {e}")
-            yield f"Error: Failed to get response from model. {str(e)}"
-    
-    def list_available_models(self) -> List[str]:
+    @staticmethod
+    async def _parse_lines(response) -> AsyncGenerator[Tuple[Optional[str], bool], None]:
+        """Yield (content, done) for each NDJSON record, reading one line at a time."""
+        reader = response.content
+        while True:
+            line = await reader.readuntil(b"\n")
+            if not line:
+                break  # EOF
+
+            if line.isspace():
+                continue  # The parser takes the line as-is, trailing newline included
+
+            try:
+                chunk_data = json_loads(line)
+            except ValueError:  # json/orjson.JSONDecodeError
+                continue  # Skip invalid JSON lines
+
+            yield chunk_data.get("message", {}).get("content"), bool(chunk_data.get("done"))
+
+    @staticmethod
+    async def _parse_bytes(response) -> AsyncGenerator[Tuple[Optional[str], bool], None]:
+        """Yield (content, done) as ijson parses them from raw byte chunks.
+
+        Only message.content strings and the done flag are kept; everything else
+        (tool_calls included) is skipped token by token, so memory stays bounded by
+        the chunk size however long a record is.
+        """
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events, multiple_values=True)
+        try:
+            async for data in response.content.iter_chunked(65536):
+                parser.send(data)
+                for prefix, event, value in events:
+                    if prefix == "message.content" and event == "string":
+                        yield value, False
+                    elif prefix == "done" and event == "boolean" and value:
+                        yield None, True
+                del events[:]
+        finally:
+            try:
+                parser.close()
+            except ijson.JSONError:
+                pass  # Stream ended mid-record
+
+    async def list_available_models(self) -> List[str]:
         """List available models from Ollama."""
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            response.raise_for_status()
-            result = response.json()
-            return [model["name"] for model in result["models"]]
-        except requests.exceptions.RequestException as e:
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/api/tags") as response:
+                response.raise_for_status()
+                result = json_loads(await response.read())
+                return [model["name"] for model in result["models"]]
+        except aiohttp.ClientError as e:
             print(f"Error listing models: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def list_available_models_sync(self) -> List[str]:
+        """Blocking list_available_models() for code that has no event loop running."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("list_available_models_sync() would block the running loop; await list_available_models() instead")
+
+        async def fetch():
+            try:
+                return await self.list_available_models()
+            finally:
+                await self.aclose()  # The session is bound to this temporary loop
+
+        return asyncio.run(fetch())
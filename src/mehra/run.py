@@ -1,12 +1,24 @@
+import os
+
+# One CPU thread policy for the whole process, set before anything imports torch: its
+# OpenMP/MKL pools are process-global and Kokoro, Silero VAD, CTranslate2 and the LLM all
+# share the cores. Export these variables to override.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
 from models.providers.ollama_provider import OllamaProvider
-from models.providers.llamacpp_provider import LlamaCppProvider
 from mehra import MeHRa
 import asyncio
 import argparse
-from integrations.discord.main import main as discord_main
-from io.tts import get_tts_engine
-from io.stt import get_stt_engine
-from translate import Translator
+import signal
+import sys
+# TTS, STT, llama.cpp, Discord and the translator pull in heavy packages (torch,
+# whisper, kokoro, discord.py), so each is imported only when main() needs it
+
+try:
+    import uvloop  # libuv-based event loop; not available on Windows
+except ImportError:
+    uvloop = None
 
 
 # parser = argparse.ArgumentParser(description="Run Mehra with optional Discord integration.")
@@ -24,6 +36,7 @@ system_prompt="My name is Mehra. A human named Sir AB created me. I am sassy, un
 system_prompt_viet = "Em tên là Mehra, em được tạo ra bởi một người tên là Sir AB. Em rất đanh đá, mất trí và không ngại nói lên suy nghĩ của mình. Em cũng rất mỉa mai và thường xuyên chửi thề. Câu trả lời của em nên bằng tiếng Việt."
 
 system_prompt_jap = "私の名前はメーラ。人間のSir ABが私を創った。私は生意気でぶっ飛んでいて、思ったことは遠慮なく言うタイプ。それに皮肉屋で、時々汚い言葉も使うわよ。"
+
 # Example usage with streaming
 async def main(
         discord: bool=False, 
@@ -34,35 +47,45 @@ async def main(
         model_path: str=None
     ):
     
-    # Initialize TTS engine
-    if tts:
-        tts_engine = get_tts_engine(
+    # Load the TTS, STT and model weights side by side instead of one after another.
+    # The imports happen on the worker threads too, so they don't block the loop.
+    def build_tts():
+        from io.tts import get_tts_engine
+        return get_tts_engine(
             engine_type="kokoro",  # Change to "kokoro" when ready
         )
-    else:
-        tts_engine = None
 
-    if stt:
-        stt_engine = get_stt_engine(
+    def build_stt():
+        from io.stt import get_stt_engine
+        return get_stt_engine(
             engine_type="whisper"
         )
-    else:
-        stt_engine = None
 
-    # Initialize the appropriate model provider
-    if provider.lower() == "llamacpp":
+    def build_llamacpp():
         # Use Llama.cpp provider for local GGUF models
-        model_path = model_path or llamacpp_model_path
-        model_provider = LlamaCppProvider(
-            model_path=model_path,
+        from models.providers.llamacpp_provider import LlamaCppProvider
+        return LlamaCppProvider(
+            model_path=model_path or llamacpp_model_path,
             n_ctx=2048,
             n_threads=8,
             n_gpu_layers=0,  # Set to >0 if you have GPU support (CUDA/Metal)
         )
-    else:
+
+    async def load_tts():
+        return await asyncio.to_thread(build_tts) if tts else None
+
+    async def load_stt():
+        return await asyncio.to_thread(build_stt) if stt else None
+
+    # Initialize the appropriate model provider
+    async def load_provider():
+        if provider.lower() == "llamacpp":
+            return await asyncio.to_thread(build_llamacpp)
         # Default to Ollama provider
-        model_provider = OllamaProvider(model_name=ollama_model_name)
-    
+        return OllamaProvider(model_name=ollama_model_name)
+
+    tts_engine, stt_engine, model_provider = await asyncio.gather(load_tts(), load_stt(), load_provider())
+
     # Create the agent
     mehra = MeHRa(
         model_provider=model_provider,
@@ -72,28 +95,57 @@ async def main(
 
     )
 
+    # Listing the models opens the pooled connection (and checks the server is up)
+    # before the first turn. The session is bound to the loop that opens it and every
+    # chat turn runs on mehra.loop, so warm it up there rather than on this loop.
+    if isinstance(model_provider, OllamaProvider):
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(model_provider.list_available_models(), mehra.loop)
+        )
+
+    # from translate import Translator
     # translator = Translator(from_lang="ja",to_lang="en")
 
 
-    # if args.discord or discord:
-    if discord:
-        await discord_main(mehra)
-    elif no_cli:
-        while True:
-            await asyncio.sleep(0.5)
-    else:
-        while True:
-            # Example interaction with streaming
-            user_input = input(">>> ")
-            async for chunk in mehra.chat(user_input, stream=True):
-                print(chunk, end=" ", flush=True)
-                # translation = translator.translate(chunk) 
-                # print(f"Translation: {translation}")
-            print("\n")
+    try:
+        # if args.discord or discord:
+        if discord:
+            from integrations.discord.main import main as discord_main
+            await discord_main(mehra)
+        elif no_cli:
+            # Sleep until Ctrl+C / SIGTERM instead of waking up twice a second
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, stop.set)
+                except NotImplementedError:  # Windows event loops
+                    signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+            await stop.wait()
+        else:
+            stdout_write = sys.stdout.buffer.write
+            stdout_flush = sys.stdout.buffer.flush
+            while True:
+                # Example interaction with streaming
+                # Read stdin on a worker thread so the loop keeps serving other tasks meanwhile
+                user_input = await asyncio.get_running_loop().run_in_executor(None, input, ">>> ")
+                # Write encoded sentences straight to the byte stream; chat() already
+                # yields whole sentences, so one flush each is cheap and nothing lingers
+                async for chunk in mehra.chat(user_input, stream=True):
+                    stdout_write(chunk.encode("utf-8"))
+                    stdout_write(b" ")
+                    stdout_flush()
+                    # translation = translator.translate(chunk) 
+                    # print(f"Translation: {translation}")
+                print("\n")
+    finally:
+        await mehra.aclose()
 
 
 if __name__ == "__main__":
-    asyncio.run(main(
+    # uvloop.run builds its loop through asyncio.Runner's loop_factory on 3.11+
+    run = uvloop.run if uvloop else asyncio.run
+    run(main(
         discord=False,
         no_cli=True,
         tts=True,
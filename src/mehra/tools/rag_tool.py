@@ -1,29 +1,52 @@
-from typing import Any
+import asyncio
+from typing import Any, List, Optional
 from .tool import Tool
 
 class RAGTool(Tool):
     """Tool for Retrieval-Augmented Generation."""
 
-    def __init__(self, vector_store: Any):
+    def __init__(self, vector_store: Any, top_k: int = 5):
         """Initialize the RAG tool.
 
         Args:
-            vector_store: Vector store for document retrieval
+            vector_store: Vector store for document retrieval (e.g. a MemoryManager)
+            top_k: Number of documents to retrieve per query
         """
         super().__init__(name="rag", description="Retrieves information from a document database")
         self.vector_store = vector_store
+        self.top_k = top_k
 
-    def run(self, query: str) -> str:
+    def run(self, query: str, query_embedding: Optional[List[float]] = None) -> str:
         """Run RAG with the given query.
 
         Args:
             query: Search query
+            query_embedding: Optional precomputed embedding of query, so callers that
+                already embedded it (e.g. for an earlier tool call) skip the model
 
         Returns:
             Retrieved information
         """
-        # This is a placeholder. In a real implementation, you would:
-        # 1. Embed the query
-        # 2. Search the vector store
-        # 3. Format and return the results
-        return f"[RAG would retrieve information about: {query}]"
+        hits = self.vector_store.retrieve(query, top_k=self.top_k, query_embedding=query_embedding)
+        return self._format(query, hits)
+
+    async def arun(self, queries: List[str]) -> List[str]:
+        """Run RAG for several queries at once, off the event loop.
+
+        All queries are embedded in one batch before searching.
+
+        Args:
+            queries: Search queries
+
+        Returns:
+            Retrieved information for each query, in the same order
+        """
+        results = await asyncio.to_thread(self.vector_store.retrieve_many, queries, top_k=self.top_k)
+        return [self._format(query, hits) for query, hits in zip(queries, results)]
+
+    @staticmethod
+    def _format(query: str, hits: List[Any]) -> str:
+        """Render retrieved entries as a bullet list for the model."""
+        if not hits:
+            return f"[No information found about: {query}]"
+        return "\n".join(f"- {hit.text}" for hit in hits)
@@ -1,3 +1,7 @@
+import asyncio
+from typing import List
+
+
 class Tool:
     """Base class for tools that the agent can use."""
 
@@ -21,3 +25,17 @@ class Tool:
             Result from running the tool
         """
         raise NotImplementedError("Subclasses must implement this method")
+
+    async def arun(self, inputs: List[str]) -> List[str]:
+        """Run the tool on several inputs without blocking the event loop.
+
+        The default runs run() on each input in turn on a worker thread; tools that
+        can handle a batch at once should override it.
+
+        Args:
+            inputs: Inputs for the tool
+
+        Returns:
+            One result per input, in the same order
+        """
+        return await asyncio.to_thread(lambda: [self.run(input_data) for input_data in inputs])
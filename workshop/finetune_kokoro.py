@@ -1,5 +1,6 @@
-import librosa
+import soundfile as sf
 import torch
+import torch.nn.functional as F
 import torchaudio
 from kokoro.model import KModel
 from huggingface_hub import hf_hub_download
@@ -11,36 +12,55 @@ device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
 
 
-model = torch.load("styletts2_ljspeech_finetune.pth", map_location='cpu', weights_only=True)
+# mmap pages tensors in from disk instead of reading the whole checkpoint into RAM first
+model = torch.load("styletts2_ljspeech_finetune.pth", map_location=device, weights_only=True, mmap=True)
 # state = model['net']
 # torch.save(state, 'styletts2_ljspeech_finetune.pth')
 
 to_mel = torchaudio.transforms.MelSpectrogram(
-    n_mels=80, n_fft=2048, win_length=1200, hop_length=300)
+    n_mels=80, n_fft=2048, win_length=1200, hop_length=300).to(device)
 mean, std = -4, 4
 
 def length_to_mask(lengths):
-    mask = torch.arange(lengths.max()).unsqueeze(0).expand(lengths.shape[0], -1).type_as(lengths)
-    mask = torch.gt(mask+1, lengths.unsqueeze(1))
-    return mask
+    # True past each sequence's length; one broadcast comparison, no expanded copy
+    ar = torch.arange(int(lengths.max()), device=lengths.device, dtype=lengths.dtype)
+    return ar.unsqueeze(0) >= lengths.unsqueeze(1)
 
-def preprocess(wave):
-    wave_tensor = torch.from_numpy(wave).float()
+@torch.inference_mode()
+def preprocess(wave_tensor):
+    # wave_tensor is already on the device: the FFT is much faster there
     mel_tensor = to_mel(wave_tensor)
     mel_tensor = (torch.log(1e-5 + mel_tensor.unsqueeze(0)) - mean) / std
     return mel_tensor
 
 
 
+def trim(wave, top_db=30, frame_length=2048, hop_length=512):
+    # Same rule as librosa.effects.trim, on the tensor: drop leading and trailing
+    # frames whose RMS is more than top_db below the loudest frame
+    half = frame_length // 2
+    padded = F.pad(wave[None, None], (half, half))[0, 0]
+    rms = padded.unfold(0, frame_length, hop_length).pow(2).mean(dim=1).sqrt()
+    db = 20 * torch.log10(rms.clamp(min=1e-10))
+    loud = torch.nonzero(db > db.max() - top_db).squeeze(1)
+    if loud.numel() == 0:
+        return wave[:0]
+    start = int(loud[0]) * hop_length
+    end = min(wave.shape[-1], (int(loud[-1]) + 1) * hop_length)
+    return wave[start:end]
+
 def compute_style(path):
-    wave, sr = librosa.load(path, sr=24000)
-    audio, index = librosa.effects.trim(wave, top_db=30)
+    wave, sr = sf.read(path, dtype='float32', always_2d=False)
+    wave = torch.from_numpy(wave).to(device)
+    if wave.dim() > 1:
+        wave = wave.mean(dim=1)  # Mix down to mono, like librosa.load
     if sr != 24000:
-        audio = librosa.resample(audio, sr, 24000)
-    mel_tensor = preprocess(audio).to(device)
+        wave = torchaudio.functional.resample(wave, sr, 24000)
+    audio = trim(wave, top_db=30)
+    mel_tensor = preprocess(audio)
 
-    with torch.no_grad():
+    with torch.inference_mode():
         ref_s = model.style_encoder(mel_tensor.unsqueeze(1))
         ref_p = model.predictor_encoder(mel_tensor.unsqueeze(1))
 
-    return torch.cat([ref_s, ref_p], dim=1)
\ No newline at end of file
+    return torch.cat([ref_s, ref_p], dim=1)
@@ -4,6 +4,8 @@ Shows how to use MemoryManager with Chroma backend in a conversation context.
 """
 
 import logging
+import shutil
+import tempfile
 from datetime import datetime, timedelta
 
 from core.memory import MemoryManager, MemoryType
@@ -13,12 +15,12 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
-def demo_basic_usage():
+def demo_basic_usage(backend=None):
     """Demonstrate basic memory operations."""
     print("\n=== Basic Memory Operations ===\n")
 
     # Initialize backend and manager
-    backend = ChromaBackend(persist_dir="./memory_storage")
+    backend = backend or ChromaBackend(persist_dir="./memory_storage")
     memory = MemoryManager(backend=backend)
 
     # Add some episodic memories (events/utterances)
@@ -76,11 +78,11 @@ def demo_basic_usage():
     return memory, backend
 
 
-def demo_filtering():
+def demo_filtering(backend=None):
     """Demonstrate filtering by type, user, tags."""
     print("\n=== Filtering Examples ===\n")
 
-    backend = ChromaBackend(persist_dir="./memory_storage_demo2")
+    backend = backend or ChromaBackend(persist_dir="./memory_storage_demo2")
     memory = MemoryManager(backend=backend)
 
     # Add memories with different types and users
@@ -118,11 +120,11 @@ def demo_filtering():
     backend.clear()
 
 
-def demo_summarization():
+def demo_summarization(backend=None):
     """Demonstrate memory summarization."""
     print("\n=== Summarization Example ===\n")
 
-    backend = ChromaBackend(persist_dir="./memory_storage_demo3")
+    backend = backend or ChromaBackend(persist_dir="./memory_storage_demo3")
     memory = MemoryManager(backend=backend)
 
     # Add a series of episodic memories
@@ -153,11 +155,11 @@ def demo_summarization():
     backend.clear()
 
 
-def demo_context_assembly():
+def demo_context_assembly(backend=None):
     """Demonstrate assembling context for LLM prompts."""
     print("\n=== Context Assembly for Prompts ===\n")
 
-    backend = ChromaBackend(persist_dir="./memory_storage_demo4")
+    backend = backend or ChromaBackend(persist_dir="./memory_storage_demo4")
     memory = MemoryManager(backend=backend)
 
     # Simulate a multi-turn conversation
@@ -210,9 +212,20 @@ You are a helpful coding assistant. Use the following context about the user to
 
 
 if __name__ == "__main__":
-    demo_basic_usage()
-    demo_filtering()
-    demo_summarization()
-    demo_context_assembly()
+    # Build each backend once instead of once per demo. The demos that clear
+    # their memories afterwards share a scratch backend in a temporary directory.
+    backend = ChromaBackend(persist_dir="./memory_storage")
+    scratch_dir = tempfile.mkdtemp(prefix="mehra_memory_demo_")
+    scratch = ChromaBackend(persist_dir=scratch_dir)
+    try:
+        demo_basic_usage(backend)
+        demo_filtering(scratch)
+        demo_summarization(scratch)
+        demo_context_assembly(scratch)
+    finally:
+        backend.close()
+        # Close before removing the directory, or the exit hook snapshots into a deleted path
+        scratch.close()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
     print("\n✓ All demos completed successfully!")